@@ -1,6 +1,44 @@
-from services.database import init_db
+"""
+Index migration / audit command.
+
+    python init_db.py            create missing indexes from services/db_indexes.py
+    python init_db.py --dry-run  list missing indexes without creating them
+    python init_db.py --check    also explain() the hot queries; exit 1 on any COLLSCAN
+"""
+import os
+import sys
+import argparse
+
+# Index creation is driven from here, not from importing services.database
+os.environ["DB_AUTO_INDEX"] = "false"
+
+from services.database import db
+from services.db_indexes import ensure_indexes, check_query_plans
 
 if __name__ == "__main__":
-    print("Initializing database...")
-    init_db()
-    print("Database initialization complete!") 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Create and audit MongoDB indexes")
+    parser.add_argument("--dry-run", action="store_true", help="only report missing indexes")
+    parser.add_argument("--check", action="store_true", help="explain() hot queries and report COLLSCANs")
+    args = parser.parse_args()
+
+    if db is None:
+        print("MongoDB is not connected - check MONGO_URI")
+        sys.exit(1)
+
+    print("Initializing database..." if not args.dry_run else "Checking database indexes...")
+    report = ensure_indexes(db, dry_run=args.dry_run, verbose=True)
+    for label in report["missing"]:
+        print(f"  missing: {label}")
+    for label in report["conflicts"]:
+        print(f"  conflict: {label}")
+    for name in report["unregistered"]:
+        print(f"  not in registry (left in place): {name}")
+    print(f"Created {len(report['created'])}, missing {len(report['missing'])}, "
+          f"conflicts {len(report['conflicts'])}, unregistered {len(report['unregistered'])}")
+
+    if args.check:
+        collscans = check_query_plans(db)
+        if collscans:
+            sys.exit(1)
+
+    print("Database initialization complete!")
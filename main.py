@@ -5,6 +5,7 @@ from fastapi import FastAPI, Request, Depends, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 import os
+import asyncio
 from dotenv import load_dotenv
 from routes.auth import router as auth_router
 from routes.user import router as user_router
@@ -143,6 +144,13 @@ except Exception as e:
     print(f"Warning: Knowledge Base router failed to import: {e}")
     knowledge_base_available = False
 
+try:
+    from routes.jobs import router as jobs_router
+    jobs_available = True
+except Exception as e:
+    print(f"Warning: Jobs router failed to import: {e}")
+    jobs_available = False
+
 # API credentials are now hardcoded in the respective service files
 # But we still need to load environment variables for configuration
 load_dotenv()
@@ -275,6 +283,11 @@ if knowledge_base_available:
     app.include_router(knowledge_base_router, prefix="/api/knowledge-base", tags=["Knowledge Base"])
     available_features.append("Knowledge Base Management")
 
+# Background job status (uploads, crawls, knowledge base builds)
+if jobs_available:
+    app.include_router(jobs_router, prefix="/api", tags=["Background Jobs"])
+    available_features.append("Background Ingestion Jobs")
+
 # Dashboard router is always included
 app.include_router(dashboard_router, prefix="/api", tags=["Dashboard"])
 available_features.append("Dashboard Analytics")
@@ -327,9 +340,16 @@ def health_check():
     """Health check endpoint for monitoring"""
     return {"status": "healthy"}
 
+# Background task sweeping expired entries out of the in-process caches
+cache_sweeper_task = None
+# Background task queueing scheduled knowledge base website syncs
+website_sync_scheduler_task = None
+
 @app.on_event("startup")
 async def startup_event():
     """Run on application startup"""
+    global cache_sweeper_task, website_sync_scheduler_task
+
     # Seed default admin user
     seed_default_admin()
     
@@ -341,6 +361,66 @@ async def startup_event():
     except Exception as e:
         print(f"Warning: Failed to start subscription monitor: {e}")
 
+    # Report hot queries that would scan a whole collection (explain() runs off the event loop)
+    if os.getenv("DB_QUERY_PLAN_CHECK", "true").lower() != "false":
+        try:
+            from services.database import db
+            from services.db_indexes import check_query_plans
+            asyncio.get_running_loop().run_in_executor(None, check_query_plans, db)
+        except Exception as e:
+            print(f"Warning: Failed to start query plan check: {e}")
+
+    # Start the background job workers (handlers are registered by the routers imported above)
+    try:
+        from services.jobs import job_queue
+        job_queue.start()
+    except Exception as e:
+        print(f"Warning: Failed to start job workers: {e}")
+
+    # Queue scheduled website re-syncs (the job workers run them)
+    if os.getenv("WEBSITE_SYNC_SCHEDULER", "true").lower() != "false":
+        try:
+            from services.langchain.website_sync import run_website_sync_scheduler
+            website_sync_scheduler_task = asyncio.create_task(run_website_sync_scheduler())
+        except Exception as e:
+            print(f"Warning: Failed to start website sync scheduler: {e}")
+
+    # Start the background sweeper for bounded in-process caches
+    try:
+        from services.cache import run_cache_sweeper
+        cache_sweeper_task = asyncio.create_task(run_cache_sweeper())
+    except Exception as e:
+        print(f"Warning: Failed to start cache sweeper: {e}")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Run on application shutdown"""
+    if cache_sweeper_task is not None:
+        cache_sweeper_task.cancel()
+    if website_sync_scheduler_task is not None:
+        website_sync_scheduler_task.cancel()
+
+    # Stop job workers; an interrupted job goes back to the queue
+    try:
+        from services.jobs import job_queue
+        await job_queue.stop()
+    except Exception as e:
+        print(f"Warning: Failed to stop job workers: {e}")
+
+    # Flush chat messages / profile updates still queued for the database
+    try:
+        from services.background_writer import background_writer
+        await background_writer.drain()
+    except Exception as e:
+        print(f"Warning: Failed to flush background writes: {e}")
+
+    # Close asyncio Pinecone handles opened by the chat pipeline
+    try:
+        from services.pinecone.async_index import close_async_indexes
+        await close_async_indexes()
+    except Exception as e:
+        print(f"Warning: Failed to close Pinecone async handles: {e}")
+
 # Create the final app instance
 if chatbot_available and 'socket_app' in locals():
     # If Socket.IO is available, use the wrapped app
@@ -4,9 +4,11 @@ from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Any
 from services.database import get_database
 from services.auth import get_user_by_email, is_admin_user
-from services.cache import cache, cache_key, invalidate_admin_cache
+from services.cache import cache, cache_key, ainvalidate_admin_cache, cache_stats
+from services.db_indexes import ensure_indexes, check_query_plans
 from bson import ObjectId
 import os
+import asyncio
 import jwt
 from collections import defaultdict
 import psutil
@@ -57,7 +59,7 @@ async def get_all_organizations(admin_data: dict = Depends(verify_admin_access))
     try:
         # Check cache first
         cache_key_str = cache_key("admin", "organizations")
-        cached_data = cache.get(cache_key_str)
+        cached_data = await cache.aget(cache_key_str)
         if cached_data is not None:
             return cached_data
         
@@ -144,7 +146,7 @@ async def get_all_organizations(admin_data: dict = Depends(verify_admin_access))
                     org[date_field] = "Unknown"
         
         # Cache for 2 minutes (organizations data changes less frequently)
-        cache.set(cache_key_str, organizations, ttl=120)
+        await cache.aset(cache_key_str, organizations, ttl=120)
         
         return organizations
     except Exception as e:
@@ -156,7 +158,7 @@ async def get_all_conversations(admin_data: dict = Depends(verify_admin_access))
     try:
         # Check cache first
         cache_key_str = cache_key("admin", "conversations")
-        cached_data = cache.get(cache_key_str)
+        cached_data = await cache.aget(cache_key_str)
         if cached_data is not None:
             return cached_data
         
@@ -198,7 +200,7 @@ async def get_all_conversations(admin_data: dict = Depends(verify_admin_access))
                 conv["created_at"] = conv["created_at"].isoformat() if hasattr(conv["created_at"], 'isoformat') else str(conv["created_at"])
         
         # Cache for 30 seconds (conversations change frequently)
-        cache.set(cache_key_str, conversations, ttl=30)
+        await cache.aset(cache_key_str, conversations, ttl=30)
         
         return conversations
     except Exception as e:
@@ -210,7 +212,7 @@ async def get_all_subscriptions(admin_data: dict = Depends(verify_admin_access))
     try:
         # Check cache first
         cache_key_str = cache_key("admin", "subscriptions")
-        cached_data = cache.get(cache_key_str)
+        cached_data = await cache.aget(cache_key_str)
         if cached_data is not None:
             return cached_data
         
@@ -268,7 +270,7 @@ async def get_all_subscriptions(admin_data: dict = Depends(verify_admin_access))
                 sub["current_period_end"] = sub["current_period_end"].isoformat()
         
         # Cache for 5 minutes (subscription data changes less frequently)
-        cache.set(cache_key_str, subscriptions, ttl=300)
+        await cache.aset(cache_key_str, subscriptions, ttl=300)
         
         return subscriptions
     except Exception as e:
@@ -280,7 +282,7 @@ async def get_all_visitors(admin_data: dict = Depends(verify_admin_access)):
     try:
         # Check cache first
         cache_key_str = cache_key("admin", "visitors")
-        cached_data = cache.get(cache_key_str)
+        cached_data = await cache.aget(cache_key_str)
         if cached_data is not None:
             return cached_data
         
@@ -337,7 +339,7 @@ async def get_all_visitors(admin_data: dict = Depends(verify_admin_access)):
                 visitor["agent_takeover_at"] = visitor["agent_takeover_at"].isoformat()
         
         # Cache for 2 minutes (visitor data changes more frequently)
-        cache.set(cache_key_str, visitors, ttl=120)
+        await cache.aset(cache_key_str, visitors, ttl=120)
         
         return visitors
     except Exception as e:
@@ -349,7 +351,7 @@ async def get_dashboard_stats(admin_data: dict = Depends(verify_admin_access)):
     try:
         # Check cache first
         cache_key_str = cache_key("admin", "dashboard", "stats")
-        cached_data = cache.get(cache_key_str)
+        cached_data = await cache.aget(cache_key_str)
         if cached_data is not None:
             return cached_data
         
@@ -389,7 +391,7 @@ async def get_dashboard_stats(admin_data: dict = Depends(verify_admin_access)):
         stats["last_updated"] = datetime.now().isoformat()
         
         # Cache for 1 minute (dashboard stats need to be relatively fresh)
-        cache.set(cache_key_str, stats, ttl=60)
+        await cache.aset(cache_key_str, stats, ttl=60)
         
         return stats
     except Exception as e:
@@ -401,7 +403,7 @@ async def get_business_insights(admin_data: dict = Depends(verify_admin_access))
     try:
         # Check cache first
         cache_key_str = cache_key("admin", "business", "insights")
-        cached_data = cache.get(cache_key_str)
+        cached_data = await cache.aget(cache_key_str)
         if cached_data is not None:
             return cached_data
         
@@ -483,9 +485,9 @@ async def get_business_insights(admin_data: dict = Depends(verify_admin_access))
                 
             # Calculate real cache hit rate from Redis statistics
             try:
-                if cache.is_available():
+                if await cache.ais_available():
                     # Get Redis INFO stats
-                    redis_info = cache.redis_client.info()
+                    redis_info = await asyncio.to_thread(cache.redis_client.info)
                     keyspace_hits = redis_info.get('keyspace_hits', 0)
                     keyspace_misses = redis_info.get('keyspace_misses', 0)
                     
@@ -557,7 +559,7 @@ async def get_business_insights(admin_data: dict = Depends(verify_admin_access))
         }
         
         # Cache for 5 minutes (business insights change less frequently)
-        cache.set(cache_key_str, insights, ttl=300)
+        await cache.aset(cache_key_str, insights, ttl=300)
         
         return insights
     except Exception as e:
@@ -569,7 +571,7 @@ async def get_admin_analytics(admin_data: dict = Depends(verify_admin_access)):
     try:
         # Check cache first
         cache_key_str = cache_key("admin", "analytics")
-        cached_data = cache.get(cache_key_str)
+        cached_data = await cache.aget(cache_key_str)
         if cached_data is not None:
             return cached_data
         
@@ -673,7 +675,7 @@ async def get_admin_analytics(admin_data: dict = Depends(verify_admin_access)):
             })
         
         # Cache for 10 minutes (analytics data doesn't change frequently)
-        cache.set(cache_key_str, data, ttl=600)
+        await cache.aset(cache_key_str, data, ttl=600)
         
         return data
     except Exception as e:
@@ -685,7 +687,7 @@ async def get_realtime_stats(admin_data: dict = Depends(verify_admin_access)):
     try:
         # Check cache first (shorter TTL for realtime data)
         cache_key_str = cache_key("admin", "realtime", "stats")
-        cached_data = cache.get(cache_key_str)
+        cached_data = await cache.aget(cache_key_str)
         if cached_data is not None:
             return cached_data
         
@@ -716,7 +718,7 @@ async def get_realtime_stats(admin_data: dict = Depends(verify_admin_access)):
         }
         
         # Cache for 15 seconds (realtime data needs to be very fresh)
-        cache.set(cache_key_str, stats, ttl=15)
+        await cache.aset(cache_key_str, stats, ttl=15)
         
         return stats
     except Exception as e:
@@ -728,7 +730,7 @@ async def get_subscription_distribution(admin_data: dict = Depends(verify_admin_
     try:
         # Check cache first
         cache_key_str = cache_key("admin", "subscription", "distribution")
-        cached_data = cache.get(cache_key_str)
+        cached_data = await cache.aget(cache_key_str)
         if cached_data is not None:
             return cached_data
         
@@ -764,7 +766,7 @@ async def get_subscription_distribution(admin_data: dict = Depends(verify_admin_
             })
         
         # Cache for 5 minutes (subscription distribution doesn't change frequently)
-        cache.set(cache_key_str, distribution, ttl=300)
+        await cache.aset(cache_key_str, distribution, ttl=300)
         
         return distribution
     except Exception as e:
@@ -776,7 +778,7 @@ async def get_system_health(admin_data: dict = Depends(verify_admin_access)):
     try:
         # Check cache first
         cache_key_str = cache_key("admin", "system", "health")
-        cached_data = cache.get(cache_key_str)
+        cached_data = await cache.aget(cache_key_str)
         if cached_data is not None:
             return cached_data
         
@@ -835,7 +837,7 @@ async def get_system_health(admin_data: dict = Depends(verify_admin_access)):
         }
         
         # Cache for 30 seconds (system health needs to be fresh)
-        cache.set(cache_key_str, health_data, ttl=30)
+        await cache.aset(cache_key_str, health_data, ttl=30)
         
         return health_data
     except Exception as e:
@@ -847,7 +849,7 @@ async def get_usage_analytics(admin_data: dict = Depends(verify_admin_access)):
     try:
         # Check cache first
         cache_key_str = cache_key("admin", "usage", "analytics")
-        cached_data = cache.get(cache_key_str)
+        cached_data = await cache.aget(cache_key_str)
         if cached_data is not None:
             return cached_data
         
@@ -960,7 +962,7 @@ async def get_usage_analytics(admin_data: dict = Depends(verify_admin_access)):
         }
         
         # Cache for 2 minutes (usage analytics should be fairly fresh)
-        cache.set(cache_key_str, analytics_data, ttl=120)
+        await cache.aset(cache_key_str, analytics_data, ttl=120)
         
         return analytics_data
     except Exception as e:
@@ -976,7 +978,7 @@ async def get_organization_usage_admin(
     try:
         # Check cache first
         cache_key_str = cache_key("admin", "org", organization_id, "usage")
-        cached_data = cache.get(cache_key_str)
+        cached_data = await cache.aget(cache_key_str)
         if cached_data is not None:
             return cached_data
         
@@ -1119,7 +1121,7 @@ async def get_organization_usage_admin(
         }
         
         # Cache for 1 minute (organization usage should be fairly fresh)
-        cache.set(cache_key_str, usage_data, ttl=60)
+        await cache.aset(cache_key_str, usage_data, ttl=60)
         
         return usage_data
     except Exception as e:
@@ -1158,7 +1160,7 @@ async def get_organization_with_api_key(
 async def invalidate_cache(admin_data: dict = Depends(verify_admin_access)):
     """Manually invalidate all admin cache entries"""
     try:
-        deleted_count = invalidate_admin_cache()
+        deleted_count = await ainvalidate_admin_cache()
         return {
             "message": "Cache invalidated successfully",
             "deleted_entries": deleted_count,
@@ -1171,10 +1173,11 @@ async def invalidate_cache(admin_data: dict = Depends(verify_admin_access)):
 async def get_cache_status(admin_data: dict = Depends(verify_admin_access)):
     """Get cache status and statistics"""
     try:
-        if not cache.is_available():
+        if not await cache.ais_available():
             return {
                 "status": "unavailable",
                 "message": "Redis cache is not available",
+                "stats": cache.stats(),
                 "timestamp": datetime.now().isoformat()
             }
         
@@ -1192,8 +1195,8 @@ async def get_cache_status(admin_data: dict = Depends(verify_admin_access)):
         
         key_status = {}
         for key in cache_keys_to_check:
-            exists = cache.exists(key)
-            ttl = cache.get_ttl(key) if exists else -1
+            exists = await cache.aexists(key)
+            ttl = await cache.aget_ttl(key) if exists else -1
             key_status[key] = {
                 "exists": exists,
                 "ttl_seconds": ttl
@@ -1203,6 +1206,7 @@ async def get_cache_status(admin_data: dict = Depends(verify_admin_access)):
             "status": "available",
             "redis_connected": True,
             "cache_keys": key_status,
+            "stats": cache.stats(),
             "timestamp": datetime.now().isoformat()
         }
     except Exception as e:
@@ -1212,12 +1216,40 @@ async def get_cache_status(admin_data: dict = Depends(verify_admin_access)):
             "timestamp": datetime.now().isoformat()
         }
 
+@router.get("/cache/stats")
+async def get_cache_stats(admin_data: dict = Depends(verify_admin_access)):
+    """Get size and hit/miss/eviction statistics for every in-process cache"""
+    try:
+        return {
+            **cache_stats(),
+            "timestamp": datetime.now().isoformat()
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting cache stats: {str(e)}")
+
+@router.get("/db/indexes")
+async def get_index_report(admin_data: dict = Depends(verify_admin_access)):
+    """Missing/unregistered indexes and hot queries that still do a COLLSCAN"""
+    try:
+        db = get_database()
+        loop = asyncio.get_running_loop()
+        report = await loop.run_in_executor(None, lambda: ensure_indexes(db, dry_run=True))
+        collscans = await loop.run_in_executor(None, check_query_plans, db)
+        return {
+            "missing": report["missing"],
+            "unregistered": report["unregistered"],
+            "collscans": collscans,
+            "timestamp": datetime.now().isoformat()
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error checking indexes: {str(e)}")
+
 @router.get("/revenue-stats")
 async def get_revenue_stats(admin_data: dict = Depends(verify_admin_access)):
     """Get revenue statistics and analytics"""
     try:
         cache_key = "admin:revenue:stats"
-        cached_data = cache.get(cache_key)
+        cached_data = await cache.aget(cache_key)
         if cached_data:
             return cached_data
         
@@ -1389,7 +1421,7 @@ async def get_revenue_stats(admin_data: dict = Depends(verify_admin_access)):
         }
         
         # Cache for 5 minutes
-        cache.set(cache_key, revenue_stats, ttl=300)
+        await cache.aset(cache_key, revenue_stats, ttl=300)
         
         return revenue_stats
         
@@ -1402,7 +1434,7 @@ async def get_conversation_stats(admin_data: dict = Depends(verify_admin_access)
     """Get conversation statistics and analytics"""
     try:
         cache_key = "admin:conversation:stats"
-        cached_data = cache.get(cache_key)
+        cached_data = await cache.aget(cache_key)
         if cached_data:
             return cached_data
         
@@ -1573,7 +1605,7 @@ async def get_conversation_stats(admin_data: dict = Depends(verify_admin_access)
         }
         
         # Cache for 3 minutes
-        cache.set(cache_key, conversation_stats, ttl=180)
+        await cache.aset(cache_key, conversation_stats, ttl=180)
         
         return conversation_stats
         
@@ -6,14 +6,14 @@ import pymongo
 import requests
 import json
 import uuid
-from services.database import get_organization_by_api_key, db
+from services.database import db
+from services.org_resolver import get_organization_from_api_key
 import time
 
 router = APIRouter()
 
-# Initialize calendly settings collection
+# Calendly settings collection (indexes are declared in services/db_indexes.py)
 calendly_settings_collection = db.calendly_settings
-calendly_settings_collection.create_index("organization_id", unique=True)
 
 class CalendlySettings(BaseModel):
     calendly_url: Optional[str] = None
@@ -37,17 +37,6 @@ class AvailableSlot(BaseModel):
     end_time: str
     scheduling_url: str
 
-async def get_organization_from_api_key(api_key: Optional[str] = Header(None, alias="X-API-Key")):
-    """Dependency to get organization from API key"""
-    if not api_key:
-        raise HTTPException(status_code=401, detail="API key is required")
-    
-    organization = get_organization_by_api_key(api_key)
-    if not organization:
-        raise HTTPException(status_code=401, detail="Invalid API key")
-    
-    return organization
-
 def make_calendly_api_request(endpoint: str, access_token: str, params: dict = None):
     """Make authenticated request to Calendly API"""
     headers = {
@@ -5,10 +5,16 @@ from bson import ObjectId
 
 # Critical imports (must succeed)
 from services.database import (
-    get_organization_by_api_key, create_or_update_visitor, add_conversation_message, 
+    create_or_update_visitor, add_conversation_message, 
     get_visitor, get_conversation_history, save_user_profile, get_user_profile, db,
-    set_agent_mode, set_bot_mode, is_chat_in_agent_mode
+    set_agent_mode, set_bot_mode, is_chat_in_agent_mode,
+    async_db, upsert_visitor_async, add_conversation_message_async, upsert_user_profile_async
 )
+from services.org_resolver import (
+    get_organization_from_api_key, resolve_organization, invalidate_organization, resolve_knowledge_base
+)
+from services.cache import register_cache
+from services.jobs import job_queue, JobContext, save_upload
 
 # Try to import optional services with error handling
 try:
@@ -29,6 +35,7 @@ import json
 import os
 import uuid
 import shutil
+import asyncio
 from pathlib import Path
 from pydantic import BaseModel, Field
 from datetime import datetime
@@ -37,7 +44,7 @@ import re
 import openai
 import socketio
 from fastapi import FastAPI
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 import boto3
 
 router = APIRouter()
@@ -73,6 +80,7 @@ def init_socketio(app: FastAPI):
             # Auto-join organization room using API key
             room_name = api_key
             await sio.enter_room(sid, room_name)
+            await sio.save_session(sid, {'api_key': api_key})
             
             # Send a welcome message to confirm connection
             await sio.emit('connection_confirmed', {
@@ -98,22 +106,67 @@ def init_socketio(app: FastAPI):
                 'status': 'joined'
             }, room=sid)
     
+    @sio.event
+    async def ask_stream(sid, data):
+        """Stream an answer token by token to the requesting socket"""
+        data = data or {}
+        session_id = data.get('session_id')
+        question = data.get('question')
+        if not session_id or not question:
+            await sio.emit('answer_error', {
+                'session_id': session_id,
+                'error': 'session_id and question are required'
+            }, room=sid)
+            return
+
+        # Only the key authenticated on connect counts; any socket can join any room,
+        # so tokens go to this socket alone
+        socket_session = await sio.get_session(sid)
+        organization = await resolve_organization(socket_session.get('api_key'))
+        if not organization:
+            await sio.emit('answer_error', {
+                'session_id': session_id,
+                'error': 'Invalid API key'
+            }, room=sid)
+            return
+
+        try:
+            async for event in _stream_chat(organization, ChatRequest(**data)):
+                if event["type"] == "token":
+                    await sio.emit('answer_chunk', {
+                        'session_id': session_id,
+                        'content': event["content"]
+                    }, room=sid)
+                elif event["type"] == "done":
+                    await sio.emit('answer_complete', event["result"], room=sid)
+        except Exception as e:
+            print(f"[SOCKET.IO] Error streaming answer for session {session_id}: {str(e)}")
+            print(traceback.format_exc())
+            await sio.emit('answer_error', {
+                'session_id': session_id,
+                'error': 'Internal Server Error'
+            }, room=sid)
+
+    async def emit_job_update(job):
+        """Push background job progress to the organization room and the job's own room"""
+        room = job.pop("notify_room", None)
+        if room:
+            await sio.emit('job_progress', job, room=room)
+        await sio.emit('job_progress', job, room=job["job_id"])
+
+    job_queue.add_listener(emit_job_update)
+
     # Mount Socket.IO on the FastAPI app at /socket.io/
     socket_asgi_app = socketio.ASGIApp(sio, app, socketio_path='/socket.io')
     return socket_asgi_app
 
-# Initialize collections and indexes
+# Initialize collections (indexes are declared in services/db_indexes.py)
 if SERVICES_AVAILABLE:
     instant_replies = db.instant_reply
-    instant_replies.create_index("org_id")
-    instant_replies.create_index([("org_id", pymongo.ASCENDING), ("is_active", pymongo.ASCENDING)])
-
     upload_history_collection = db.upload_history
-    upload_history_collection.create_index("org_id")
-    upload_history_collection.create_index([("org_id", pymongo.ASCENDING), ("created_at", pymongo.DESCENDING)])
 
-# User session storage (in a real application, use Redis for temporary storage)
-user_sessions = {}
+# User session storage (bounded, idle sessions expire and are swept in the background)
+user_sessions = register_cache("chatbot_user_sessions", max_entries=10000, ttl_seconds=86400)
 
 def get_org_id(organization: Dict[str, Any]) -> str:
     """Safely get organization ID from either 'id' or MongoDB '_id'."""
@@ -191,16 +244,27 @@ class UploadHistoryResponse(BaseModel):
     type: str  # "url" or "pdf"
     created_at: datetime
 
-async def get_organization_from_api_key(api_key: Optional[str] = Header(None, alias="X-API-Key")):
-    """Dependency to get organization from API key"""
-    if not api_key:
-        raise HTTPException(status_code=401, detail="API key is required")
-    
-    organization = get_organization_by_api_key(api_key)
-    if not organization:
-        raise HTTPException(status_code=401, detail="Invalid API key")
-    
-    return organization
+async def get_knowledge_base_info(organization: dict) -> Optional[dict]:
+    """Look up the knowledge base (kb_id / vectorStoreId) owned by the organization's user"""
+    return await resolve_knowledge_base(organization.get("user_id"))
+
+async def _stream_chat(organization: dict, request: ChatRequest):
+    """Shared driver for the SSE endpoint and the ask_stream socket event"""
+    if not SERVICES_AVAILABLE:
+        raise HTTPException(status_code=500, detail="Chatbot services are not available")
+
+    knowledge_base_info = await get_knowledge_base_info(organization)
+    async for event in ChatbotService.process_chat_stream(
+        question=request.question,
+        session_id=request.session_id,
+        api_key=organization.get("api_key"),
+        mode=request.mode,
+        user_data=request.user_data,
+        organization=organization,
+        kb_id=knowledge_base_info.get("kb_id") if knowledge_base_info else None,
+        vectorStoreId=knowledge_base_info.get("vectorStoreId") if knowledge_base_info else None
+    ):
+        yield event
 
 @router.post("/ask")
 async def ask_question(
@@ -215,8 +279,7 @@ async def ask_question(
        
         
         # Get organization info for response
-        user_id = organization.get("user_id")
-        knowledge_base_info = db.knowledge_bases.find_one({"userId": user_id}, {"vectorStoreId": 1, "kb_id": {"$toString": "$_id"}})
+        knowledge_base_info = await get_knowledge_base_info(organization)
         
         # Check if services are available
         if not SERVICES_AVAILABLE:
@@ -243,6 +306,32 @@ async def ask_question(
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
+@router.post("/ask/stream")
+async def ask_question_stream(
+    request: ChatRequest,
+    organization: dict = Depends(get_organization_from_api_key)
+):
+    """
+    Same as /ask but streams the answer as Server-Sent Events:
+    `event: token` for each generated chunk, then a single `event: done`
+    with the /ask response payload (or `event: error`).
+    """
+    async def event_source():
+        try:
+            async for event in _stream_chat(organization, request):
+                payload = {"content": event["content"]} if event["type"] == "token" else event["result"]
+                yield f"event: {event['type']}\ndata: {json.dumps(payload, default=str)}\n\n"
+        except Exception as e:
+            print(f"Error in ask_question_stream: {str(e)}")
+            print(traceback.format_exc())
+            yield f"event: error\ndata: {json.dumps({'detail': 'Internal Server Error'})}\n\n"
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/history/{session_id}")
 async def get_chat_history(
     session_id: str,
@@ -443,6 +532,10 @@ async def delete_upload_history(
         print(f"Error deleting upload history: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# Page caps for website training: the synchronous request has to finish before the HTTP timeout
+SOCIAL_PLATFORMS = ['facebook', 'instagram', 'twitter', 'linkedin', 'youtube']
+UPLOAD_BACKGROUND_MAX_PAGES = int(os.getenv("UPLOAD_BACKGROUND_MAX_PAGES", "200"))
+
 @router.post("/upload_document")
 async def upload_document(
     file: Optional[UploadFile] = File(None),
@@ -451,6 +544,7 @@ async def upload_document(
     scrape_website: Optional[bool] = Form(False),
     max_pages: Optional[int] = Form(10),
     platform: Optional[str] = Form("website"),
+    background: Optional[bool] = Form(False),
     organization=Depends(get_organization_from_api_key)
 ):
     """
@@ -461,6 +555,9 @@ async def upload_document(
     - text: Provide raw text content
     - scrape_website: Set to True to crawl and index an entire website (when URL is provided)
     - max_pages: Maximum number of pages to scrape when scrape_website is True (default: 10)
+    - background: Queue the upload as a job and return its job_id right away.
+      Progress is available from GET /api/jobs/{job_id} and the `job_progress` Socket.IO event.
+      Background crawls are not capped at 5 pages.
     
     When scrape_website=True, the system will:
     1. Start at the provided URL
@@ -473,7 +570,6 @@ async def upload_document(
     """
     org_id = get_org_id(organization)
     org_api_key = organization.get("api_key")
-    org_api_key = organization.get("api_key")
     
     # Debug logging to see what we receive
     print(f"=== DEBUG upload_document ===")
@@ -483,49 +579,84 @@ async def upload_document(
     print(f"text: {text}")
     print(f"scrape_website: {scrape_website}")
     print(f"max_pages: {max_pages}")
+    print(f"background: {background}")
     print(f"===============================")
     
-    try:
+    if not file and not url and not text:
+        raise HTTPException(status_code=400, detail="No document source provided")
+    
+    if url:
+        # Validate URL format
+        try:
+            from urllib.parse import urlparse
+            parsed = urlparse(url)
+            if not all([parsed.scheme, parsed.netloc]):
+                raise ValueError("Invalid URL format")
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Invalid URL format: {str(e)}")
+        
+        # Adjust max_pages based on platform to prevent timeouts
+        if platform in SOCIAL_PLATFORMS:
+            max_pages = min(max_pages, 2)  # Limit social media to 2 pages max
+        elif background:
+            max_pages = min(max_pages, UPLOAD_BACKGROUND_MAX_PAGES)
+        else:
+            max_pages = min(max_pages, 5)  # Limit websites to 5 pages max for speed
+    
+    if background:
+        payload = {
+            "url": url,
+            "text": text,
+            "scrape_website": scrape_website,
+            "max_pages": max_pages,
+            "platform": platform,
+            "api_key": org_api_key
+        }
         if file:
-            # Save uploaded file temporarily
-            file_path = f"temp_{file.filename}"
-            with open(file_path, "wb") as f:
-                content = await file.read()
-                f.write(content)
-            
-            # Add to vectorstore with organization namespace
-            result = add_document(file_path=file_path, api_key=org_api_key)
-            
-            # Store upload history
-            upload_history_collection.insert_one({
-                "org_id": org_id,
-                "file_name": file.filename,
-                "type": "pdf",
-                "status": "Used",
-                "created_at": datetime.utcnow()
-            })
-            
-            # Clean up temporary file
+            payload["file_path"] = save_upload(file.filename, await file.read())
+            payload["file_name"] = file.filename
+        job = await job_queue.enqueue(
+            "chatbot_upload_document", org_id, payload, notify_room=org_api_key
+        )
+        return {"status": "queued", "job_id": job["job_id"], "job": job}
+    
+    file_path = None
+    file_name = None
+    if file:
+        # Save uploaded file temporarily
+        file_name = file.filename
+        file_path = f"temp_{file.filename}"
+        with open(file_path, "wb") as f:
+            content = await file.read()
+            f.write(content)
+    
+    try:
+        return await asyncio.to_thread(
+            _process_upload, org_id, org_api_key,
+            file_path=file_path, file_name=file_name, url=url, text=text,
+            scrape_website=scrape_website, max_pages=max_pages, platform=platform,
+            loop=asyncio.get_running_loop()
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        # Clean up temporary file
+        if file_path and os.path.exists(file_path):
             os.remove(file_path)
-            
-            return result
-        
+
+def _process_upload(org_id, org_api_key, file_path=None, file_name=None, url=None, text=None,
+                    scrape_website=False, max_pages=10, platform="website", record_failure=True, loop=None):
+    """
+    Index one upload into the organization's namespace and record it in upload_history.
+    Runs in a worker thread; `loop` is the calling event loop (ingestion runs on it).
+    """
+    try:
+        if file_path:
+            # Add to vectorstore with organization namespace
+            result = add_document(file_path=file_path, api_key=org_api_key, loop=loop,
+                                  source=f"file:{file_name or os.path.basename(file_path)}")
+            history = {"file_name": file_name, "type": "pdf"}
         elif url:
-            # Validate URL format
-            try:
-                from urllib.parse import urlparse
-                parsed = urlparse(url)
-                if not all([parsed.scheme, parsed.netloc]):
-                    raise ValueError("Invalid URL format")
-            except Exception as e:
-                raise HTTPException(status_code=400, detail=f"Invalid URL format: {str(e)}")
-            
-            # Adjust max_pages based on platform to prevent timeouts
-            if platform in ['facebook', 'instagram', 'twitter', 'linkedin', 'youtube']:
-                max_pages = min(max_pages, 2)  # Limit social media to 2 pages max
-            else:
-                max_pages = min(max_pages, 5)  # Limit websites to 5 pages max for speed
-            
             print(f"[UPLOAD_DOCUMENT] Training from {platform}: {url} (max_pages: {max_pages})")
             
             # Check if we should scrape the entire website
@@ -533,59 +664,81 @@ async def upload_document(
                 # Append parameters to URL to indicate scraping
                 scrape_url = f"{url}?scrape_website=true&max_pages={max_pages}&platform={platform}"
                 print(f"Scraping website: {url} with max_pages={max_pages}, platform={platform}")
-                result = add_document(url=scrape_url, api_key=org_api_key)
+                result = add_document(url=scrape_url, api_key=org_api_key, loop=loop, source=f"site:{url}")
             else:
                 # Just process the single URL
                 print(f"Processing single URL: {url}")
-                result = add_document(url=url, api_key=org_api_key)
-            
-            # Store upload history
-            upload_history_collection.insert_one({
-                "org_id": org_id,
-                "url": url,
-                "type": "url",
-                "status": "Used",
-                "created_at": datetime.utcnow()
-            })
-            
-            return result
+                result = add_document(url=url, api_key=org_api_key, loop=loop)
+            history = {"url": url, "type": "url"}
+        else:
+            result = add_document(text=text, api_key=org_api_key, loop=loop)
+            history = {"type": "text"}
         
-        elif text:
-            result = add_document(text=text, api_key=org_api_key)
-            
-            # Store upload history for text content
-            upload_history_collection.insert_one({
-                "org_id": org_id,
-                "type": "text",
-                "status": "Used",
-                "created_at": datetime.utcnow()
-            })
-            
-            return result
+        if result.get("status") == "error":
+            raise Exception(result.get("message", "Upload failed"))
         
-        else:
-            raise HTTPException(status_code=400, detail="No document source provided")
-            
-    except Exception as e:
-        # Store failed upload in history
-        error_data = {
+        # Store upload history
+        upload_history_collection.insert_one({
             "org_id": org_id,
-            "status": "Failed",
+            **history,
+            "status": "Used",
             "created_at": datetime.utcnow()
-        }
+        })
         
-        if file:
-            error_data["file_name"] = file.filename
-            error_data["type"] = "pdf"
-        elif url:
-            error_data["url"] = url
-            error_data["type"] = "url"
-        else:
-            error_data["type"] = "text"
+        return result
             
-        upload_history_collection.insert_one(error_data)
+    except Exception as e:
+        if record_failure:
+            # Store failed upload in history
+            error_data = {
+                "org_id": org_id,
+                "status": "Failed",
+                "created_at": datetime.utcnow()
+            }
+            
+            if file_path:
+                error_data["file_name"] = file_name
+                error_data["type"] = "pdf"
+            elif url:
+                error_data["url"] = url
+                error_data["type"] = "url"
+            else:
+                error_data["type"] = "text"
+                
+            upload_history_collection.insert_one(error_data)
         
-        raise HTTPException(status_code=500, detail=str(e))
+        raise
+
+if SERVICES_AVAILABLE:
+    @job_queue.handler("chatbot_upload_document")
+    async def run_upload_job(job: JobContext):
+        """Background variant of /upload_document"""
+        payload = dict(job.payload)
+        await job.progress(10, "Processing document")
+        try:
+            result = await asyncio.to_thread(
+                _process_upload, job.job["org_id"], payload.get("api_key"),
+                file_path=payload.get("file_path"), file_name=payload.get("file_name"),
+                url=payload.get("url"), text=payload.get("text"),
+                scrape_website=payload.get("scrape_website"), max_pages=payload.get("max_pages", 10),
+                platform=payload.get("platform", "website"),
+                record_failure=job.is_last_attempt,
+                loop=asyncio.get_running_loop()
+            )
+        except Exception:
+            if job.is_last_attempt:
+                _remove_upload(payload.get("file_path"))
+            raise
+        _remove_upload(payload.get("file_path"))
+        return {
+            "status": result.get("status"),
+            "message": result.get("message"),
+            "documents_added": result.get("documents_added", 0)
+        }
+
+def _remove_upload(file_path: Optional[str]):
+    if file_path and os.path.exists(file_path):
+        os.remove(file_path)
 
 @router.get("/has_previous_uploads")
 async def check_previous_uploads(
@@ -849,6 +1002,7 @@ async def save_chat_widget_settings(
             {"_id": organization["_id"]},
             update_data
         )
+        invalidate_organization(organization["_id"])
         
         print(f"\n[DEBUG] MongoDB update result: {result.raw_result}")
         
@@ -923,6 +1077,7 @@ async def get_chat_widget_settings(
                     {"_id": organization["_id"]},
                     {"$set": {"chat_widget_settings": default_settings}}
                 )
+                invalidate_organization(organization["_id"])
             
             return {
                 "status": "success",
@@ -1030,6 +1185,7 @@ async def upload_video(
                 }
             }
         )
+        invalidate_organization(organization["_id"])
         
         print(f"[DEBUG] Update result: {update_result.modified_count} documents modified")
         
@@ -1131,6 +1287,7 @@ async def delete_video(
                         }
                     }
                 )
+                invalidate_organization(organization["_id"])
         
         return {
             "status": "success",
@@ -1166,6 +1323,7 @@ async def update_video_settings(
                 }
             }
         )
+        invalidate_organization(organization["_id"])
         
         return {
             "status": "success",
@@ -1239,10 +1397,7 @@ async def ask_langgraph(
         user_id = organization.get("user_id")
         
         # Get knowledge base info
-        knowledge_base_info = db.knowledge_bases.find_one(
-            {"userId": user_id}, 
-            {"vectorStoreId": 1, "kb_id": {"$toString": "$_id"}}
-        )
+        knowledge_base_info = await get_knowledge_base_info(organization)
         
         namespace = knowledge_base_info.get("vectorStoreId") if knowledge_base_info else "kb_default"
         
@@ -1252,54 +1407,45 @@ async def ask_langgraph(
         print(f"[LANGGRAPH ENDPOINT] Namespace: {namespace}")
         print(f"[LANGGRAPH ENDPOINT] Question: {request.question}")
         
-        # Check if agent mode is active
-        if is_chat_in_agent_mode(org_id, request.session_id):
-            # Save user message and return
-            add_conversation_message(
-                organization_id=org_id,
-                visitor_id=None,
-                session_id=request.session_id,
-                role="user",
-                content=request.question,
-                metadata={"mode": request.mode}
-            )
-            return {
-                "answer": "",
-                "mode": "agent_active",
-                "message": "Message sent to human agent."
-            }
-        
-        # Ensure visitor exists
-        visitor = create_or_update_visitor(org_id, request.session_id, {"user_data": request.user_data})
-        
-        # Save user message to database
-        add_conversation_message(
+        # Ensure visitor exists; the same round trip tells us if a human agent has the chat
+        visitor = await upsert_visitor_async(org_id, request.session_id, {"user_data": request.user_data})
+        visitor_id = visitor.get("id") if visitor else None
+
+        # Save user message to database (the agent sees it too when agent mode is active)
+        await add_conversation_message_async(
             organization_id=org_id,
-            visitor_id=visitor.get("id") if visitor else None,
+            visitor_id=visitor_id,
             session_id=request.session_id,
             role="user",
             content=request.question,
             metadata={"mode": request.mode}
         )
+
+        if visitor and visitor.get("is_agent_mode", False):
+            return {
+                "answer": "",
+                "mode": "agent_active",
+                "message": "Message sent to human agent."
+            }
         
         # Get database and service
         mongodb = get_database()
         service = get_langgraph_service(mongodb)
 
         # Process query with LangGraph
-        result = service.process_query(
+        result = await service.process_query(
             question=request.question,
             session_id=request.session_id,
             organization_id=org_id,
-            visitor_id=visitor.get("id") if visitor else None,
+            visitor_id=visitor_id,
             namespace=namespace,
             company_name=org_name
         )
         
         # Save AI response to database
-        add_conversation_message(
+        await add_conversation_message_async(
             organization_id=org_id,
-            visitor_id=visitor.get("id") if visitor else None,
+            visitor_id=visitor_id,
             session_id=request.session_id,
             role="assistant",
             content=result["answer"],
@@ -1314,10 +1460,10 @@ async def ask_langgraph(
         
         # Update user profile if data provided
         if request.user_data:
-            save_user_profile(org_id, request.session_id, request.user_data)
+            await upsert_user_profile_async(org_id, request.session_id, request.user_data, visitor_id)
 
         # Get full conversation history for this session
-        conversation_history = get_conversation_history(org_id, request.session_id)
+        conversation_history = await asyncio.to_thread(get_conversation_history, org_id, request.session_id)
 
         # Add conversation history to result
         result["conversation_history"] = conversation_history
@@ -1,23 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, Header
 from typing import List, Optional, Dict, Any
-from services.database import get_organization_by_api_key, get_database, get_user_profile
+from services.database import get_database, get_user_profile
+from services.org_resolver import get_organization_from_api_key
 from models.conversation import Conversation
 from bson import ObjectId
 from datetime import datetime
 
 router = APIRouter()
 
-async def get_organization_from_api_key(api_key: Optional[str] = Header(None, alias="X-API-Key")):
-    """Dependency to get organization from API key"""
-    if not api_key:
-        raise HTTPException(status_code=401, detail="API key is required")
-    
-    organization = get_organization_by_api_key(api_key)
-    if not organization:
-        raise HTTPException(status_code=401, detail="Invalid API key")
-    
-    return organization
-
 @router.get("/conversations")
 async def get_conversations(organization: dict = Depends(get_organization_from_api_key)):
     """
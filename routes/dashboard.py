@@ -2,7 +2,8 @@ from fastapi import APIRouter, Depends, HTTPException, Header
 from datetime import datetime, timedelta
 import random
 from typing import List, Optional
-from services.database import get_organization_by_api_key, get_database
+from services.database import get_database
+from services.org_resolver import resolve_organization
 from bson import ObjectId
 from collections import defaultdict
 
@@ -20,7 +21,7 @@ async def get_analytics_data(x_api_key: Optional[str] = Header(None)):
 
         # Get organization from API key
         print("Fetching organization by API key...")
-        org = get_organization_by_api_key(x_api_key)
+        org = await resolve_organization(x_api_key)
         if not org:
             print("Invalid API key - no organization found")
             raise HTTPException(status_code=401, detail="Invalid API key")
@@ -1,5 +1,6 @@
-from fastapi import APIRouter, HTTPException, Depends, Body, Header
-from services.database import db, get_organization_by_api_key
+from fastapi import APIRouter, HTTPException, Depends, Body
+from services.database import db
+from services.org_resolver import get_organization_from_api_key
 from services.pinecone.faq_vectors import upsert_faq_embedding, delete_faq_embedding
 from typing import Optional, List
 from pydantic import BaseModel
@@ -10,10 +11,8 @@ from datetime import datetime
 
 router = APIRouter()
 
-# Initialize FAQ collection and indexes
+# FAQ collection (indexes are declared in services/db_indexes.py)
 faq_collection = db.faqs
-faq_collection.create_index("org_id")
-faq_collection.create_index([("org_id", pymongo.ASCENDING), ("is_active", pymongo.ASCENDING)])
 
 class FAQItem(BaseModel):
     question: str
@@ -30,17 +29,6 @@ class FAQResponse(BaseModel):
     created_at: Optional[datetime]
     updated_at: Optional[datetime]
 
-async def get_organization_from_api_key(api_key: str = Header(..., alias="X-API-Key")):
-    """Dependency to get organization from API key"""
-    if not api_key:
-        raise HTTPException(status_code=401, detail="API key is required")
-    
-    organization = get_organization_by_api_key(api_key)
-    if not organization:
-        raise HTTPException(status_code=401, detail="Invalid API key")
-    
-    return organization
-
 @router.post("/create", response_model=FAQResponse)
 async def create_faq(
     faq: FAQItem,
@@ -7,7 +7,8 @@ Analyzes organization setup and stores last 5 reports
 from fastapi import APIRouter, Depends, HTTPException, Header
 from typing import Optional, List
 from services.faq_intelligence import FAQIntelligenceService
-from services.database import get_organization_by_api_key, db
+from services.database import db
+from services.org_resolver import get_organization_from_api_key
 from bson import ObjectId
 from datetime import datetime
 import os
@@ -21,17 +22,6 @@ router = APIRouter()
 analysis_reports = db.faq_analysis_reports
 
 
-async def get_organization_from_api_key(api_key: Optional[str] = Header(None, alias="X-API-Key")):
-    """Dependency to get organization from API key"""
-    if not api_key:
-        raise HTTPException(status_code=401, detail="API key is required")
-    
-    organization = get_organization_by_api_key(api_key)
-    if not organization:
-        raise HTTPException(status_code=401, detail="Invalid API key")
-    
-    return organization
-
 
 @router.get("/latest")
 async def get_latest_analysis(
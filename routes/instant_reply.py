@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException, Header, Body
-from services.database import get_organization_by_api_key, db
+from services.database import db
+from services.org_resolver import resolve_organization
 from datetime import datetime
 from typing import Optional, List
 from pydantic import BaseModel
@@ -21,7 +22,7 @@ async def set_instant_reply(
     data: InstantReplyUpdate = Body(...)
 ):
     try:
-        org = get_organization_by_api_key(x_api_key)
+        org = await resolve_organization(x_api_key)
         if not org:
             raise HTTPException(status_code=401, detail="Invalid API key")
         
@@ -73,7 +74,7 @@ async def set_instant_reply(
 @router.get("/")
 async def get_instant_reply(x_api_key: str = Header(..., alias="X-API-Key")):
     try:
-        org = get_organization_by_api_key(x_api_key)
+        org = await resolve_organization(x_api_key)
         if not org:
             raise HTTPException(status_code=401, detail="Invalid API key")
             
@@ -112,7 +113,7 @@ async def get_instant_reply(x_api_key: str = Header(..., alias="X-API-Key")):
 @router.delete("/")
 async def delete_instant_reply(x_api_key: str = Header(..., alias="X-API-Key")):
     try:
-        org = get_organization_by_api_key(x_api_key)
+        org = await resolve_organization(x_api_key)
         if not org:
             raise HTTPException(status_code=401, detail="Invalid API key")
             
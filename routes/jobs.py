@@ -0,0 +1,43 @@
+from fastapi import APIRouter, HTTPException, Depends
+from typing import Any, Dict
+
+from services.org_resolver import get_organization_from_api_key
+from services.jobs import job_queue
+
+router = APIRouter()
+
+
+def get_org_id(organization: Dict[str, Any]) -> str:
+    """Safely get organization ID from either 'id' or MongoDB '_id'."""
+    org_id = organization.get("id") or (str(organization["_id"]) if organization.get("_id") is not None else None)
+    if not org_id:
+        raise HTTPException(status_code=500, detail="Organization ID is missing")
+    return org_id
+
+
+@router.get("/jobs")
+async def list_jobs(
+    limit: int = 20,
+    organization=Depends(get_organization_from_api_key)
+):
+    """
+    GET /api/jobs
+    Most recent background jobs (uploads, crawls, knowledge base builds) of the organization
+    """
+    return {"jobs": await job_queue.list_jobs(get_org_id(organization), limit=min(limit, 100))}
+
+
+@router.get("/jobs/{job_id}")
+async def get_job_status(
+    job_id: str,
+    organization=Depends(get_organization_from_api_key)
+):
+    """
+    GET /api/jobs/{job_id}
+    Status, progress, attempts and result/error of a background job.
+    The same updates are pushed as `job_progress` Socket.IO events.
+    """
+    job = await job_queue.get(job_id, org_id=get_org_id(organization))
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
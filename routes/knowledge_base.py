@@ -5,7 +5,17 @@ from pydantic import BaseModel, Field
 from bson import ObjectId
 import logging
 
-from services.database import get_organization_by_api_key
+from services.org_resolver import get_organization_from_api_key, resolve_organization, invalidate_knowledge_base
+from services.langchain.answer_cache import ainvalidate_answer_cache
+from services.langchain.ingestion import clear_manifests
+from services.jobs import job_queue, JobContext
+from services.langchain.website_sync import (
+    sync_website,
+    set_website_sync_schedule,
+    clear_website_pages,
+    WEBSITE_SYNC_MAX_PAGES,
+    WEBSITE_SYNC_INTERVAL_HOURS
+)
 
 from services.knowledge_base import (
     check_knowledge_base_exists,
@@ -48,21 +58,6 @@ def get_org_id(organization: Dict[str, Any]) -> str:
         raise HTTPException(status_code=500, detail="Organization ID is missing")
     return org_id
 
-async def get_organization_from_api_key(x_api_key: Optional[str] = Header(None)):
-    """Dependency to get organization from API key"""
-    if not x_api_key:
-        logger.error("❌ No X-API-Key header provided")
-        raise HTTPException(status_code=401, detail="API key is required in X-API-Key header")
-    
-    logger.info(f"🔑 Validating API key: {x_api_key[:20]}...")
-    organization = get_organization_by_api_key(x_api_key)
-    if not organization:
-        logger.error(f"❌ Invalid API key: {x_api_key}")
-        raise HTTPException(status_code=401, detail="Invalid API key")
-    
-    logger.info(f"✅ Organization validated: {organization.get('name')}")
-    return organization
-
 
 # ==========================================
 # REQUEST/RESPONSE MODELS
@@ -82,6 +77,7 @@ class CreateKnowledgeBaseRequest(BaseModel):
     sources: Optional[List[Dict[str, Any]]] = None  # Optional manual sources
     structured_data: Optional[Dict[str, Any]] = Field(None, alias="structuredData")
     raw_content: Optional[str] = Field(None, alias="rawContent")
+    background: bool = False  # queue the build as a job and return its job_id
 
     class Config:
         populate_by_name = True
@@ -111,6 +107,24 @@ class UploadDocumentRequest(BaseModel):
     url: Optional[str] = None
     text: Optional[str] = None
     max_pages: Optional[int] = Field(1, alias="maxPages")
+    background: bool = False  # queue the upload as a job and return its job_id
+
+    class Config:
+        populate_by_name = True
+
+class SyncWebsiteRequest(BaseModel):
+    url: Optional[str] = None  # defaults to the knowledge base's website
+    max_pages: int = Field(WEBSITE_SYNC_MAX_PAGES, alias="maxPages")
+    background: bool = False  # queue the sync as a job and return its job_id
+
+    class Config:
+        populate_by_name = True
+
+class WebsiteSyncScheduleRequest(BaseModel):
+    enabled: bool = True
+    url: Optional[str] = None  # defaults to the knowledge base's website
+    max_pages: int = Field(WEBSITE_SYNC_MAX_PAGES, alias="maxPages")
+    interval_hours: float = Field(WEBSITE_SYNC_INTERVAL_HOURS, alias="intervalHours", gt=0)
 
     class Config:
         populate_by_name = True
@@ -146,7 +160,7 @@ async def check_knowledge_base(
             raise HTTPException(status_code=401, detail="X-API-Key header is required")
         
         logger.info(f"🔑 Validating API key: {x_api_key[:20]}...")
-        organization = get_organization_by_api_key(x_api_key)
+        organization = await resolve_organization(x_api_key)
         if not organization:
             logger.error(f"❌ Invalid API key")
             raise HTTPException(status_code=401, detail="Invalid API key")
@@ -229,6 +243,19 @@ async def create_knowledge_base(
                 detail="Knowledge base already exists. Use update endpoint instead."
             )
         
+        if request.background:
+            job = await job_queue.enqueue("kb_build", organization_id, {
+                "user_id": user_id,
+                "company_name": request.company_name,
+                "website": request.website
+            }, notify_room=organization.get("api_key"))
+            return {
+                "success": True,
+                "message": "Knowledge base build queued",
+                "job_id": job["job_id"],
+                "job": job
+            }
+        
         # Build knowledge base automatically using OpenAI web search
         kb = await build_knowledge_base_auto(
             user_id=user_id,
@@ -454,6 +481,22 @@ async def upload_knowledge_base_document(
         organization_id = get_org_id(organization)
         company_name = organization.get("name", "Unknown Company")
         
+        if request.background:
+            job = await job_queue.enqueue("kb_upload_document", organization_id, {
+                "user_id": user_id,
+                "company_name": company_name,
+                "file_path": request.file_path,
+                "url": request.url,
+                "text": request.text,
+                "max_pages": request.max_pages or 1
+            }, notify_room=organization.get("api_key"))
+            return {
+                "success": True,
+                "message": "Document upload queued",
+                "job_id": job["job_id"],
+                "job": job
+            }
+        
         result = await add_document_to_knowledge_base(
             user_id=user_id,
             organization_id=organization_id,
@@ -611,6 +654,7 @@ async def search_knowledge_vectors(
 
 @router.post("/rebuild")
 async def rebuild_knowledge_base(
+    background: bool = False,
     organization=Depends(get_organization_from_api_key)
 ):
     """
@@ -620,11 +664,10 @@ async def rebuild_knowledge_base(
     This fixes embedding mismatch issues by:
     1. Deleting all vectors in the namespace
     2. Re-uploading with LangChain embeddings (matching query)
+    
+    ?background=true queues the rebuild as a job and returns its job_id.
     """
     try:
-        import os
-        from pinecone import Pinecone
-        
         user_id = organization.get("user_id")
         organization_id = get_org_id(organization)
         
@@ -635,40 +678,20 @@ async def rebuild_knowledge_base(
         if not kb:
             raise HTTPException(status_code=404, detail="Knowledge base not found")
         
-        vectorstore_id = kb.get("vectorStoreId")
-        company_name = kb.get("companyName")
-        
-        if not vectorstore_id:
+        if not kb.get("vectorStoreId"):
             raise HTTPException(status_code=400, detail="No vectorStoreId found")
         
-        # Delete all vectors in namespace
-        logger.info(f"🗑️  Deleting vectors in namespace: {vectorstore_id}")
-        pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
-        index_name = os.getenv("PINECONE_INDEX", "bayai")
-        index = pc.Index(index_name)
-        
-        try:
-            index.delete(delete_all=True, namespace=vectorstore_id)
-            logger.info(f"✅ Deleted all vectors from namespace: {vectorstore_id}")
-        except Exception as e:
-            logger.warning(f"⚠️  Error deleting vectors: {e}")
-        
-        # Get website from sources
-        website = None
-        sources = kb.get("sources", [])
-        for source in sources:
-            if source.get("type") == "website" and source.get("url"):
-                website = source["url"]
-                break
-        
-        # Rebuild with correct embeddings
-        logger.info(f"📤 Rebuilding knowledge base with LangChain embeddings...")
-        result = await build_knowledge_base_auto(
-            user_id=user_id,
-            organization_id=organization_id,
-            company_name=company_name,
-            website=website
-        )
+        if background:
+            job = await job_queue.enqueue("kb_rebuild", organization_id, {"user_id": user_id},
+                                          notify_room=organization.get("api_key"))
+            return {
+                "success": True,
+                "message": "Knowledge base rebuild queued",
+                "job_id": job["job_id"],
+                "job": job
+            }
+        
+        result = await _rebuild(kb, user_id, organization_id)
         
         return {
             "success": True,
@@ -689,3 +712,221 @@ async def rebuild_knowledge_base(
         import traceback
         logger.error(traceback.format_exc())
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/sync-website")
+async def sync_knowledge_base_website(
+    request: SyncWebsiteRequest,
+    organization=Depends(get_organization_from_api_key)
+):
+    """
+    POST /api/knowledge-base/sync-website
+    Incrementally re-sync the knowledge base with the website
+    
+    - Re-crawls with conditional requests (unchanged pages answer 304)
+    - Re-embeds only chunks of new or changed pages
+    - Deletes vectors of pages that disappeared
+    """
+    try:
+        user_id = organization.get("user_id")
+        organization_id = get_org_id(organization)
+        company_name = organization.get("name", "Unknown Company")
+        
+        url = request.url or _website_of(await get_knowledge_base(user_id, organization_id))
+        if not url:
+            raise HTTPException(status_code=400, detail="No website URL given or stored for this knowledge base")
+        
+        if request.background:
+            job = await job_queue.enqueue("kb_website_sync", organization_id, {
+                "user_id": user_id,
+                "company_name": company_name,
+                "url": url,
+                "max_pages": request.max_pages
+            }, notify_room=organization.get("api_key"))
+            return {
+                "success": True,
+                "message": "Website sync queued",
+                "job_id": job["job_id"],
+                "job": job
+            }
+        
+        result = await sync_website(user_id, organization_id, company_name, url, request.max_pages)
+        invalidate_knowledge_base(user_id)
+        
+        return {
+            "success": True,
+            "message": "Website synced successfully",
+            "details": result
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error syncing website: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.put("/sync-website/schedule")
+async def schedule_knowledge_base_website_sync(
+    request: WebsiteSyncScheduleRequest,
+    organization=Depends(get_organization_from_api_key)
+):
+    """
+    PUT /api/knowledge-base/sync-website/schedule
+    Enable/disable the recurring incremental website sync (every intervalHours)
+    """
+    try:
+        user_id = organization.get("user_id")
+        organization_id = get_org_id(organization)
+        
+        kb = await get_knowledge_base(user_id, organization_id)
+        if not kb:
+            raise HTTPException(status_code=404, detail="Knowledge base not found")
+        
+        url = request.url or _website_of(kb)
+        if request.enabled and not url:
+            raise HTTPException(status_code=400, detail="No website URL given or stored for this knowledge base")
+        
+        schedule = await set_website_sync_schedule(
+            user_id, organization_id, request.enabled, url, request.max_pages, request.interval_hours
+        )
+        invalidate_knowledge_base(user_id)
+        
+        return {
+            "success": True,
+            "message": "Website sync scheduled" if request.enabled else "Website sync disabled",
+            "websiteSync": schedule
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error scheduling website sync: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _website_of(kb: Optional[Dict[str, Any]]) -> Optional[str]:
+    """The website a knowledge base was built from, if any"""
+    if not kb:
+        return None
+    if kb.get("websiteSync", {}).get("url"):
+        return kb["websiteSync"]["url"]
+    if kb.get("website"):
+        return kb["website"]
+    for source in kb.get("sources", []):
+        if source.get("type") == "website" and source.get("url"):
+            return source["url"]
+    return None
+
+
+async def _rebuild(kb: Dict[str, Any], user_id: str, organization_id: str, progress=None) -> Dict[str, Any]:
+    """Empty the knowledge base namespace and build it again"""
+    import os
+    from pinecone import Pinecone
+    
+    vectorstore_id = kb.get("vectorStoreId")
+    company_name = kb.get("companyName")
+    
+    # Delete all vectors in namespace
+    logger.info(f"🗑️  Deleting vectors in namespace: {vectorstore_id}")
+    pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
+    index_name = os.getenv("PINECONE_INDEX", "bayai")
+    index = pc.Index(index_name)
+    
+    try:
+        index.delete(delete_all=True, namespace=vectorstore_id)
+        logger.info(f"✅ Deleted all vectors from namespace: {vectorstore_id}")
+        # The namespace is empty now; forget its chunk manifests and page fingerprints so everything is re-embedded
+        await clear_manifests(vectorstore_id)
+        await clear_website_pages(vectorstore_id)
+    except Exception as e:
+        logger.warning(f"⚠️  Error deleting vectors: {e}")
+    await ainvalidate_answer_cache(vectorstore_id)
+    invalidate_knowledge_base(user_id)
+    
+    # Get website from sources
+    website = None
+    sources = kb.get("sources", [])
+    for source in sources:
+        if source.get("type") == "website" and source.get("url"):
+            website = source["url"]
+            break
+    
+    # Rebuild with correct embeddings
+    logger.info(f"📤 Rebuilding knowledge base with LangChain embeddings...")
+    return await build_knowledge_base_auto(
+        user_id=user_id,
+        organization_id=organization_id,
+        company_name=company_name,
+        website=website,
+        progress=progress
+    )
+
+
+# ==========================================
+# BACKGROUND JOBS
+# ==========================================
+
+@job_queue.handler("kb_build")
+async def run_build_job(job: JobContext):
+    """Background variant of POST /api/knowledge-base/"""
+    payload = job.payload
+    kb = await build_knowledge_base_auto(
+        user_id=payload["user_id"],
+        organization_id=job.job["org_id"],
+        company_name=payload["company_name"],
+        website=payload.get("website"),
+        progress=job.progress
+    )
+    return _job_summary(kb)
+
+
+@job_queue.handler("kb_rebuild")
+async def run_rebuild_job(job: JobContext):
+    """Background variant of POST /api/knowledge-base/rebuild"""
+    user_id = job.payload["user_id"]
+    kb = await get_knowledge_base(user_id, job.job["org_id"])
+    if not kb:
+        raise Exception("Knowledge base not found")
+    return _job_summary(await _rebuild(kb, user_id, job.job["org_id"], progress=job.progress))
+
+
+@job_queue.handler("kb_upload_document")
+async def run_upload_document_job(job: JobContext):
+    """Background variant of POST /api/knowledge-base/upload-document"""
+    payload = job.payload
+    return await add_document_to_knowledge_base(
+        user_id=payload["user_id"],
+        organization_id=job.job["org_id"],
+        company_name=payload["company_name"],
+        file_path=payload.get("file_path"),
+        url=payload.get("url"),
+        text=payload.get("text"),
+        max_pages=payload.get("max_pages", 1),
+        progress=job.progress
+    )
+
+
+@job_queue.handler("kb_website_sync")
+async def run_website_sync_job(job: JobContext):
+    """Background variant of POST /api/knowledge-base/sync-website (also queued by the scheduler)"""
+    payload = job.payload
+    result = await sync_website(
+        payload["user_id"],
+        job.job["org_id"],
+        payload["company_name"],
+        payload["url"],
+        payload.get("max_pages", WEBSITE_SYNC_MAX_PAGES),
+        progress=job.progress
+    )
+    invalidate_knowledge_base(payload["user_id"])
+    return result
+
+
+def _job_summary(kb: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    kb = kb or {}
+    return {
+        "id": str(kb["_id"]) if kb.get("_id") else None,
+        "companyName": kb.get("companyName"),
+        "vectorStoreId": kb.get("vectorStoreId"),
+        "totalChunks": len(kb.get("aiChunks", [])),
+        "status": kb.get("status")
+    }
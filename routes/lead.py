@@ -7,22 +7,13 @@ from dotenv import load_dotenv
 from datetime import datetime
 import uuid
 from services.database import create_lead, get_leads_by_organization, search_leads
-from services.database import get_organization_by_api_key
+from services.org_resolver import get_organization_from_api_key
 from bson import ObjectId  # pyright: ignore[reportMissingImports]
 # Load environment variables
 load_dotenv()
 
 router = APIRouter()
 
-async def get_organization_from_api_key(api_key: Optional[str] = Header(None, alias="X-API-Key")):
-    """Resolve organization using X-API-Key header (same pattern as unknown_questions routes)."""
-    if not api_key:
-        raise HTTPException(status_code=401, detail="API key required")
-    organization = get_organization_by_api_key(api_key)
-    if not organization:
-        raise HTTPException(status_code=401, detail="Invalid API key")
-    return organization
-
 class Lead(BaseModel):
     name: str
     email: str
@@ -1,22 +1,12 @@
 from fastapi import APIRouter, HTTPException, Depends, Request, Header
-from services.database import create_organization, get_organization_by_api_key, update_organization, get_organization_by_user_id
+from services.database import create_organization, update_organization, get_organization_by_user_id
+from services.org_resolver import get_organization_from_api_key
 from models.organization import OrganizationCreate, OrganizationUpdate
 from typing import Optional
 import json
 
 router = APIRouter()
 
-async def get_organization_from_api_key(api_key: Optional[str] = Header(None, alias="X-API-Key")):
-    """Dependency to get organization from API key"""
-    if not api_key:
-        raise HTTPException(status_code=401, detail="API key is required")
-    
-    organization = get_organization_by_api_key(api_key)
-    if not organization:
-        raise HTTPException(status_code=401, detail="Invalid API key")
-    
-    return organization
-
 @router.post("/register")
 async def register_organization(organization_data: OrganizationCreate):
     """Register a new organization and generate API key"""
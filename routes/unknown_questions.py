@@ -15,21 +15,10 @@ from models.unknown_questions import (
     UnknownQuestionFilters
 )
 from services.unknown_questions_service import UnknownQuestionsService
-from services.database import get_organization_by_api_key
+from services.org_resolver import get_organization_from_api_key
 
 router = APIRouter(prefix="/api/unknown-questions", tags=["Unknown Questions"])
 
-async def get_organization_from_api_key(api_key: Optional[str] = Header(None, alias="X-API-Key")):
-    """Get organization from API key"""
-    if not api_key:
-        raise HTTPException(status_code=401, detail="API key required")
-    
-    organization = get_organization_by_api_key(api_key)
-    if not organization:
-        raise HTTPException(status_code=401, detail="Invalid API key")
-    
-    return organization
-
 @router.get("/", response_model=dict)
 async def get_unknown_questions(
     page: int = Query(1, ge=1),
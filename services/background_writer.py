@@ -0,0 +1,83 @@
+"""
+Ordered background writer for non-critical database writes.
+
+Writes that the response does not depend on (the assistant message, user
+profile updates) are queued here instead of being awaited by the request.
+A single consumer task per event loop runs them strictly in submission order,
+so e.g. a session's messages are inserted in the order they were produced.
+The queue is bounded: when the database falls behind, submit() waits instead
+of letting memory grow. drain() flushes everything on shutdown.
+"""
+
+import os
+import asyncio
+from typing import Awaitable, Callable, Dict, Optional
+
+BACKGROUND_WRITE_QUEUE_SIZE = int(os.getenv("BACKGROUND_WRITE_QUEUE_SIZE", "10000"))
+
+WriteJob = Callable[[], Awaitable]
+
+
+class BackgroundWriter:
+    """FIFO queue of async write jobs drained by one worker task per event loop"""
+
+    def __init__(self, max_queue_size: int = BACKGROUND_WRITE_QUEUE_SIZE):
+        self.max_queue_size = max_queue_size
+        self._queues: Dict[int, asyncio.Queue] = {}
+        self._workers: Dict[int, asyncio.Task] = {}
+        self.completed = 0
+        self.failed = 0
+
+    def _queue(self) -> asyncio.Queue:
+        loop_id = id(asyncio.get_running_loop())
+        queue = self._queues.get(loop_id)
+        if queue is None:
+            queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self._queues[loop_id] = queue
+        worker = self._workers.get(loop_id)
+        if worker is None or worker.done():
+            self._workers[loop_id] = asyncio.create_task(self._run(queue))
+        return queue
+
+    async def submit(self, job: WriteJob, label: str = "write"):
+        """Queue `job` (a zero-argument coroutine function) behind earlier writes"""
+        await self._queue().put((job, label))
+
+    async def _run(self, queue: asyncio.Queue):
+        while True:
+            job, label = await queue.get()
+            try:
+                await job()
+                self.completed += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"[BACKGROUND WRITER] ❌ {label} failed: {e}")
+            finally:
+                queue.task_done()
+
+    async def drain(self, timeout: Optional[float] = 10.0):
+        """Wait for queued writes on the current loop to finish, then stop its worker"""
+        loop_id = id(asyncio.get_running_loop())
+        queue = self._queues.get(loop_id)
+        if queue is not None:
+            # join() also covers a write the worker has dequeued but not finished (qsize() == 0)
+            if queue.qsize():
+                print(f"[BACKGROUND WRITER] Flushing {queue.qsize()} pending writes")
+            try:
+                await asyncio.wait_for(queue.join(), timeout)
+            except asyncio.TimeoutError:
+                print(f"[BACKGROUND WRITER] ⚠️ {queue.qsize()} writes still pending after {timeout}s")
+        worker = self._workers.pop(loop_id, None)
+        if worker is not None:
+            worker.cancel()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": sum(q.qsize() for q in self._queues.values()),
+            "completed": self.completed,
+            "failed": self.failed
+        }
+
+
+# Global background writer instance
+background_writer = BackgroundWriter()
@@ -1,108 +1,701 @@
 import os
+import sys
 import json
 import time
+import asyncio
 import logging
-from typing import Optional, Any, Dict
+import threading
+from collections import OrderedDict
+from typing import Optional, Any, Dict, List, Iterator, Callable, Set
+
+try:
+    import redis
+    REDIS_LIB_AVAILABLE = True
+except ImportError:
+    redis = None
+    REDIS_LIB_AVAILABLE = False
+
+# "auto" uses Redis when it is reachable, "memory" never tries
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "auto").lower()
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "5000"))
+# With Redis shared across workers, the in-process copy is only a short-lived read-through tier
+CACHE_LOCAL_TTL_SECONDS = int(os.getenv("CACHE_LOCAL_TTL_SECONDS", "30"))
+CACHE_KEY_PREFIX = os.getenv("CACHE_KEY_PREFIX", "cache:")
+# Keys belong to the regions formed by their first CACHE_REGION_DEPTH ":"-separated parts,
+# e.g. "knowledge:<org>:<hash>" is in "knowledge" and "knowledge:<org>"
+CACHE_REGION_DEPTH = int(os.getenv("CACHE_REGION_DEPTH", "2"))
+CACHE_SWEEP_INTERVAL_SECONDS = int(os.getenv("CACHE_SWEEP_INTERVAL_SECONDS", "60"))
+
+_MISSING = object()
+
+
+def estimate_size(value: Any, _depth: int = 0) -> int:
+    """Rough deep size in bytes of a cached value (containers and plain objects, 4 levels deep)"""
+    size = sys.getsizeof(value, 64)
+    if _depth >= 4:
+        return size
+    if isinstance(value, dict):
+        size += sum(estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(v, _depth + 1) for v in value)
+    elif hasattr(value, "__dict__") and not isinstance(value, type):
+        size += estimate_size(vars(value), _depth + 1)
+    return size
+
+
+class BoundedTTLCache:
+    """
+    Thread-safe in-process LRU cache with per-entry TTL.
+    Expired entries are dropped on read and by expire(); the least recently used
+    entry is evicted once max_entries (or the optional max_bytes, measured with
+    estimate_size when an entry is set) is reached. Tracks hit/miss/eviction counts.
+    Supports the common dict operations so it can replace module-level dict caches.
+    `on_remove(key)` is called whenever an entry leaves the cache for any reason.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int = 1000,
+        default_ttl: Optional[float] = None,
+        on_remove: Optional[Callable[[Any], None]] = None,
+        max_bytes: Optional[int] = None
+    ):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.on_remove = on_remove
+        self._data: "OrderedDict[Any, tuple]" = OrderedDict()  # key -> (value, expires_at or None, size)
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _alive(self, key, now: float) -> bool:
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            return False
+        expires_at = entry[1]
+        if expires_at is not None and expires_at <= now:
+            self._drop(key)
+            self.expirations += 1
+            return False
+        return True
+
+    def _drop(self, key):
+        entry = self._data.pop(key)
+        self._bytes -= entry[2]
+        self._removed(key)
+        return entry
+
+    def _removed(self, key):
+        if self.on_remove is not None:
+            self.on_remove(key)
+
+    def get(self, key, default=None):
+        with self._lock:
+            if not self._alive(key, time.time()):
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key][0]
+
+    def set(self, key, value, ttl: Optional[float] = None):
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl else None
+        size = estimate_size(value) if self.max_bytes else 0
+        with self._lock:
+            previous = self._data.get(key)
+            if previous is not None:
+                self._bytes -= previous[2]
+            self._data[key] = (value, expires_at, size)
+            self._bytes += size
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries or (
+                self.max_bytes and self._bytes > self.max_bytes and len(self._data) > 1
+            ):
+                self._drop(next(iter(self._data)))
+                self.evictions += 1
+
+    def delete(self, key) -> bool:
+        with self._lock:
+            if key not in self._data:
+                return False
+            self._drop(key)
+            return True
+
+    def pop(self, key, default=None):
+        with self._lock:
+            if not self._alive(key, time.time()):
+                return default
+            return self._drop(key)[0]
+
+    def ttl(self, key) -> int:
+        """Remaining TTL in seconds (-1 = no expiry, -2 = missing), like Redis TTL"""
+        with self._lock:
+            if not self._alive(key, time.time()):
+                return -2
+            expires_at = self._data[key][1]
+            return -1 if expires_at is None else int(expires_at - time.time())
+
+    def expire(self) -> int:
+        """Drop every expired entry; returns how many were removed"""
+        now = time.time()
+        with self._lock:
+            expired = [k for k, (_, exp, _) in self._data.items() if exp is not None and exp <= now]
+            for key in expired:
+                self._drop(key)
+            self.expirations += len(expired)
+        return len(expired)
+
+    def clear(self):
+        with self._lock:
+            keys = list(self._data.keys())
+            self._data.clear()
+            self._bytes = 0
+            for key in keys:
+                self._removed(key)
+
+    def keys(self) -> List[Any]:
+        now = time.time()
+        with self._lock:
+            return [k for k, (_, exp, _) in self._data.items() if exp is None or exp > now]
+
+    def items(self) -> List[tuple]:
+        now = time.time()
+        with self._lock:
+            return [(k, v) for k, (v, exp, _) in self._data.items() if exp is None or exp > now]
+
+    def values(self) -> List[Any]:
+        return [v for _, v in self.items()]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "bytes": self._bytes if self.max_bytes else None,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
+
+    # dict-style access
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return self._alive(key, time.time())
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def __delitem__(self, key):
+        if not self.delete(key):
+            raise KeyError(key)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def __iter__(self) -> Iterator:
+        return iter(self.keys())
+
+
+# name -> every named in-process cache, swept and reported together
+# (BoundedTTLCache, or a tracked cache with its own storage: see track_cache)
+_registry: Dict[str, Any] = {}
+_registry_lock = threading.Lock()
+
+
+def register_cache(
+    name: str,
+    max_entries: int = 1000,
+    ttl_seconds: Optional[float] = None,
+    max_bytes: Optional[int] = None
+) -> BoundedTTLCache:
+    """
+    Create (or return the existing) named in-process cache. Registered caches are
+    expired by the background sweeper and listed in cache_stats().
+    """
+    with _registry_lock:
+        existing = _registry.get(name)
+        if existing is not None:
+            return existing
+        bounded = BoundedTTLCache(name, max_entries=max_entries, default_ttl=ttl_seconds, max_bytes=max_bytes)
+        _registry[name] = bounded
+        return bounded
+
+
+def track_cache(tracked: Any) -> Any:
+    """
+    Register an in-process cache that keeps its own storage (anything with a `name`,
+    expire() -> int and stats()) so the sweeper and cache_stats() cover it too.
+    """
+    with _registry_lock:
+        _registry.setdefault(tracked.name, tracked)
+    return tracked
+
+
+def sweep_caches() -> int:
+    """Expire stale entries in every registered cache; returns how many were removed"""
+    with _registry_lock:
+        caches = list(_registry.values())
+    removed = 0
+    for bounded in caches:
+        try:
+            removed += bounded.expire()
+        except Exception as e:
+            print(f"[CACHE] ⚠️ Sweep failed for {bounded.name}: {e}")
+    return removed
+
+
+async def run_cache_sweeper(interval_seconds: int = CACHE_SWEEP_INTERVAL_SECONDS):
+    """Periodically sweep all registered caches (started from the app startup hook)"""
+    print(f"[CACHE] 🧹 Cache sweeper running every {interval_seconds}s over {len(_registry)} caches")
+    while True:
+        await asyncio.sleep(interval_seconds)
+        removed = sweep_caches()
+        if removed:
+            print(f"[CACHE] 🧹 Swept {removed} expired entries")
+
+
+def cache_regions(key: str) -> List[str]:
+    """Regions a key belongs to, from the outermost prefix inwards (never the key itself)"""
+    parts = key.split(":")
+    return [":".join(parts[:i]) for i in range(1, min(len(parts), CACHE_REGION_DEPTH + 1))]
 
-# Simple in-memory cache
-_memory_cache: Dict[str, Dict[str, Any]] = {}
 
 class RedisCache:
     """
-    Simplified Cache Wrapper
-    Defaults to in-memory caching to avoid Redis dependency issues.
+    Two-tier cache: a bounded in-process LRU in front of an optional shared Redis.
+
+    Redis is used when the `redis` package is installed, CACHE_BACKEND is not
+    "memory" and the server answers PING (REDIS_URL or REDIS_HOST/PORT/DB/PASSWORD).
+    Values that are not JSON-serializable (e.g. vectorstore objects) stay in the
+    local tier only. Everything degrades to in-memory caching if Redis goes away.
+
+    Invalidation is by region (see cache_regions). Locally each region keeps the
+    set of its keys, so clearing a tenant touches only that tenant's entries. In
+    Redis every key embeds the version counters of its regions; invalidating a
+    region INCRs its counter, which orphans the old keys until their TTL expires.
+
+    The client is synchronous (socket_timeout 1s). Async code uses the a*
+    methods, which serve local hits on the event loop and run every Redis call
+    in a worker thread.
     """
+
+    RECONNECT_INTERVAL = 30  # seconds between reconnect attempts after a failure
+
     def __init__(self):
         self.redis_client = None
-        # print("[DEBUG] Cache initialized (In-Memory Mode)")
+        self.prefix = CACHE_KEY_PREFIX
+        self._regions: Dict[str, Set[str]] = {}
+        self._regions_lock = threading.RLock()
+        self.local = register_cache("shared", max_entries=CACHE_MAX_ENTRIES)
+        self.local.on_remove = self._untrack
+        # region -> Redis version counter, re-read from Redis every CACHE_LOCAL_TTL_SECONDS
+        self._versions = register_cache("cache_versions", max_entries=10000, ttl_seconds=CACHE_LOCAL_TTL_SECONDS)
+        self._last_connect_attempt = 0.0
+        self._lock = threading.Lock()
+        self.redis_hits = 0
+        self.redis_misses = 0
+        self.redis_errors = 0
+        self._connect()
+
+    def _connect(self):
+        if CACHE_BACKEND == "memory" or not REDIS_LIB_AVAILABLE:
+            return
+        self._last_connect_attempt = time.time()
+        try:
+            redis_url = os.getenv("REDIS_URL")
+            if redis_url:
+                client = redis.Redis.from_url(redis_url, socket_timeout=1, socket_connect_timeout=1)
+            else:
+                client = redis.Redis(
+                    host=os.getenv("REDIS_HOST", "localhost"),
+                    port=int(os.getenv("REDIS_PORT", "6379")),
+                    db=int(os.getenv("REDIS_DB", "0")),
+                    password=os.getenv("REDIS_PASSWORD") or None,
+                    socket_timeout=1,
+                    socket_connect_timeout=1
+                )
+            client.ping()
+            self.redis_client = client
+            print(f"[CACHE] ✅ Redis cache tier connected")
+        except Exception as e:
+            self.redis_client = None
+            print(f"[CACHE] ⚠️ Redis unavailable, using in-memory cache only: {e}")
+
+    def _redis(self):
+        """Redis client if usable, retrying the connection at most every RECONNECT_INTERVAL"""
+        if self.redis_client is None and CACHE_BACKEND != "memory" and REDIS_LIB_AVAILABLE:
+            with self._lock:
+                if self.redis_client is None and time.time() - self._last_connect_attempt > self.RECONNECT_INTERVAL:
+                    self._connect()
+        return self.redis_client
+
+    def _redis_failed(self, e: Exception):
+        self.redis_errors += 1
+        print(f"[CACHE] ⚠️ Redis error, falling back to memory: {e}")
+        self.redis_client = None
+
+    def shared_tier_idle(self) -> bool:
+        """True when no Redis call would be made (memory-only, no reconnect due)"""
+        if self.redis_client is not None:
+            return False
+        return (
+            CACHE_BACKEND == "memory"
+            or not REDIS_LIB_AVAILABLE
+            or time.time() - self._last_connect_attempt <= self.RECONNECT_INTERVAL
+        )
+
+    def get_client(self):
+        """The shared Redis client, or None while running memory-only"""
+        return self._redis()
+
+    def report_error(self, e: Exception):
+        """Let other Redis users (e.g. the session history store) trigger the memory fallback"""
+        self._redis_failed(e)
+
+    def is_available(self) -> bool:
+        """Whether the shared Redis tier is connected"""
+        client = self._redis()
+        if client is None:
+            return False
+        try:
+            return bool(client.ping())
+        except Exception as e:
+            self._redis_failed(e)
+            return False
+
+    # ------------------------------------------------------------------
+    # Regions
+    # ------------------------------------------------------------------
+
+    def _track(self, key: str):
+        with self._regions_lock:
+            for region in cache_regions(key):
+                self._regions.setdefault(region, set()).add(key)
+
+    def _untrack(self, key):
+        if not isinstance(key, str):
+            return
+        with self._regions_lock:
+            for region in cache_regions(key):
+                members = self._regions.get(region)
+                if members is not None:
+                    members.discard(key)
+                    if not members:
+                        del self._regions[region]
+
+    def _version_key(self, region: str) -> str:
+        return f"{self.prefix}version:{region}"
+
+    def _redis_key(self, client, key: str) -> str:
+        """Physical Redis key: the logical key tagged with its regions' current versions"""
+        regions = cache_regions(key)
+        if not regions:
+            return self.prefix + key
+        missing = [r for r in regions if r not in self._versions]
+        if missing:
+            for region, version in zip(missing, client.mget([self._version_key(r) for r in missing])):
+                self._versions.set(region, int(version or 0))
+        versions = ".".join(str(self._versions.get(r, 0)) for r in regions)
+        return f"{self.prefix}{key}#v{versions}"
+
+    def _invalidate_local(self, region: str) -> int:
+        with self._regions_lock:
+            keys = list(self._regions.get(region, ()))
+        for key in keys:
+            self.local.delete(key)
+        return len(keys)
+
+    def _bump_version(self, region: str):
+        client = self._redis()
+        if client is not None:
+            try:
+                self._versions.set(region, int(client.incr(self._version_key(region))))
+            except Exception as e:
+                self._redis_failed(e)
+
+    def invalidate_region(self, region: str) -> int:
+        """Drop every entry in a region; returns how many local entries were removed"""
+        removed = self._invalidate_local(region)
+        self._bump_version(region)
+        return removed
+
+    def _read_versions(self, regions: List[str]):
+        client = self._redis()
+        if client is None:
+            return
+        try:
+            for region, version in zip(regions, client.mget([self._version_key(r) for r in regions])):
+                self._versions.set(region, int(version or 0))
+        except Exception as e:
+            self._redis_failed(e)
+
+    async def aregion_versions(self, regions: List[str]) -> List[int]:
+        """
+        Invalidation counters of regions (re-read from Redis at most every
+        CACHE_LOCAL_TTL_SECONDS; always 0 without Redis). Lets other in-process
+        caches notice invalidations published by other workers.
+        """
+        missing = [r for r in regions if r not in self._versions]
+        if missing and not self.shared_tier_idle():
+            await asyncio.to_thread(self._read_versions, missing)
+        return [self._versions.get(r, 0) for r in regions]
+
+    async def ainvalidate_region(self, region: str) -> int:
+        removed = self._invalidate_local(region)
+        if not self.shared_tier_idle():
+            await asyncio.to_thread(self._bump_version, region)
+        return removed
+
+    # ------------------------------------------------------------------
+    # Key/value API
+    # ------------------------------------------------------------------
+
+    def _local_ttl(self, ttl: Optional[float]) -> Optional[float]:
+        # Other workers can change the shared value, so keep local copies short-lived
+        if self.redis_client is None:
+            return ttl
+        return min(ttl, CACHE_LOCAL_TTL_SECONDS) if ttl else CACHE_LOCAL_TTL_SECONDS
+
+    def _set_local(self, key: str, value: Any, ttl: Optional[float]):
+        self.local.set(key, value, ttl=self._local_ttl(ttl))
+        self._track(key)
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.local.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        return self._get_shared(key)
+
+    async def aget(self, key: str) -> Optional[Any]:
+        value = self.local.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        if self.shared_tier_idle():
+            return None
+        return await asyncio.to_thread(self._get_shared, key)
+
+    def _get_shared(self, key: str) -> Optional[Any]:
+        client = self._redis()
+        if client is None:
+            return None
+        try:
+            redis_key = self._redis_key(client, key)
+            raw = client.get(redis_key)
+            remaining = int(client.ttl(redis_key)) if raw is not None else -2
+        except Exception as e:
+            self._redis_failed(e)
+            return None
+        if raw is None:
+            self.redis_misses += 1
+            return None
+        self.redis_hits += 1
+        value = json.loads(raw)
+        self._set_local(key, value, remaining if remaining > 0 else None)
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
+        """Cache a value for `ttl` seconds (no expiry if ttl is None)"""
+        self._set_shared(key, value, ttl)
+        self._set_local(key, value, ttl)
+        return True
+
+    async def aset(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
+        if not self.shared_tier_idle():
+            await asyncio.to_thread(self._set_shared, key, value, ttl)
+        self._set_local(key, value, ttl)
+        return True
+
+    def _set_shared(self, key: str, value: Any, ttl: Optional[int]):
+        client = self._redis()
+        if client is not None:
+            try:
+                payload = json.dumps(value)
+            except (TypeError, ValueError):
+                payload = None  # not JSON-serializable: local tier only
+            if payload is not None:
+                try:
+                    redis_key = self._redis_key(client, key)
+                    if ttl:
+                        client.set(redis_key, payload, ex=int(ttl))
+                    else:
+                        client.set(redis_key, payload)
+                except Exception as e:
+                    self._redis_failed(e)
+
+    def delete(self, key: str) -> bool:
+        deleted = self.local.delete(key)
+        client = self._redis()
+        if client is not None:
+            try:
+                deleted = bool(client.delete(self._redis_key(client, key))) or deleted
+            except Exception as e:
+                self._redis_failed(e)
+        return deleted
+
+    def exists(self, key: str) -> bool:
+        if key in self.local:
+            return True
+        client = self._redis()
+        if client is None:
+            return False
+        try:
+            return bool(client.exists(self._redis_key(client, key)))
+        except Exception as e:
+            self._redis_failed(e)
+            return False
+
+    def get_ttl(self, key: str) -> int:
+        """Remaining TTL in seconds (-1 = no expiry, -2 = missing)"""
+        client = self._redis()
+        if client is not None:
+            try:
+                return int(client.ttl(self._redis_key(client, key)))
+            except Exception as e:
+                self._redis_failed(e)
+        return self.local.ttl(key)
+
+    async def ais_available(self) -> bool:
+        return await asyncio.to_thread(self.is_available)
+
+    async def aexists(self, key: str) -> bool:
+        if key in self.local:
+            return True
+        return await asyncio.to_thread(self.exists, key)
+
+    async def aget_ttl(self, key: str) -> int:
+        return await asyncio.to_thread(self.get_ttl, key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._regions_lock:
+            regions = len(self._regions)
+        return {
+            "backend": "redis+memory" if self.redis_client is not None else "memory",
+            "local": self.local.stats(),
+            "regions": regions,
+            "redis_hits": self.redis_hits,
+            "redis_misses": self.redis_misses,
+            "redis_errors": self.redis_errors
+        }
 
-    def is_available(self):
-        return False
 
 # Global cache instance
 cache = RedisCache()
 
+
 def get_from_cache(key: str) -> Optional[Any]:
-    """Get value from in-memory cache"""
+    """Get value from the cache (local tier, then Redis)"""
     try:
-        if key in _memory_cache:
-            data = _memory_cache[key]
-            # Check expiration
-            if data["expires_at"] > time.time():
-                # print(f"[DEBUG] Memory Cache HIT: {key}")
-                return data["value"]
-            else:
-                # print(f"[DEBUG] Memory Cache EXPIRED: {key}")
-                del _memory_cache[key]
-        return None
+        return cache.get(key)
     except Exception as e:
         print(f"[ERROR] Cache GET failed: {str(e)}")
         return None
 
+
 def set_cache(key: str, value: Any, ttl_minutes: int = 30) -> bool:
-    """Set value in in-memory cache"""
+    """Set value in the cache"""
     try:
-        expires_at = time.time() + (ttl_minutes * 60)
-        _memory_cache[key] = {
-            "value": value,
-            "expires_at": expires_at
-        }
-        # print(f"[DEBUG] Memory Cache SET: {key} (TTL: {ttl_minutes}m)")
-        return True
+        return cache.set(key, value, ttl=ttl_minutes * 60)
     except Exception as e:
         print(f"[ERROR] Cache SET failed: {str(e)}")
         return False
 
+
 def delete_cache(key: str) -> bool:
-    """Delete value from in-memory cache"""
+    """Delete value from the cache"""
     try:
-        if key in _memory_cache:
-            del _memory_cache[key]
-            return True
-        return False
+        return cache.delete(key)
     except Exception as e:
         print(f"[ERROR] Cache DELETE failed: {str(e)}")
         return False
 
+
 def cache_key(*parts) -> str:
-    """Generate a cache key from multiple parts"""
+    """Generate a cache key from multiple parts (the leading parts form its regions)"""
     return ":".join(str(part) for part in parts)
 
-def invalidate_chatbot_cache(org_id: str = None):
-    """Invalidate chatbot related cache keys"""
+
+def invalidate_cache_region(*parts) -> int:
+    """Invalidate every key under a region, e.g. invalidate_cache_region("knowledge", org_id)"""
+    try:
+        return cache.invalidate_region(cache_key(*parts))
+    except Exception as e:
+        print(f"[ERROR] Cache region invalidation failed: {str(e)}")
+        return 0
+
+
+def invalidate_chatbot_cache(org_id: str = None, namespace: str = None):
+    """
+    Invalidate chatbot related cache keys. namespace: the knowledge base
+    namespace the chat engine queries for the organization (see
+    org_resolver.chat_namespace); without org_id every namespace is dropped.
+    """
     try:
-        keys_to_remove = []
-        prefix = f"knowledge:{org_id}" if org_id else "knowledge:"
-        
-        for key in list(_memory_cache.keys()):
-            if key.startswith(prefix) or "vectorstore" in key:
-                keys_to_remove.append(key)
-        
-        for key in keys_to_remove:
-            del _memory_cache[key]
-            
-        if keys_to_remove:
-            print(f"[DEBUG] Invalidated {len(keys_to_remove)} cache keys for org {org_id}")
+        removed = invalidate_cache_region("knowledge", org_id) if org_id else invalidate_cache_region("knowledge")
+        removed += invalidate_cache_region("vectorstore")
+
+        if removed:
+            print(f"[DEBUG] Invalidated {removed} cache keys for org {org_id}")
+
+        # Semantic answer cache
+        if namespace or not org_id:
+            from services.langchain.answer_cache import invalidate_answer_cache
+            invalidate_answer_cache(namespace)
         return True
     except Exception as e:
         print(f"[ERROR] Cache invalidation failed: {str(e)}")
         return False
 
+
 def invalidate_admin_cache():
     """Invalidate admin related cache keys"""
     try:
-        keys_to_remove = []
-        
-        for key in list(_memory_cache.keys()):
-            if key.startswith("admin:"):
-                keys_to_remove.append(key)
-        
-        for key in keys_to_remove:
-            del _memory_cache[key]
-            
-        if keys_to_remove:
-            print(f"[DEBUG] Invalidated {len(keys_to_remove)} admin cache keys")
+        removed = invalidate_cache_region("admin")
+
+        if removed:
+            print(f"[DEBUG] Invalidated {removed} admin cache keys")
         return True
     except Exception as e:
         print(f"[ERROR] Admin cache invalidation failed: {str(e)}")
-        return False
\ No newline at end of file
+        return False
+
+
+async def ainvalidate_admin_cache():
+    """invalidate_admin_cache for async callers"""
+    try:
+        removed = await cache.ainvalidate_region(cache_key("admin"))
+
+        if removed:
+            print(f"[DEBUG] Invalidated {removed} admin cache keys")
+        return True
+    except Exception as e:
+        print(f"[ERROR] Admin cache invalidation failed: {str(e)}")
+        return False
+
+
+def cache_stats() -> Dict[str, Any]:
+    """Stats for the shared cache and every registered in-process cache"""
+    with _registry_lock:
+        caches = list(_registry.values())
+    return {
+        "shared": cache.stats(),
+        "caches": [bounded.stats() for bounded in caches]
+    }
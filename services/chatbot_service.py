@@ -1,24 +1,31 @@
+import asyncio
 from datetime import datetime
 from typing import Dict, Any, Optional
 import os
 
 # Import the Agent-Based AI Engine (default)
-from services.langchain.engine import ask_bot
+from services.langchain.engine import ask_bot, ask_bot_stream
 
-# Import Database Helpers
+# Import Database Helpers (async/motor variants - this runs on the event loop)
 from services.database import (
-    create_or_update_visitor,
-    add_conversation_message,
-    is_chat_in_agent_mode,
-    save_user_profile
+    upsert_visitor_async,
+    add_conversation_message_async,
+    upsert_user_profile_async
 )
+from services.background_writer import background_writer
 
 class ChatbotService:
     """
     Orchestrates the chatbot flow: Validation -> Persistence -> AI Engine
     Uses Agent-Based Chatbot with Tools and Advanced Memory Management
+
+    Per turn the critical path does one visitor upsert (which also returns the
+    agent-mode flag), then inserts the question while the engine generates the
+    answer so agents and dashboards see it right away. The answer and the
+    profile update go to the ordered background writer once the answer is ready,
+    so the question and answer are two inserts rather than one insert_many.
     """
-    
+
     @staticmethod
     async def process_chat_request(
         question: str,
@@ -29,68 +36,151 @@ class ChatbotService:
         user_data: Dict = None,
         **kwargs
     ) -> Dict:
-        
+
         org_id = str(organization["_id"])
         org_name = organization.get("name", "Unknown")
 
         # ---------------------------------------------------------
-        # 1. AGENT MODE CHECK (Stop AI if human is here)
+        # 1. SESSION & VISITOR SETUP + AGENT MODE CHECK
         # ---------------------------------------------------------
-        if is_chat_in_agent_mode(org_id, session_id):
+        # Ensure visitor exists in DB; the same round trip tells us if a human agent has the chat
+        visitor = await upsert_visitor_async(org_id, session_id, {"user_data": user_data})
+
+        if visitor.get("is_agent_mode", False):
             # We still save the message so the agent sees it
-            ChatbotService._save_message(org_id, session_id, "user", question, mode)
+            await ChatbotService._save_message(org_id, session_id, "user", question, mode, visitor_id=visitor.get("id"))
             return {
-                "answer": "", 
-                "mode": "agent_active", 
+                "answer": "",
+                "mode": "agent_active",
                 "message": "Message sent to human agent."
             }
 
-        # ---------------------------------------------------------
-        # 2. SESSION & VISITOR SETUP
-        # ---------------------------------------------------------
-        # Ensure visitor exists in DB
-        visitor = create_or_update_visitor(org_id, session_id, {"user_data": user_data})
-        
-        # Save the User's Question to DB
-        ChatbotService._save_message(org_id, session_id, "user", question, mode)
+        # Persist the question while the engine works on the answer
+        question_saved = asyncio.create_task(
+            ChatbotService._save_question(org_id, session_id, question, mode, visitor_id=visitor.get("id"))
+        )
 
         # ---------------------------------------------------------
-        # 3. CALL THE AI ENGINE (The Brain) - AGENT-BASED
+        # 2. CALL THE AI ENGINE (The Brain) - AGENT-BASED
         # ---------------------------------------------------------
         # Using Agent-Based Chatbot with Tools and Advanced Memory
         vector_store_id = kwargs.get("vectorStoreId")
-        
+
         print(f"[CHATBOT SERVICE] Using AGENT-BASED chatbot for session: {session_id}")
-        
-        ai_result = ask_bot(
-            query=question,
-            session_id=session_id,
-            api_key=api_key,
-            user_data=user_data,
-            namespace=vector_store_id or "kb_default",
-            company_name=org_name
+
+        try:
+            ai_result = await ask_bot(
+                query=question,
+                session_id=session_id,
+                api_key=api_key,
+                user_data=user_data,
+                namespace=vector_store_id or "kb_default",
+                company_name=org_name,
+                org_id=org_id
+            )
+        finally:
+            # Even if the engine fails the question must be stored (and before the answer)
+            await asyncio.shield(question_saved)
+
+        return await ChatbotService._finalize_response(
+            org_id, session_id, mode, ai_result, user_data, visitor.get("id")
         )
 
+    @staticmethod
+    async def process_chat_stream(
+        question: str,
+        session_id: str,
+        api_key: str,
+        organization: Dict,
+        mode: str = "chat",
+        user_data: Dict = None,
+        **kwargs
+    ):
+        """
+        Streaming variant of process_chat_request.
+        Yields {"type": "token", "content": ...} events as the answer is generated
+        and finishes with {"type": "done", "result": <process_chat_request payload>}.
+        The completed answer is queued for persistence before the "done" event is sent.
+        """
+        org_id = str(organization["_id"])
+        org_name = organization.get("name", "Unknown")
+
+        # 1. SESSION & VISITOR SETUP + AGENT MODE CHECK (Stop AI if human is here)
+        visitor = await upsert_visitor_async(org_id, session_id, {"user_data": user_data})
+
+        if visitor.get("is_agent_mode", False):
+            await ChatbotService._save_message(org_id, session_id, "user", question, mode, visitor_id=visitor.get("id"))
+            yield {
+                "type": "done",
+                "result": {
+                    "answer": "",
+                    "mode": "agent_active",
+                    "message": "Message sent to human agent."
+                }
+            }
+            return
+
+        question_saved = asyncio.create_task(
+            ChatbotService._save_question(org_id, session_id, question, mode, visitor_id=visitor.get("id"))
+        )
+
+        # 2. STREAM THE AI ENGINE ANSWER
+        vector_store_id = kwargs.get("vectorStoreId")
+        print(f"[CHATBOT SERVICE] Streaming AGENT-BASED chatbot for session: {session_id}")
+
+        ai_result = None
+        try:
+            async for event in ask_bot_stream(
+                query=question,
+                session_id=session_id,
+                api_key=api_key,
+                user_data=user_data,
+                namespace=vector_store_id or "kb_default",
+                company_name=org_name,
+                org_id=org_id
+            ):
+                if event["type"] == "done":
+                    ai_result = event["result"]
+                else:
+                    yield event
+        finally:
+            # Engine error or client gone mid-stream: the question is still stored
+            await asyncio.shield(question_saved)
+        if ai_result is None:
+            return
+
+        # 3. SAVE RESPONSE & UPDATE PROFILE
+        result = await ChatbotService._finalize_response(
+            org_id, session_id, mode, ai_result, user_data, visitor.get("id")
+        )
+        yield {"type": "done", "result": result}
+
+    @staticmethod
+    async def _finalize_response(org_id, session_id, mode, ai_result, user_data=None, visitor_id=None) -> Dict:
+        """Queue the answer (and profile) writes and build the API payload"""
         answer_text = ai_result.get("answer", "I'm sorry, I couldn't process that.")
         sources = ai_result.get("sources", [])
 
         # ---------------------------------------------------------
-        # 4. SAVE RESPONSE & UPDATE PROFILE
+        # 3. SAVE RESPONSE & UPDATE PROFILE (off the critical path)
         # ---------------------------------------------------------
-        # Save AI Answer to DB
-        ChatbotService._save_message(
-            org_id, 
-            session_id, 
-            "assistant", 
-            answer_text, 
-            mode, 
-            metadata={"sources": sources}
+        await ChatbotService._queue_message(
+            org_id,
+            session_id,
+            "assistant",
+            answer_text,
+            mode,
+            metadata={"sources": sources},
+            visitor_id=visitor_id
         )
 
         # If user provided name/email in the chat, update their profile
         if user_data:
-            save_user_profile(org_id, session_id, user_data)
-        
+            await background_writer.submit(
+                lambda: upsert_user_profile_async(org_id, session_id, user_data, visitor_id),
+                label=f"profile for session {session_id}"
+            )
+
         return {
             "answer": answer_text,
             "session_id": session_id,
@@ -99,16 +189,36 @@ class ChatbotService:
         }
 
     @staticmethod
-    def _save_message(org_id, session_id, role, content, mode, metadata=None):
+    async def _save_question(org_id, session_id, question, mode, visitor_id=None):
+        """
+        Insert the question while the engine runs. A failed insert must not cost the
+        user the answer, so it is logged and retried on the background writer.
+        """
+        try:
+            await ChatbotService._save_message(org_id, session_id, "user", question, mode, visitor_id=visitor_id)
+        except Exception as e:
+            print(f"[CHATBOT SERVICE] ⚠️ Could not save question for session {session_id}, queueing it: {str(e)}")
+            await ChatbotService._queue_message(org_id, session_id, "user", question, mode, visitor_id=visitor_id)
+
+    @staticmethod
+    async def _queue_message(org_id, session_id, role, content, mode, metadata=None, visitor_id=None):
+        """Save a message on the ordered background writer"""
+        await background_writer.submit(
+            lambda: ChatbotService._save_message(org_id, session_id, role, content, mode, metadata, visitor_id),
+            label=f"{role} message for session {session_id}"
+        )
+
+    @staticmethod
+    async def _save_message(org_id, session_id, role, content, mode, metadata=None, visitor_id=None):
         """Helper to save messages to DB"""
         if metadata is None: metadata = {}
         metadata["mode"] = mode
-        
-        add_conversation_message(
+
+        await add_conversation_message_async(
             organization_id=org_id,
-            visitor_id=None, # database function handles looking this up usually
+            visitor_id=visitor_id,
             session_id=session_id,
             role=role,
             content=content,
             metadata=metadata
-        )
\ No newline at end of file
+        )
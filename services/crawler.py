@@ -0,0 +1,303 @@
+"""
+Concurrent, polite website crawler used for website training.
+
+- One aiohttp session per crawl: keep-alive connections are reused and the
+  connector caps concurrent requests per host (CRAWLER_PER_HOST_CONCURRENCY).
+- robots.txt is honoured (disallow rules and Crawl-delay), and the sitemaps
+  it lists (or /sitemap.xml) seed the frontier next to the start URL.
+- Links are followed as soon as a page is parsed instead of level by level,
+  so total time tracks latency x depth rather than latency x pages.
+- HTML parsing runs on a thread pool, overlapped with network I/O.
+- Conditional requests: pass the ETag / Last-Modified seen last time (plus the
+  page's links) in `validators`; a 304 costs no download or parse and its
+  stored links are still followed.
+"""
+
+import os
+import time
+import asyncio
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set
+from urllib.parse import urljoin, urlparse, urldefrag
+from urllib.robotparser import RobotFileParser
+
+import aiohttp
+from bs4 import BeautifulSoup
+
+CRAWLER_USER_AGENT = os.getenv(
+    "CRAWLER_USER_AGENT",
+    "Mozilla/5.0 (compatible; BayAIBot/1.0; +https://bayshorecommunication.com)"
+)
+CRAWLER_PER_HOST_CONCURRENCY = int(os.getenv("CRAWLER_PER_HOST_CONCURRENCY", "4"))
+CRAWLER_TIMEOUT_SECONDS = float(os.getenv("CRAWLER_TIMEOUT_SECONDS", "15"))
+CRAWLER_PARSE_WORKERS = int(os.getenv("CRAWLER_PARSE_WORKERS", "4"))
+CRAWLER_MAX_SITEMAP_URLS = int(os.getenv("CRAWLER_MAX_SITEMAP_URLS", "5000"))
+# Upper bound on a robots.txt Crawl-delay we are willing to honour
+CRAWLER_MAX_CRAWL_DELAY_SECONDS = float(os.getenv("CRAWLER_MAX_CRAWL_DELAY_SECONDS", "5"))
+
+SKIPPED_EXTENSIONS = ('.pdf', '.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp', '.zip', '.mp4', '.mp3', '.css', '.js')
+
+# Shared by every crawl in the process; parsing is CPU-bound and should not block the event loop
+_parse_pool = ThreadPoolExecutor(max_workers=CRAWLER_PARSE_WORKERS, thread_name_prefix="crawler-parse")
+
+
+def parse_page(url: str, html: str) -> Dict[str, Any]:
+    """Extract the title, main text and links of an HTML page"""
+    soup = BeautifulSoup(html, 'html.parser')
+
+    links = []
+    for link in soup.find_all("a", href=True):
+        links.append(urljoin(url, link["href"]))
+
+    title = soup.title.string.strip() if soup.title and soup.title.string else url
+
+    # Remove script and style elements
+    for element in soup(["script", "style", "nav", "footer", "header"]):
+        element.decompose()
+
+    # Get the main content (prioritize main, article, or div with content)
+    main_content = soup.find("main") or soup.find("article") or soup.find("div", class_=lambda c: c and ("content" in c.lower() or "main" in c.lower()))
+    text = (main_content or soup).get_text(separator="\n", strip=True)
+
+    # Clean up text (remove excessive newlines)
+    text = "\n".join(line.strip() for line in text.split("\n") if line.strip())
+    return {"title": title, "text": text, "links": links}
+
+
+def _normalize(url: str) -> str:
+    return urldefrag(url)[0]
+
+
+class WebsiteCrawler:
+    """Crawl one site starting at base_url, up to max_pages HTML pages"""
+
+    def __init__(
+        self,
+        base_url: str,
+        max_pages: int = 10,
+        validators: Optional[Dict[str, Dict[str, Any]]] = None,
+        per_host_concurrency: int = CRAWLER_PER_HOST_CONCURRENCY,
+        use_sitemap: bool = True
+    ):
+        self.base_url = _normalize(base_url)
+        self.max_pages = max_pages
+        self.validators = validators or {}
+        self.per_host_concurrency = per_host_concurrency
+        self.use_sitemap = use_sitemap
+        self.host = urlparse(self.base_url).netloc
+        self.robots: Optional[RobotFileParser] = None
+        self.crawl_delay = 0.0
+        self._next_request_at = 0.0
+        self._delay_lock = asyncio.Lock()
+        # Pages that answered 404/410, pages that could not be fetched (timeouts,
+        # 5xx, network errors), and whether every discovered URL was visited
+        # without a single failed fetch
+        self.gone: Set[str] = set()
+        self.failed: Set[str] = set()
+        self.complete = False
+        self.stats = {"fetched": 0, "not_modified": 0, "errors": 0, "robots_blocked": 0, "sitemap_urls": 0}
+
+    # ------------------------------------------------------------------
+    # URL filtering
+    # ------------------------------------------------------------------
+
+    def _in_scope(self, url: str) -> bool:
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https"):
+            return False
+        if parsed.netloc and parsed.netloc != self.host:
+            return False
+        if parsed.path.lower().endswith(SKIPPED_EXTENSIONS):
+            return False
+        if self.robots is not None and not self.robots.can_fetch(CRAWLER_USER_AGENT, url):
+            self.stats["robots_blocked"] += 1
+            return False
+        return True
+
+    # ------------------------------------------------------------------
+    # robots.txt / sitemap discovery
+    # ------------------------------------------------------------------
+
+    async def _get_text(self, session: aiohttp.ClientSession, url: str) -> Optional[str]:
+        try:
+            async with session.get(url) as response:
+                if response.status != 200:
+                    return None
+                return await response.text(errors="replace")
+        except Exception:
+            return None
+
+    async def _load_robots(self, session: aiohttp.ClientSession) -> List[str]:
+        """Parse robots.txt; returns the sitemap URLs it declares"""
+        parsed = urlparse(self.base_url)
+        body = await self._get_text(session, f"{parsed.scheme}://{parsed.netloc}/robots.txt")
+        if body is None:
+            return []
+        robots = RobotFileParser()
+        robots.parse(body.splitlines())
+        self.robots = robots
+        delay = robots.crawl_delay(CRAWLER_USER_AGENT)
+        if delay:
+            self.crawl_delay = min(float(delay), CRAWLER_MAX_CRAWL_DELAY_SECONDS)
+        return list(robots.site_maps() or [])
+
+    async def _sitemap_urls(self, session: aiohttp.ClientSession, sitemaps: List[str]) -> List[str]:
+        """Page URLs from the sitemaps (following one level of sitemap indexes)"""
+        if not sitemaps:
+            parsed = urlparse(self.base_url)
+            sitemaps = [f"{parsed.scheme}://{parsed.netloc}/sitemap.xml"]
+
+        urls: List[str] = []
+        pending = list(sitemaps)
+        seen: Set[str] = set()
+        depth = 0
+        while pending and depth < 2 and len(urls) < CRAWLER_MAX_SITEMAP_URLS:
+            bodies = await asyncio.gather(*(self._get_text(session, s) for s in pending if s not in seen))
+            seen.update(pending)
+            nested = []
+            for body in bodies:
+                if not body:
+                    continue
+                try:
+                    root = ET.fromstring(body.encode("utf-8"))
+                except ET.ParseError:
+                    continue
+                for loc in root.iter():
+                    if not loc.tag.endswith("loc") or not loc.text:
+                        continue
+                    target = loc.text.strip()
+                    if root.tag.endswith("sitemapindex"):
+                        nested.append(target)
+                    else:
+                        urls.append(target)
+            pending = nested
+            depth += 1
+        return urls[:CRAWLER_MAX_SITEMAP_URLS]
+
+    # ------------------------------------------------------------------
+    # Fetching
+    # ------------------------------------------------------------------
+
+    async def _polite_wait(self):
+        """Space requests by the robots.txt Crawl-delay, if any"""
+        if not self.crawl_delay:
+            return
+        async with self._delay_lock:
+            now = time.monotonic()
+            wait = self._next_request_at - now
+            self._next_request_at = max(now, self._next_request_at) + self.crawl_delay
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def _fetch(self, session: aiohttp.ClientSession, url: str) -> Optional[Dict[str, Any]]:
+        headers = {}
+        known = self.validators.get(url) or {}
+        if known.get("etag"):
+            headers["If-None-Match"] = known["etag"]
+        if known.get("last_modified"):
+            headers["If-Modified-Since"] = known["last_modified"]
+
+        await self._polite_wait()
+        try:
+            async with session.get(url, headers=headers) as response:
+                if response.status == 304:
+                    self.stats["not_modified"] += 1
+                    return {"url": url, "not_modified": True, "links": known.get("links", []),
+                            "etag": known.get("etag"), "last_modified": known.get("last_modified")}
+                if response.status in (404, 410):
+                    self.gone.add(url)
+                    return None
+                if response.status != 200:
+                    self.failed.add(url)
+                    return None
+                if "html" not in response.headers.get("Content-Type", ""):
+                    return None
+                html = await response.text(errors="replace")
+                final_url = _normalize(str(response.url))
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+        except Exception as e:
+            self.stats["errors"] += 1
+            self.failed.add(url)
+            print(f"[CRAWLER] Error fetching {url}: {str(e)}")
+            return None
+
+        self.stats["fetched"] += 1
+        loop = asyncio.get_running_loop()
+        try:
+            page = await loop.run_in_executor(_parse_pool, parse_page, final_url, html)
+        except Exception as e:
+            self.stats["errors"] += 1
+            self.failed.add(url)
+            print(f"[CRAWLER] Error parsing {url}: {str(e)}")
+            return None
+        page.update({"url": url, "not_modified": False, "etag": etag, "last_modified": last_modified})
+        return page
+
+    async def crawl(self) -> List[Dict[str, Any]]:
+        """
+        Crawl the site. Returns one dict per page:
+        {"url", "not_modified", "title", "text", "links", "etag", "last_modified"}
+        (title/text are absent for not_modified pages).
+        """
+        timeout = aiohttp.ClientTimeout(total=CRAWLER_TIMEOUT_SECONDS)
+        connector = aiohttp.TCPConnector(limit_per_host=self.per_host_concurrency)
+        started = time.monotonic()
+        async with aiohttp.ClientSession(
+            headers={"User-Agent": CRAWLER_USER_AGENT}, timeout=timeout, connector=connector
+        ) as session:
+            sitemaps = await self._load_robots(session)
+            frontier = [self.base_url]
+            if self.use_sitemap and self.max_pages > 1:
+                sitemap_urls = await self._sitemap_urls(session, sitemaps)
+                self.stats["sitemap_urls"] = len(sitemap_urls)
+                frontier.extend(sitemap_urls)
+
+            seen: Set[str] = set()
+            queue: List[str] = []
+            for url in frontier:
+                url = _normalize(url)
+                if url not in seen and self._in_scope(url):
+                    seen.add(url)
+                    queue.append(url)
+
+            pages: List[Dict[str, Any]] = []
+            in_flight: Set[asyncio.Task] = set()
+            try:
+                while (queue or in_flight) and len(pages) < self.max_pages:
+                    # Keep the connection pool busy without scheduling more than the remaining budget
+                    while queue and len(pages) + len(in_flight) < self.max_pages:
+                        in_flight.add(asyncio.create_task(self._fetch(session, queue.pop(0))))
+                    if not in_flight:
+                        break
+                    done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        page = task.result()
+                        if page is None:
+                            continue
+                        if len(pages) < self.max_pages:
+                            pages.append(page)
+                        for link in page.get("links", []):
+                            link = _normalize(link)
+                            if link not in seen and self._in_scope(link):
+                                seen.add(link)
+                                queue.append(link)
+
+                # A failed page may link to pages we never saw, so its crawl is not complete
+                self.complete = not queue and not in_flight and not self.failed
+            finally:
+                # Let cancelled fetches release their responses before the session closes
+                for task in in_flight:
+                    task.cancel()
+                await asyncio.gather(*in_flight, return_exceptions=True)
+
+        print(f"[CRAWLER] Crawled {len(pages)} pages of {self.host} in {time.monotonic() - started:.1f}s "
+              f"({self.stats['fetched']} fetched, {self.stats['not_modified']} not modified, "
+              f"{self.stats['errors']} errors, {self.stats['robots_blocked']} blocked by robots.txt)")
+        return pages
+
+
+async def crawl_website(base_url: str, max_pages: int = 10, **kwargs) -> List[Dict[str, Any]]:
+    """Crawl a website; see WebsiteCrawler.crawl for the page format"""
+    return await WebsiteCrawler(base_url, max_pages, **kwargs).crawl()
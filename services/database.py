@@ -1,5 +1,8 @@
 import os
 import pymongo
+from pymongo import ReturnDocument
+from pymongo.write_concern import WriteConcern
+from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import load_dotenv
 from models.organization import Organization, Subscription
 from models.visitor import Visitor, ConversationMessage
@@ -25,8 +28,8 @@ try:
         socketTimeoutMS=10000,            # 10 seconds timeout for socket operations
         maxPoolSize=50,                   # Maximum number of connections
         retryWrites=True,                 # Retry writes on network errors
-        w='majority',                     # Write concern: wait for majority acknowledgment
-        journal=True                      # Wait for journal commit
+        w='majority',                     # Default write concern: wait for majority acknowledgment
+        journal=True                      # Wait for journal commit (hot-path collections relax this below)
     )
 
     # Test the connection
@@ -46,6 +49,58 @@ except Exception as e:
 # Get database instance
 db = client.saas_chatbot_db if client else None
 
+# Async client for the chat hot path (motor shares the pymongo options).
+# Motor connects lazily on first use inside the running event loop.
+try:
+    async_client = AsyncIOMotorClient(
+        MONGO_URI,
+        serverSelectionTimeoutMS=10000,
+        connectTimeoutMS=10000,
+        socketTimeoutMS=10000,
+        maxPoolSize=50,
+        retryWrites=True,
+        w='majority',
+        journal=True
+    ) if client else None
+except Exception as e:
+    print(f"[DATABASE] ❌ Async MongoDB client error: {e}")
+    async_client = None
+
+async_db = async_client.saas_chatbot_db if async_client else None
+
+# Write concern tiers. The clients default to "critical"; high-volume chat
+# collections get relaxed handles so a chat turn doesn't wait on a majority
+# journal commit. MONGO_TELEMETRY_W=0 makes telemetry writes fire-and-forget;
+# a tag name such as "majority" is passed through as is.
+_telemetry_w = os.getenv("MONGO_TELEMETRY_W", "1").strip()
+MONGO_TELEMETRY_W = int(_telemetry_w) if _telemetry_w.isdigit() else _telemetry_w
+
+WRITE_CONCERNS = {
+    "critical": WriteConcern(w="majority", j=True),   # payments, subscriptions, organizations, leads, users
+    "relaxed": WriteConcern(w=1, j=False),            # primary ack only; for upserts that read back
+    "telemetry": WriteConcern(w=MONGO_TELEMETRY_W, j=False),  # chat messages
+}
+
+COLLECTION_WRITE_TIERS = {
+    "visitors": "relaxed",
+    "user_profiles": "relaxed",
+    "conversation_summaries": "relaxed",
+    "conversations": "telemetry",
+}
+
+def get_collection(name: str, tier: Optional[str] = None, use_async: bool = False):
+    """Collection handle with the write concern of its tier (critical unless configured otherwise)"""
+    database = async_db if use_async else db
+    if database is None:
+        return None
+    tier = tier or COLLECTION_WRITE_TIERS.get(name, "critical")
+    return database.get_collection(name, write_concern=WRITE_CONCERNS[tier])
+
+# Named async handles for the chat hot path
+async_visitors = get_collection("visitors", use_async=True)
+async_conversations = get_collection("conversations", use_async=True)
+async_user_profiles = get_collection("user_profiles", use_async=True)
+
 def get_database():
     """Return the database instance"""
     if db is None:
@@ -55,10 +110,10 @@ def get_database():
 # Collections - only initialize if db is available
 if db is not None:
     organizations = db.organizations
-    visitors = db.visitors
-    conversations = db.conversations
+    visitors = get_collection("visitors")
+    conversations = get_collection("conversations")
     api_keys = db.api_keys
-    user_profiles = db.user_profiles  # New collection for user profiles
+    user_profiles = get_collection("user_profiles")  # New collection for user profiles
     users = db.users  # Added users collection
     subscriptions = db.subscriptions  # Add subscriptions collection
     leads = db.leads  # Collection for storing leads
@@ -77,52 +132,16 @@ else:
 
 # Initialize the database with indexes
 def init_db():
-    """Initialize database with necessary indexes"""
+    """Create any missing indexes from the registry in services/db_indexes.py"""
     if db is None:
         print("[DATABASE] ⚠️ Skipping index creation - MongoDB not connected")
         return
 
-    # Organization indexes
-    organizations.create_index("api_key", unique=True)
-    
-    # Visitor indexes
-    visitors.create_index("organization_id")
-    visitors.create_index("session_id")
-    visitors.create_index([("organization_id", pymongo.ASCENDING), ("session_id", pymongo.ASCENDING)], unique=True)
-    visitors.create_index("is_agent_mode")  # New index for agent mode queries
-    visitors.create_index([("organization_id", pymongo.ASCENDING), ("is_agent_mode", pymongo.ASCENDING)])  # Compound index
-    
-    # Conversation indexes
-    conversations.create_index("organization_id")
-    conversations.create_index("visitor_id")
-    conversations.create_index("session_id")
-    conversations.create_index([("organization_id", pymongo.ASCENDING), ("session_id", pymongo.ASCENDING)])
-    
-    # User profile indexes
-    user_profiles.create_index("session_id", unique=True)
-    user_profiles.create_index("organization_id")
-    user_profiles.create_index([("organization_id", pymongo.ASCENDING), ("session_id", pymongo.ASCENDING)], unique=True)
-    
-    # Create documents collection if it doesn't exist
-    if "documents" not in db.list_collection_names():
-        db.create_collection("documents")
-        db.documents.create_index("organization_id")
-        db.documents.create_index([("organization_id", pymongo.ASCENDING), ("document_id", pymongo.ASCENDING)], unique=True)
-    
-    # Subscription indexes
-    subscriptions.create_index("stripe_subscription_id", unique=True)
-    subscriptions.create_index("user_id")
-    subscriptions.create_index("organization_id")
-    subscriptions.create_index([("user_id", pymongo.ASCENDING), ("organization_id", pymongo.ASCENDING)])
-    
-    # Lead indexes
-    leads.create_index("organization_id")
-    leads.create_index("session_id")
-    leads.create_index("email")
-    leads.create_index("timestamp")
-    leads.create_index("visitor_id")
-    leads.create_index([("organization_id", pymongo.ASCENDING), ("email", pymongo.ASCENDING)])
-    leads.create_index([("organization_id", pymongo.ASCENDING), ("timestamp", pymongo.ASCENDING)])
+    from services.db_indexes import ensure_indexes
+    try:
+        ensure_indexes(db)
+    except Exception as e:
+        print(f"[DATABASE] ❌ Index creation failed: {e}")
 
 # Lead methods
 def create_lead(organization_id: str, session_id: str, name: str, email: str, phone: str = None, inquiry: str = "", source: str = "chatbot") -> Dict[str, Any]:
@@ -312,8 +331,14 @@ def update_organization(org_id: str, update_data: Dict[str, Any]) -> Optional[Di
     update_data["updated_at"] = datetime.datetime.utcnow()
     
     organizations.update_one({"id": org_id}, {"$set": update_data})
+    _invalidate_cached_organization(org_id)
     return organizations.find_one({"id": org_id})
 
+def _invalidate_cached_organization(org_id: str):
+    """Drop the org from the API-key resolution cache after a write"""
+    from services.org_resolver import invalidate_organization
+    invalidate_organization(org_id)
+
 def get_organization_by_user_id(user_id: str) -> Optional[Dict[str, Any]]:
     """Get organization by user ID"""
     return organizations.find_one({"user_id": user_id})
@@ -326,6 +351,7 @@ def update_organization_subscription(org_id: str, stripe_subscription_id: str |
     
     if update_data:
         organizations.update_one({"id": org_id}, {"$set": update_data})
+        _invalidate_cached_organization(org_id)
     return organizations.find_one({"id": org_id})
 
 # Visitor methods
@@ -652,5 +678,86 @@ def update_subscription_period(
     )
     return get_subscription_by_stripe_id(stripe_subscription_id)
 
-# Initialize database on module import
-init_db() 
\ No newline at end of file
+# Async (motor) methods used by the chat hot path.
+# They mirror the sync helpers above so request handlers never block the event loop.
+async def get_organization_by_api_key_async(api_key: str) -> Optional[Dict[str, Any]]:
+    """Get organization by API key"""
+    return await async_db.organizations.find_one({"api_key": api_key})
+
+async def upsert_visitor_async(organization_id: str, session_id: str, visitor_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Create or update a visitor and return the updated document in one round trip.
+    The returned document also carries the agent-mode flag (is_agent_mode).
+    """
+    now = datetime.datetime.utcnow()
+    update = {
+        "$set": {**visitor_data, "last_active": visitor_data.get("last_active", now)},
+        "$setOnInsert": {"id": str(uuid.uuid4()), "created_at": now}
+    }
+    query = {"organization_id": organization_id, "session_id": session_id}
+    try:
+        return await async_visitors.find_one_and_update(
+            query, update, upsert=True, return_document=ReturnDocument.AFTER
+        )
+    except pymongo.errors.DuplicateKeyError:
+        # Two first requests for the same session raced on the upsert; the other one created it
+        return await async_visitors.find_one_and_update(query, update, return_document=ReturnDocument.AFTER)
+
+def build_conversation_message(
+    organization_id: str,
+    visitor_id: str,
+    session_id: str,
+    role: str,
+    content: str,
+    metadata: Dict[str, Any] = None,
+    created_at: datetime.datetime = None
+) -> Dict[str, Any]:
+    """Build a conversations document using the Conversation model (without writing it)"""
+    conversation = Conversation(
+        id=str(uuid.uuid4()),
+        organization_id=organization_id,
+        visitor_id=visitor_id or "anonymous",
+        session_id=session_id,
+        role=role,
+        content=content,
+        created_at=created_at or datetime.datetime.utcnow(),
+        metadata=metadata or {}
+    )
+    return conversation.model_dump()
+
+async def add_conversation_message_async(
+    organization_id: str,
+    visitor_id: str,
+    session_id: str,
+    role: str,
+    content: str,
+    metadata: Dict[str, Any] = None
+) -> Dict[str, Any]:
+    """Add a message to the conversation history using the Conversation model"""
+    message_dict = build_conversation_message(organization_id, visitor_id, session_id, role, content, metadata)
+
+    # insert_one adds _id to the dict it is given; keep the returned dict clean
+    await async_conversations.insert_one(dict(message_dict))
+    return message_dict
+
+async def upsert_user_profile_async(
+    organization_id: str,
+    session_id: str,
+    profile_data: Dict[str, Any],
+    visitor_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """Save or update user profile data with a single upsert (visitor_id from the caller's visitor)"""
+    now = datetime.datetime.utcnow()
+    return await async_user_profiles.find_one_and_update(
+        {"organization_id": organization_id, "session_id": session_id},
+        {
+            "$set": {"visitor_id": visitor_id, "updated_at": now, "profile_data": profile_data},
+            "$setOnInsert": {"created_at": now}
+        },
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+
+# Initialize database on module import (DB_AUTO_INDEX=false leaves it to `python init_db.py`)
+if os.getenv("DB_AUTO_INDEX", "true").lower() != "false":
+    init_db()
\ No newline at end of file
@@ -0,0 +1,298 @@
+"""
+Declarative MongoDB index registry.
+
+Every collection the routes and services query is listed here with the
+indexes its hot queries need. ensure_indexes() is idempotent: it creates
+what is missing, leaves existing indexes alone and reports (but never drops)
+indexes that are not in the registry or conflict with it.
+
+check_query_plans() runs explain() on a representative filter/sort for each
+hot query and reports the ones whose winning plan still contains a COLLSCAN.
+
+Run both from the command line with `python init_db.py` / `python init_db.py --check`.
+"""
+
+import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import pymongo
+from pymongo.errors import OperationFailure
+
+ASC = pymongo.ASCENDING
+DESC = pymongo.DESCENDING
+
+# Error codes for an index that exists with different options / key spec
+_INDEX_CONFLICT_CODES = (85, 86)
+
+
+def _index(keys, **options) -> Dict[str, Any]:
+    if isinstance(keys, str):
+        keys = [(keys, ASC)]
+    return {"keys": list(keys), "options": options}
+
+
+# collection -> indexes
+INDEXES: Dict[str, List[Dict[str, Any]]] = {
+    "organizations": [
+        _index("api_key", unique=True),
+        _index("id"),
+        _index("subscription_status"),
+        _index("created_at"),
+    ],
+    "visitors": [
+        _index("organization_id"),
+        _index("session_id"),
+        _index([("organization_id", ASC), ("session_id", ASC)], unique=True),
+        _index("is_agent_mode"),
+        _index([("organization_id", ASC), ("is_agent_mode", ASC)]),
+        # Admin "new / active visitors" counts
+        _index("created_at"),
+        _index("last_active"),
+        _index([("organization_id", ASC), ("created_at", ASC)]),
+    ],
+    "conversations": [
+        _index("organization_id"),
+        _index("visitor_id"),
+        _index("session_id"),
+        _index([("organization_id", ASC), ("session_id", ASC)]),
+        # Newest-N history reloads (session memory misses)
+        _index([("session_id", ASC), ("created_at", DESC)]),
+        _index([("organization_id", ASC), ("session_id", ASC), ("created_at", DESC)]),
+        # Admin/dashboard counts and time-range queries
+        _index("created_at"),
+        _index([("organization_id", ASC), ("created_at", DESC)]),
+    ],
+    "knowledge_bases": [
+        _index("userId"),
+        _index([("userId", ASC), ("organizationId", ASC)]),
+        # Website sync scheduler: due recurring syncs
+        _index([("websiteSync.enabled", ASC), ("websiteSync.nextRunAt", ASC)]),
+    ],
+    "conversation_summaries": [
+        _index([("session_id", ASC), ("organization_id", ASC)]),
+    ],
+    "user_profiles": [
+        _index("session_id", unique=True),
+        _index("organization_id"),
+        _index([("organization_id", ASC), ("session_id", ASC)], unique=True),
+    ],
+    "documents": [
+        _index("organization_id"),
+        _index([("organization_id", ASC), ("document_id", ASC)], unique=True),
+    ],
+    "subscriptions": [
+        _index("stripe_subscription_id", unique=True),
+        _index("user_id"),
+        _index("organization_id"),
+        _index([("user_id", ASC), ("organization_id", ASC)]),
+        _index([("organization_id", ASC), ("subscription_status", ASC)]),
+        _index("created_at"),
+    ],
+    "leads": [
+        _index("organization_id"),
+        _index("session_id"),
+        _index("email"),
+        _index("timestamp"),
+        _index("visitor_id"),
+        _index([("organization_id", ASC), ("email", ASC)]),
+        _index([("organization_id", ASC), ("timestamp", ASC)]),
+    ],
+    "users": [
+        _index("email", unique=True),
+        _index("google_id", unique=True, sparse=True),
+        _index("id"),
+        # Subscription monitor scan
+        _index([("has_paid_subscription", ASC), ("subscription_end_date", ASC)]),
+    ],
+    "faqs": [
+        _index("org_id"),
+        _index([("org_id", ASC), ("is_active", ASC)]),
+        # Suggested FAQs (persistent menu)
+        _index([("org_id", ASC), ("is_active", ASC), ("persistent_menu", ASC)]),
+    ],
+    "unknown_questions": [
+        _index([("organization_id", ASC), ("status", ASC), ("created_at", DESC)]),
+        _index([("organization_id", ASC), ("question_normalized", ASC)]),
+        _index([("organization_id", ASC), ("question_category", ASC), ("response_quality", ASC)]),
+        _index([("question", pymongo.TEXT), ("ai_response", pymongo.TEXT)]),
+    ],
+    "calendly_settings": [
+        _index("organization_id", unique=True),
+    ],
+    "instant_reply": [
+        _index([("organization_id", ASC), ("type", ASC)]),
+    ],
+    "vector_manifests": [
+        _index([("namespace", ASC), ("source", ASC)], unique=True),
+    ],
+    "jobs": [
+        _index("job_id", unique=True),
+        # Worker claim: queued jobs due to run, and running jobs with expired leases
+        _index([("status", ASC), ("run_after", ASC), ("created_at", ASC)]),
+        _index([("status", ASC), ("locked_until", ASC)]),
+        _index([("org_id", ASC), ("created_at", DESC)]),
+    ],
+    "website_pages": [
+        _index([("namespace", ASC), ("site", ASC), ("url", ASC)], unique=True),
+    ],
+    "upload_history": [
+        _index("org_id"),
+        _index([("org_id", ASC), ("created_at", DESC)]),
+        _index([("org_id", ASC), ("status", ASC)]),
+    ],
+}
+
+
+_PROBE = "__index_probe__"
+_SINCE = datetime.datetime(2000, 1, 1)
+
+# (label, collection, filter, sort) - representative shapes of the hot queries
+HOT_QUERIES: List[Tuple[str, str, Dict[str, Any], Optional[List[Tuple[str, int]]]]] = [
+    ("api key -> organization", "organizations", {"api_key": _PROBE}, None),
+    ("organization by id", "organizations", {"id": _PROBE}, None),
+    ("visitor upsert", "visitors", {"organization_id": _PROBE, "session_id": _PROBE}, None),
+    ("active visitors", "visitors", {"last_active": {"$gte": _SINCE}}, None),
+    ("new visitors", "visitors", {"created_at": {"$gte": _SINCE}}, None),
+    ("session history reload", "conversations",
+     {"organization_id": _PROBE, "session_id": _PROBE, "role": {"$in": ["user", "assistant"]}}, [("created_at", DESC)]),
+    ("organization conversations", "conversations", {"organization_id": _PROBE}, [("created_at", DESC)]),
+    ("conversation time range", "conversations", {"created_at": {"$gte": _SINCE}}, None),
+    ("organization conversation time range", "conversations",
+     {"organization_id": _PROBE, "created_at": {"$gte": _SINCE}}, None),
+    ("knowledge base by owner", "knowledge_bases", {"userId": _PROBE}, None),
+    ("conversation summary", "conversation_summaries", {"session_id": _PROBE, "organization_id": _PROBE}, None),
+    ("user profile", "user_profiles", {"organization_id": _PROBE, "session_id": _PROBE}, None),
+    ("organization subscription", "subscriptions", {"organization_id": _PROBE, "subscription_status": "active"}, None),
+    ("organization leads", "leads", {"organization_id": _PROBE}, [("timestamp", DESC)]),
+    ("user by email", "users", {"email": _PROBE}, None),
+    ("user by id", "users", {"id": _PROBE}, None),
+    ("paid users", "users", {"has_paid_subscription": True, "subscription_end_date": {"$exists": True, "$ne": None}}, None),
+    ("suggested faqs", "faqs", {"org_id": _PROBE, "is_active": True, "persistent_menu": True}, None),
+    ("unknown question dedupe", "unknown_questions", {"organization_id": _PROBE, "question_normalized": _PROBE}, None),
+    ("unknown questions list", "unknown_questions", {"organization_id": _PROBE, "status": _PROBE}, [("created_at", DESC)]),
+    ("calendly settings", "calendly_settings", {"organization_id": _PROBE}, None),
+    ("instant reply", "instant_reply", {"organization_id": _PROBE, "type": "instant_reply"}, None),
+    ("vector manifest", "vector_manifests", {"namespace": _PROBE, "source": _PROBE}, None),
+    ("job status", "jobs", {"job_id": _PROBE, "org_id": _PROBE}, None),
+    ("queued jobs", "jobs", {"status": "queued", "run_after": {"$lte": _SINCE}}, [("created_at", ASC)]),
+    ("due website syncs", "knowledge_bases", {"websiteSync.enabled": True, "websiteSync.nextRunAt": {"$lte": _SINCE}}, None),
+    ("website page fingerprints", "website_pages", {"namespace": _PROBE, "site": _PROBE}, None),
+    ("upload history", "upload_history", {"org_id": _PROBE}, [("created_at", DESC)]),
+]
+
+
+def _key_spec(keys) -> Tuple:
+    # Existing indexes may report directions as floats (1.0)
+    spec = tuple((field, direction if isinstance(direction, str) else int(direction)) for field, direction in keys)
+    # Text index field order is not significant
+    return tuple(sorted(spec)) if any(d == pymongo.TEXT for _, d in spec) else spec
+
+
+def _existing_key_specs(collection) -> Dict[Tuple, str]:
+    """key spec -> index name for the indexes already on a collection"""
+    specs = {}
+    for name, info in collection.index_information().items():
+        if name == "_id_":
+            continue
+        key = info.get("key", [])
+        # Text indexes are stored as _fts/_ftsx; match them by their weights
+        if any(field == "_fts" for field, _ in key):
+            key = [(field, pymongo.TEXT) for field in info.get("weights", {})]
+        specs[_key_spec(key)] = name
+    return specs
+
+
+def ensure_indexes(database, dry_run: bool = False, verbose: bool = False) -> Dict[str, Any]:
+    """
+    Create every registered index that is missing (idempotent).
+
+    dry_run: only report what would be created.
+    Returns {"created": [...], "missing": [...], "conflicts": [...], "unregistered": [...]}.
+    """
+    report = {"created": [], "missing": [], "conflicts": [], "unregistered": []}
+    if database is None:
+        print("[DB INDEXES] ⚠️ Skipping index creation - MongoDB not connected")
+        return report
+
+    for collection_name, indexes in INDEXES.items():
+        collection = database[collection_name]
+        try:
+            existing = _existing_key_specs(collection)
+        except OperationFailure:
+            existing = {}  # collection does not exist yet
+
+        registered = set()
+        for index in indexes:
+            spec = _key_spec(index["keys"])
+            registered.add(spec)
+            if spec in existing:
+                continue
+
+            label = f"{collection_name} {list(spec)}"
+            if dry_run:
+                report["missing"].append(label)
+                continue
+            try:
+                collection.create_index(index["keys"], **index["options"])
+                report["created"].append(label)
+                if verbose:
+                    print(f"[DB INDEXES] ✅ Created {label}")
+            except OperationFailure as e:
+                if getattr(e, "code", None) not in _INDEX_CONFLICT_CODES:
+                    raise
+                # An index on the same keys exists with other options - keep it
+                report["conflicts"].append(f"{label}: {e}")
+                print(f"[DB INDEXES] ⚠️ Kept existing index for {label}: {e}")
+
+        for spec, name in existing.items():
+            if spec not in registered:
+                report["unregistered"].append(f"{collection_name}.{name}")
+
+    if report["created"]:
+        print(f"[DB INDEXES] Created {len(report['created'])} indexes")
+    return report
+
+
+def _plan_stages(plan) -> List[str]:
+    """Every stage name in an explain() plan tree"""
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            if isinstance(value, (dict, list)):
+                stages.extend(_plan_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(_plan_stages(item))
+    return stages
+
+
+def check_query_plans(database) -> List[Dict[str, Any]]:
+    """
+    explain() every hot query and return the ones that still scan the whole
+    collection: [{"query", "collection", "stages"}].
+    """
+    if database is None:
+        print("[DB INDEXES] ⚠️ Skipping query plan check - MongoDB not connected")
+        return []
+
+    collscans = []
+    for label, collection_name, query, sort in HOT_QUERIES:
+        try:
+            cursor = database[collection_name].find(query).limit(1)
+            if sort:
+                cursor = cursor.sort(sort)
+            plan = cursor.explain().get("queryPlanner", {}).get("winningPlan", {})
+        except Exception as e:
+            print(f"[DB INDEXES] ⚠️ Could not explain '{label}': {e}")
+            continue
+
+        stages = _plan_stages(plan)
+        if "COLLSCAN" in stages:
+            collscans.append({"query": label, "collection": collection_name, "stages": stages})
+            print(f"[DB INDEXES] ⚠️ COLLSCAN: {label} ({collection_name}) - plan: {' <- '.join(stages)}")
+
+    if not collscans:
+        print(f"[DB INDEXES] ✅ All {len(HOT_QUERIES)} hot queries use an index")
+    return collscans
@@ -0,0 +1,276 @@
+"""
+Shared embedding service.
+
+Every query-embedding call site (cascading engine, LangGraph RAG, FAQ vectors,
+knowledge base queries) goes through one CachedEmbeddings instance per
+(model, dimensions):
+
+- an LRU + TTL cache keyed by (model, dimensions, sha256(text)), so a repeated
+  text never costs a second OpenAI round-trip
+- in-flight de-duplication, so concurrent requests for the same text share
+  one call
+- micro-batching of concurrent async requests into a single embeddings call
+
+CachedEmbeddings implements the LangChain Embeddings interface and can be
+passed anywhere an OpenAIEmbeddings instance was used before.
+"""
+
+import os
+import time
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_openai import OpenAIEmbeddings
+
+DEFAULT_EMBEDDING_MODEL = "text-embedding-3-small"
+DEFAULT_EMBEDDING_DIMENSIONS = 1024
+
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "5000"))
+EMBEDDING_CACHE_TTL_SECONDS = int(os.getenv("EMBEDDING_CACHE_TTL_SECONDS", "86400"))
+EMBEDDING_BATCH_WINDOW_MS = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "5"))
+EMBEDDING_MAX_BATCH_SIZE = int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", "256"))
+
+CacheKey = Tuple[str, Optional[int], str]
+
+
+class CachedEmbeddings(Embeddings):
+    """LangChain-compatible embeddings with caching, de-duplication and batching"""
+
+    def __init__(
+        self,
+        model: str = DEFAULT_EMBEDDING_MODEL,
+        dimensions: Optional[int] = DEFAULT_EMBEDDING_DIMENSIONS,
+        max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES,
+        ttl_seconds: int = EMBEDDING_CACHE_TTL_SECONDS,
+        batch_window_ms: float = EMBEDDING_BATCH_WINDOW_MS,
+        max_batch_size: int = EMBEDDING_MAX_BATCH_SIZE
+    ):
+        self.model = model
+        self.dimensions = dimensions
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.batch_window = batch_window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+
+        client_kwargs = {"model": model}
+        if dimensions:
+            client_kwargs["dimensions"] = dimensions
+        self.client = OpenAIEmbeddings(**client_kwargs)
+
+        # key -> (float32 vector, expires_at); float32 arrays keep 1024-d vectors at ~4KB
+        self._cache: "OrderedDict[CacheKey, Tuple[np.ndarray, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Sync path: key -> Future shared by threads embedding the same text
+        self._sync_inflight: Dict[CacheKey, Future] = {}
+
+        # Async path, per event loop: key -> asyncio.Future, plus the batch being collected
+        self._async_inflight: Dict[int, Dict[CacheKey, asyncio.Future]] = {}
+        self._pending: Dict[int, Dict[CacheKey, str]] = {}
+        self._flush_scheduled: Dict[int, bool] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.api_calls = 0
+
+    # ------------------------------------------------------------------
+    # Cache
+    # ------------------------------------------------------------------
+
+    def _key(self, text: str) -> CacheKey:
+        return (self.model, self.dimensions, hashlib.sha256(text.encode("utf-8")).hexdigest())
+
+    def _get_cached(self, key: CacheKey) -> Optional[List[float]]:
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            vector, expires_at = entry
+            if expires_at <= time.time():
+                del self._cache[key]
+                self.misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return vector.tolist()
+
+    def _set_cached(self, key: CacheKey, vector: List[float]):
+        with self._lock:
+            self._cache[key] = (np.asarray(vector, dtype=np.float32), time.time() + self.ttl_seconds)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._cache),
+                "hits": self.hits,
+                "misses": self.misses,
+                "api_calls": self.api_calls
+            }
+
+    # ------------------------------------------------------------------
+    # Sync API
+    # ------------------------------------------------------------------
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, calling OpenAI once for all texts not cached or in flight"""
+        keys = [self._key(t) for t in texts]
+        results: Dict[CacheKey, List[float]] = {}
+        owned: Dict[CacheKey, str] = {}
+        waiting: Dict[CacheKey, Future] = {}
+
+        for key, text in zip(keys, texts):
+            if key in results or key in owned or key in waiting:
+                continue  # duplicate within this call
+            cached = self._get_cached(key)
+            if cached is not None:
+                results[key] = cached
+                continue
+            with self._lock:
+                future = self._sync_inflight.get(key)
+                if future is None:
+                    self._sync_inflight[key] = Future()
+                    owned[key] = text
+                else:
+                    waiting[key] = future
+
+        if owned:
+            owned_keys = list(owned.keys())
+            try:
+                self.api_calls += 1
+                vectors = self.client.embed_documents([owned[k] for k in owned_keys])
+                for key, vector in zip(owned_keys, vectors):
+                    self._set_cached(key, vector)
+                    results[key] = vector
+                    self._resolve_sync(key, result=vector)
+            except Exception as e:
+                for key in owned_keys:
+                    self._resolve_sync(key, error=e)
+                raise
+
+        for key, future in waiting.items():
+            results[key] = future.result()
+
+        return [results[k] for k in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    def _resolve_sync(self, key: CacheKey, result=None, error: Exception = None):
+        with self._lock:
+            future = self._sync_inflight.pop(key, None)
+        if future is not None and not future.done():
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    # ------------------------------------------------------------------
+    # Async API (micro-batched)
+    # ------------------------------------------------------------------
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed texts without blocking the event loop. Misses are queued for a short
+        batch window so concurrent callers share one OpenAI embeddings call.
+        """
+        loop = asyncio.get_running_loop()
+        loop_id = id(loop)
+        inflight = self._async_inflight.setdefault(loop_id, {})
+        pending = self._pending.setdefault(loop_id, {})
+
+        keys = [self._key(t) for t in texts]
+        results: Dict[CacheKey, List[float]] = {}
+        futures: Dict[CacheKey, asyncio.Future] = {}
+
+        for key, text in zip(keys, texts):
+            if key in results or key in futures:
+                continue
+            cached = self._get_cached(key)
+            if cached is not None:
+                results[key] = cached
+                continue
+            future = inflight.get(key)
+            if future is None:
+                future = loop.create_future()
+                inflight[key] = future
+                pending[key] = text
+            futures[key] = future
+
+        if pending:
+            if len(pending) >= self.max_batch_size:
+                await self._flush(loop_id)
+            elif not self._flush_scheduled.get(loop_id):
+                self._flush_scheduled[loop_id] = True
+                loop.call_later(self.batch_window, lambda: asyncio.ensure_future(self._flush(loop_id)))
+
+        for key, future in futures.items():
+            # shield: one cancelled caller must not fail the batch for everyone else
+            results[key] = await asyncio.shield(future)
+
+        return [results[k] for k in keys]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+    async def _flush(self, loop_id: int):
+        """Send everything queued on this loop as one embeddings request"""
+        self._flush_scheduled[loop_id] = False
+        pending = self._pending.get(loop_id)
+        if not pending:
+            return
+        batch = dict(pending)
+        pending.clear()
+        inflight = self._async_inflight.get(loop_id, {})
+
+        batch_keys = list(batch.keys())
+        try:
+            self.api_calls += 1
+            vectors = await self.client.aembed_documents([batch[k] for k in batch_keys])
+            if len(batch_keys) > 1:
+                print(f"[EMBEDDINGS] Batched {len(batch_keys)} texts into one {self.model} call")
+            for key, vector in zip(batch_keys, vectors):
+                self._set_cached(key, vector)
+                future = inflight.pop(key, None)
+                if future is not None and not future.done():
+                    future.set_result(vector)
+        except BaseException as e:
+            for key in batch_keys:
+                future = inflight.pop(key, None)
+                if future is not None and not future.done():
+                    future.set_exception(e if isinstance(e, Exception) else RuntimeError(str(e)))
+            if not isinstance(e, Exception):
+                raise
+
+
+# (model, dimensions) -> shared service instance
+_services: Dict[Tuple[str, Optional[int]], CachedEmbeddings] = {}
+_services_lock = threading.Lock()
+
+
+def get_embedding_service(
+    model: str = DEFAULT_EMBEDDING_MODEL,
+    dimensions: Optional[int] = DEFAULT_EMBEDDING_DIMENSIONS
+) -> CachedEmbeddings:
+    """Return the process-wide embedding service for a model/dimension pair"""
+    key = (model, dimensions)
+    with _services_lock:
+        service = _services.get(key)
+        if service is None:
+            service = CachedEmbeddings(model=model, dimensions=dimensions)
+            _services[key] = service
+            print(f"[EMBEDDINGS] Initialized cached embedding service: {model} ({dimensions or 'native'} dims)")
+        return service
@@ -0,0 +1,328 @@
+"""
+Persistent background job queue (MongoDB-backed) for long-running work:
+document uploads, website crawls and knowledge base builds.
+
+- enqueue() stores a job in the `jobs` collection and returns immediately.
+- Every API process runs a small pool of workers (JOB_WORKERS, 0 disables)
+  that claim queued jobs with an atomic find_one_and_update and hold a lease
+  (JOB_LEASE_SECONDS), renewed by a heartbeat while the handler runs. A job
+  whose worker died is reclaimed once its lease runs out; the old worker's
+  writes are ignored from then on (updates match locked_by + attempts).
+- Handlers report progress through the JobContext they receive; progress is
+  written to the job document (the status endpoint reads it) and pushed to
+  listeners (Socket.IO).
+- A failed job is retried with exponential backoff until max_attempts.
+  Ingestion is idempotent (content-addressed vector IDs + manifests), so a
+  retry only redoes the work that did not finish.
+"""
+
+import os
+import uuid
+import socket
+import asyncio
+import datetime
+import traceback
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from pymongo import ReturnDocument
+
+from services.database import async_db
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_POLL_INTERVAL_SECONDS = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "2"))
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "300"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BASE_SECONDS = int(os.getenv("JOB_RETRY_BASE_SECONDS", "30"))
+# Uploaded files are parked here until a worker picks the job up (must be shared by all workers)
+JOB_UPLOAD_DIR = os.getenv("JOB_UPLOAD_DIR", "uploads/jobs")
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class JobContext:
+    """Handed to a job handler: the job document plus progress reporting"""
+
+    def __init__(self, queue: "JobQueue", job: Dict[str, Any]):
+        self.queue = queue
+        self.job = job
+        self.job_id = job["job_id"]
+        self.payload = job.get("payload", {})
+
+    @property
+    def is_last_attempt(self) -> bool:
+        return self.job.get("attempts", 1) >= self.job.get("max_attempts", 1)
+
+    async def progress(self, percent: float, message: str = ""):
+        """Record progress (0-100) and extend the lease"""
+        await self.queue._update(self.job, {
+            "progress": {"percent": round(min(max(percent, 0), 100), 1), "message": message}
+        })
+
+
+JobHandler = Callable[[JobContext], Awaitable[Optional[Dict[str, Any]]]]
+JobListener = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class JobQueue:
+    """MongoDB job queue with an in-process worker pool"""
+
+    def __init__(self):
+        self.handlers: Dict[str, JobHandler] = {}
+        self.listeners: List[JobListener] = []
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._workers: List[asyncio.Task] = []
+
+    @property
+    def collection(self):
+        return async_db.jobs
+
+    # ------------------------------------------------------------------
+    # Registration
+    # ------------------------------------------------------------------
+
+    def handler(self, job_type: str):
+        """Decorator registering the coroutine that runs jobs of `job_type`"""
+        def register(fn: JobHandler) -> JobHandler:
+            self.handlers[job_type] = fn
+            return fn
+        return register
+
+    def add_listener(self, listener: JobListener):
+        """Called with the public job view on every status/progress change"""
+        self.listeners.append(listener)
+
+    # ------------------------------------------------------------------
+    # Producer API
+    # ------------------------------------------------------------------
+
+    async def enqueue(
+        self,
+        job_type: str,
+        org_id: str,
+        payload: Dict[str, Any],
+        notify_room: Optional[str] = None,
+        max_attempts: int = JOB_MAX_ATTEMPTS
+    ) -> Dict[str, Any]:
+        """Queue a job and return its public view (with job_id)"""
+        if job_type not in self.handlers:
+            raise ValueError(f"Unknown job type: {job_type}")
+        now = datetime.datetime.utcnow()
+        job = {
+            "job_id": str(uuid.uuid4()),
+            "type": job_type,
+            "org_id": org_id,
+            "payload": payload,
+            "notify_room": notify_room,
+            "status": QUEUED,
+            "progress": {"percent": 0, "message": "Queued"},
+            "attempts": 0,
+            "max_attempts": max_attempts,
+            "result": None,
+            "error": None,
+            "run_after": now,
+            "locked_by": None,
+            "locked_until": None,
+            "created_at": now,
+            "updated_at": now
+        }
+        await self.collection.insert_one(job)
+        print(f"[JOBS] Queued {job_type} job {job['job_id']} for org {org_id}")
+        await self._notify(job)
+        return public_job(job)
+
+    async def get(self, job_id: str, org_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        query = {"job_id": job_id}
+        if org_id is not None:
+            query["org_id"] = org_id
+        job = await self.collection.find_one(query)
+        return public_job(job) if job else None
+
+    async def list_jobs(self, org_id: str, limit: int = 20) -> List[Dict[str, Any]]:
+        cursor = self.collection.find({"org_id": org_id}).sort("created_at", -1).limit(limit)
+        return [public_job(job) for job in await cursor.to_list(length=limit)]
+
+    # ------------------------------------------------------------------
+    # Worker pool
+    # ------------------------------------------------------------------
+
+    def start(self, workers: int = JOB_WORKERS):
+        """Start the worker tasks on the running event loop"""
+        if async_db is None or workers <= 0 or self._workers:
+            return
+        self._workers = [asyncio.create_task(self._worker(n)) for n in range(workers)]
+        print(f"[JOBS] Started {workers} job workers ({self.worker_id})")
+
+    async def stop(self):
+        """Cancel the workers; jobs they were running are reclaimed after their lease"""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def _claim(self) -> Optional[Dict[str, Any]]:
+        now = datetime.datetime.utcnow()
+        return await self.collection.find_one_and_update(
+            {
+                "type": {"$in": list(self.handlers)},
+                "$or": [
+                    {"status": QUEUED, "run_after": {"$lte": now}},
+                    # Worker died mid-job: take it over once the lease is gone
+                    {"status": RUNNING, "locked_until": {"$lt": now}}
+                ]
+            },
+            {
+                "$set": {
+                    "status": RUNNING,
+                    "locked_by": self.worker_id,
+                    "locked_until": now + datetime.timedelta(seconds=JOB_LEASE_SECONDS),
+                    "updated_at": now
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def _worker(self, number: int):
+        while True:
+            try:
+                job = await self._claim()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[JOBS] ⚠️ Worker {number} could not claim a job: {e}")
+                job = None
+
+            if job is None:
+                await asyncio.sleep(JOB_POLL_INTERVAL_SECONDS)
+                continue
+            try:
+                await self._run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Bookkeeping failed (e.g. Mongo down); the job is reclaimed once its lease expires
+                print(f"[JOBS] ⚠️ Worker {number} failed while running job {job['job_id']}: {e}")
+
+    async def _run(self, job: Dict[str, Any]):
+        if job["attempts"] > job["max_attempts"]:
+            # Reclaimed after its last attempt's worker died
+            await self._update(job, {"status": FAILED, "error": job.get("error") or "Worker lost during final attempt",
+                                     "locked_by": None, "locked_until": None})
+            return
+        context = JobContext(self, job)
+        print(f"[JOBS] Running {job['type']} job {job['job_id']} (attempt {job['attempts']}/{job['max_attempts']})")
+        await self._notify(job)
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        try:
+            try:
+                result = await self.handlers[job["type"]](context)
+            finally:
+                heartbeat.cancel()
+        except asyncio.CancelledError:
+            # Shutdown: release the job so another worker picks it up right away
+            await self._update(job, {"status": QUEUED, "locked_by": None, "locked_until": None,
+                                     "run_after": datetime.datetime.utcnow(),
+                                     "attempts": max(job["attempts"] - 1, 0)}, notify=False)
+            raise
+        except Exception as e:
+            print(f"[JOBS] ❌ {job['type']} job {job['job_id']} failed: {e}")
+            print(traceback.format_exc())
+            if job["attempts"] < job["max_attempts"]:
+                delay = JOB_RETRY_BASE_SECONDS * (2 ** (job["attempts"] - 1))
+                await self._update(job, {
+                    "status": QUEUED,
+                    "error": str(e),
+                    "locked_by": None,
+                    "locked_until": None,
+                    "run_after": datetime.datetime.utcnow() + datetime.timedelta(seconds=delay),
+                    "progress": {"percent": 0, "message": f"Retrying in {delay}s"}
+                })
+            else:
+                await self._update(job, {"status": FAILED, "error": str(e), "locked_by": None, "locked_until": None})
+            return
+
+        succeeded = await self._update(job, {
+            "status": SUCCEEDED,
+            "result": result,
+            "error": None,
+            "locked_by": None,
+            "locked_until": None,
+            "progress": {"percent": 100, "message": "Done"}
+        })
+        if succeeded:
+            print(f"[JOBS] ✅ {job['type']} job {job['job_id']} succeeded")
+
+    async def _heartbeat(self, job: Dict[str, Any]):
+        """Keep extending the lease while the handler runs (it may not report progress for a while)"""
+        while True:
+            await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+            try:
+                if not await self._update(job, {}, notify=False):
+                    return
+            except Exception as e:
+                print(f"[JOBS] ⚠️ Could not extend lease of job {job['job_id']}: {e}")
+
+    async def _update(self, job: Dict[str, Any], fields: Dict[str, Any], notify: bool = True) -> bool:
+        """
+        Write fields to a job this worker holds. Returns False (and drops the
+        write) if the lease was lost and the job was reclaimed by another worker.
+        """
+        now = datetime.datetime.utcnow()
+        fields = {**fields, "updated_at": now}
+        if fields.get("status", RUNNING) == RUNNING:
+            fields["locked_until"] = now + datetime.timedelta(seconds=JOB_LEASE_SECONDS)
+        result = await self.collection.update_one(
+            {"job_id": job["job_id"], "locked_by": self.worker_id, "attempts": job["attempts"]},
+            {"$set": fields}
+        )
+        if result.matched_count == 0:
+            print(f"[JOBS] ⚠️ Lost lease on job {job['job_id']} (attempt {job['attempts']}); dropping update")
+            return False
+        job.update(fields)
+        if notify:
+            await self._notify(job)
+        return True
+
+    async def _notify(self, job: Dict[str, Any]):
+        view = public_job(job)
+        for listener in self.listeners:
+            try:
+                await listener({**view, "notify_room": job.get("notify_room")})
+            except Exception as e:
+                print(f"[JOBS] ⚠️ Job listener failed: {e}")
+
+
+def public_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """The job fields exposed to API clients"""
+    def iso(value):
+        return value.isoformat() if isinstance(value, datetime.datetime) else value
+
+    return {
+        "job_id": job["job_id"],
+        "type": job["type"],
+        "status": job["status"],
+        "progress": job.get("progress"),
+        "attempts": job.get("attempts", 0),
+        "max_attempts": job.get("max_attempts"),
+        "result": job.get("result"),
+        "error": job.get("error"),
+        "created_at": iso(job.get("created_at")),
+        "updated_at": iso(job.get("updated_at"))
+    }
+
+
+def save_upload(filename: str, content: bytes) -> str:
+    """Park an uploaded file for a background job and return its path"""
+    os.makedirs(JOB_UPLOAD_DIR, exist_ok=True)
+    path = os.path.join(JOB_UPLOAD_DIR, f"{uuid.uuid4().hex}_{os.path.basename(filename)}")
+    with open(path, "wb") as f:
+        f.write(content)
+    return path
+
+
+# Global job queue instance
+job_queue = JobQueue()
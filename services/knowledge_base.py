@@ -9,6 +9,7 @@ from typing import Dict, Any, Optional, List
 from datetime import datetime
 from bson import ObjectId
 from services.database import db
+from services.org_resolver import invalidate_knowledge_base
 from models.knowledge_base import (
     KnowledgeBaseCreate,
     KnowledgeBaseUpdate,
@@ -99,6 +100,7 @@ async def create_knowledge_base(
         
         result = knowledge_bases.insert_one(kb_data)
         kb_data["_id"] = result.inserted_id
+        invalidate_knowledge_base(user_id)
         
         logger.info(f"✅ Created knowledge base for user {user_id}: {result.inserted_id}")
         return kb_data
@@ -206,6 +208,7 @@ async def update_knowledge_base(
             {"$set": update_dict},
             return_document=True
         )
+        invalidate_knowledge_base(user_id)
         
         logger.info(f"✅ Updated knowledge base {kb['_id']} to version {new_version}")
         return result
@@ -242,6 +245,7 @@ async def delete_knowledge_base(user_id: str, organization_id: str) -> bool:
         )
         
         success = result.modified_count > 0
+        invalidate_knowledge_base(user_id)
         if success:
             logger.info(f"✅ Archived knowledge base for user {user_id}")
         return success
@@ -0,0 +1,235 @@
+"""
+Semantic answer cache for the cascading RAG engine.
+
+Stores final answers to first-turn (history-free, anonymous) questions per
+Pinecone namespace and organization together with the question embedding. A
+later question from the same organization in the same namespace whose
+embedding is within the similarity threshold is answered straight from the
+cache, skipping retrieval and both LLM calls. Answers are branded with the
+organization's name and may come from its web-search tier, so tenants sharing
+a namespace (e.g. "kb_default") never share entries.
+
+Entries expire after a TTL, each namespace is LRU-bounded, and a namespace is
+dropped whenever its knowledge base changes (see invalidate_answer_cache). The
+cache is tracked in the services.cache registry, so the background sweeper
+expires entries of namespaces nobody asks about and /admin/cache/stats lists it.
+
+The cache lives in each process. Invalidations are also published through the
+shared cache's region version counters ("answers:<namespace>", "answers" for
+everything); alookup() drops a namespace whose counter moved, so other workers
+stop serving stale answers within CACHE_LOCAL_TTL_SECONDS. Without Redis an
+invalidation only reaches the process that made it.
+"""
+
+import os
+import re
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, Tuple
+
+import numpy as np
+
+from services.cache import cache, cache_key, track_cache
+
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.95"))
+ANSWER_CACHE_TTL_SECONDS = int(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "256"))  # per namespace
+ANSWER_CACHE_MAX_NAMESPACES = int(os.getenv("ANSWER_CACHE_MAX_NAMESPACES", "500"))
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase, strip punctuation and collapse whitespace"""
+    question = re.sub(r"[^\w\s]", " ", question.lower())
+    return " ".join(question.split())
+
+
+class SemanticAnswerCache:
+    """Per-namespace, TTL + LRU bounded cache of ((org, question embedding) -> answer)"""
+
+    def __init__(
+        self,
+        similarity_threshold: float = ANSWER_CACHE_SIMILARITY,
+        ttl_seconds: int = ANSWER_CACHE_TTL_SECONDS,
+        max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+        max_namespaces: int = ANSWER_CACHE_MAX_NAMESPACES,
+        enabled: bool = ANSWER_CACHE_ENABLED
+    ):
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_namespaces = max_namespaces
+        self.enabled = enabled
+        self.name = "semantic_answers"
+        # namespace -> OrderedDict((org_id, normalized question) -> entry), both in LRU order
+        self._namespaces: "OrderedDict[str, OrderedDict[str, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # namespace -> published (global, namespace) invalidation versions its entries belong to
+        self._seen_versions: Dict[str, Tuple[int, ...]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+
+    def lookup(self, namespace: str, org_id: str, question: str, embedding: List[float]) -> Optional[Dict[str, Any]]:
+        """Return the org's cached entry closest to `embedding` if it clears the threshold"""
+        if not self.enabled:
+            return None
+
+        key = (org_id, normalize_question(question))
+        now = time.time()
+        with self._lock:
+            entries = self._namespaces.get(namespace)
+            if not entries:
+                self.misses += 1
+                return None
+
+            # Drop expired entries while we're here
+            expired_keys = [k for k, e in entries.items() if e["expires_at"] <= now]
+            for expired in expired_keys:
+                del entries[expired]
+            self.expirations += len(expired_keys)
+
+            best_key, best_score = None, -1.0
+            if key in entries:
+                best_key, best_score = key, 1.0
+            else:
+                # Only this org's entries; other tenants on the namespace never match
+                keys = [k for k in entries if k[0] == org_id]
+                if keys:
+                    matrix = np.stack([entries[k]["vector"] for k in keys])
+                    scores = matrix @ _unit(embedding)
+                    idx = int(np.argmax(scores))
+                    best_key, best_score = keys[idx], float(scores[idx])
+
+            if best_key is None or best_score < self.similarity_threshold:
+                self.misses += 1
+                return None
+
+            entries.move_to_end(best_key)
+            self._namespaces.move_to_end(namespace)
+            self.hits += 1
+            entry = entries[best_key]
+            return {
+                "question": entry["question"],
+                "answer": entry["answer"],
+                "search_tier": entry["search_tier"],
+                "similarity": best_score
+            }
+
+    async def alookup(self, namespace: str, org_id: str, question: str, embedding: List[float]) -> Optional[Dict[str, Any]]:
+        """lookup(), after dropping the namespace if another worker invalidated it"""
+        if not self.enabled:
+            return None
+        versions = tuple(await cache.aregion_versions([cache_key("answers"), cache_key("answers", namespace)]))
+        with self._lock:
+            seen = self._seen_versions.get(namespace)
+            if seen is not None and seen != versions:
+                self._namespaces.pop(namespace, None)
+            self._seen_versions[namespace] = versions
+        return self.lookup(namespace, org_id, question, embedding)
+
+    def store(self, namespace: str, org_id: str, question: str, embedding: List[float], answer: str, search_tier: str):
+        """Cache the org's final answer for a first-turn question"""
+        if not self.enabled or not answer:
+            return
+
+        key = (org_id, normalize_question(question))
+        with self._lock:
+            entries = self._namespaces.get(namespace)
+            if entries is None:
+                entries = OrderedDict()
+                self._namespaces[namespace] = entries
+                while len(self._namespaces) > self.max_namespaces:
+                    self._namespaces.popitem(last=False)
+            self._namespaces.move_to_end(namespace)
+
+            entries[key] = {
+                "question": question,
+                "vector": _unit(embedding),
+                "answer": answer,
+                "search_tier": search_tier,
+                "expires_at": time.time() + self.ttl_seconds
+            }
+            entries.move_to_end(key)
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+
+    def invalidate(self, namespace: Optional[str] = None) -> int:
+        """Drop one namespace (or everything); returns the number of entries removed"""
+        with self._lock:
+            if namespace is None:
+                removed = sum(len(e) for e in self._namespaces.values())
+                self._namespaces.clear()
+                self._seen_versions.clear()
+            else:
+                removed = len(self._namespaces.pop(namespace, {}))
+                self._seen_versions.pop(namespace, None)
+        if removed:
+            print(f"[ANSWER CACHE] Invalidated {removed} cached answers for namespace {namespace or '*'}")
+        return removed
+
+    def expire(self) -> int:
+        """Drop every expired entry (and emptied namespaces); returns how many were removed"""
+        now = time.time()
+        removed = 0
+        with self._lock:
+            for namespace in list(self._namespaces):
+                entries = self._namespaces[namespace]
+                for expired in [k for k, e in entries.items() if e["expires_at"] <= now]:
+                    del entries[expired]
+                    removed += 1
+                if not entries:
+                    del self._namespaces[namespace]
+            self.expirations += removed
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "namespaces": len(self._namespaces),
+                "entries": sum(len(e) for e in self._namespaces.values()),
+                "max_entries": self.max_entries * self.max_namespaces,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "expirations": self.expirations
+            }
+
+
+def _unit(vector: List[float]) -> np.ndarray:
+    array = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(array)
+    return array / norm if norm > 0 else array
+
+
+# Global answer cache instance (swept and reported with the other in-process caches)
+answer_cache = track_cache(SemanticAnswerCache())
+
+
+def _answers_region(namespace: Optional[str]) -> str:
+    return cache_key("answers", namespace) if namespace else cache_key("answers")
+
+
+def invalidate_answer_cache(namespace: Optional[str] = None) -> int:
+    """Invalidate cached answers after a namespace's knowledge base changes (all workers)"""
+    try:
+        removed = answer_cache.invalidate(namespace)
+        cache.invalidate_region(_answers_region(namespace))
+        return removed
+    except Exception as e:
+        print(f"[ERROR] Answer cache invalidation failed: {str(e)}")
+        return 0
+
+
+async def ainvalidate_answer_cache(namespace: Optional[str] = None) -> int:
+    """invalidate_answer_cache for async callers (the Redis publish runs off the event loop)"""
+    try:
+        removed = answer_cache.invalidate(namespace)
+        await cache.ainvalidate_region(_answers_region(namespace))
+        return removed
+    except Exception as e:
+        print(f"[ERROR] Answer cache invalidation failed: {str(e)}")
+        return 0
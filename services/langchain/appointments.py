@@ -16,12 +16,12 @@ logger = logging.getLogger('appointment')
 
 # Add database imports for Calendly settings
 from services.database import get_organization_by_api_key, db
+from services.cache import register_cache
 
-# Add caching for API calls to prevent repeated requests
-_analysis_cache = {}
-_slot_extraction_cache = {}
-_calendly_cache = {}
-_cache_timestamps = {}
+# Add caching for API calls to prevent repeated requests (1 hour TTL, LRU bounded)
+_analysis_cache = register_cache("appointment_analysis", max_entries=2000, ttl_seconds=3600)
+_slot_extraction_cache = register_cache("appointment_slot_extraction", max_entries=2000, ttl_seconds=3600)
+_calendly_cache = register_cache("appointment_calendly", max_entries=500, ttl_seconds=3600)
 
 def get_cache_key(query, available_slots=None):
     """Generate a cache key for the query and slots"""
@@ -32,21 +32,10 @@ def get_cache_key(query, available_slots=None):
 
 def cleanup_cache():
     """Clean up old cache entries (older than 1 hour)"""
-    current_time = time_module.time()
-    expired_keys = []
+    expired = _analysis_cache.expire() + _slot_extraction_cache.expire() + _calendly_cache.expire()
     
-    for key, timestamp in _cache_timestamps.items():
-        if current_time - timestamp > 3600:  # 1 hour
-            expired_keys.append(key)
-    
-    for key in expired_keys:
-        _analysis_cache.pop(key, None)
-        _slot_extraction_cache.pop(key, None)
-        _calendly_cache.pop(key, None)
-        _cache_timestamps.pop(key, None)
-    
-    if expired_keys:
-        print(f"[CACHE] Cleaned up {len(expired_keys)} expired cache entries")
+    if expired:
+        print(f"[CACHE] Cleaned up {expired} expired cache entries")
 
 def make_calendly_api_request(endpoint: str, access_token: str, params: dict = None):
     """Make authenticated request to Calendly API"""
@@ -178,9 +167,10 @@ def extract_slot_info(query, available_slots):
     cleanup_cache()
     
     cache_key = get_cache_key(query, available_slots)
-    if cache_key in _slot_extraction_cache:
+    cached = _slot_extraction_cache.get(cache_key)
+    if cached is not None:
         print(f"[CACHE] Using cached slot extraction for query: {query[:50]}...")
-        return _slot_extraction_cache[cache_key]
+        return cached
     
     print(f"[API] Extracting slot info from query: {query}")
     
@@ -281,7 +271,6 @@ def extract_slot_info(query, available_slots):
                 slot_info["reasoning"] = "Requested date or time not available"
         
         _slot_extraction_cache[cache_key] = slot_info
-        _cache_timestamps[cache_key] = time_module.time()
         
         return slot_info
         
@@ -333,7 +322,6 @@ def extract_slot_info(query, available_slots):
                 break
         
         _slot_extraction_cache[cache_key] = fallback_result
-        _cache_timestamps[cache_key] = time_module.time()
         return fallback_result
 
 def analyze_appointment_query(query):
@@ -342,9 +330,10 @@ def analyze_appointment_query(query):
     cleanup_cache()
     
     cache_key = get_cache_key(query)
-    if cache_key in _analysis_cache:
+    cached = _analysis_cache.get(cache_key)
+    if cached is not None:
         print(f"[CACHE] Using cached analysis for query: {query[:50]}...")
-        return _analysis_cache[cache_key]
+        return cached
     
     print(f"[API] Analyzing appointment query: {query}")
     
@@ -380,7 +369,6 @@ def analyze_appointment_query(query):
         print(f"AI Intent Analysis: {intent_info}")
         
         _analysis_cache[cache_key] = intent_info
-        _cache_timestamps[cache_key] = time_module.time()
         
         return intent_info
         
@@ -398,7 +386,6 @@ def analyze_appointment_query(query):
         }
         
         _analysis_cache[cache_key] = fallback_result
-        _cache_timestamps[cache_key] = time_module.time()
         return fallback_result
 
 def handle_booking(query, user_data, available_slots, language, api_key=None):
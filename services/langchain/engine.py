@@ -1,12 +1,15 @@
 import os
 import time
 import json
+import asyncio
+from contextvars import ContextVar
+from dataclasses import dataclass, field
 from typing import List, Dict, Optional, Any
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 
 # LangChain Core Imports
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from langchain_openai import ChatOpenAI
 from langchain_pinecone import PineconeVectorStore
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.output_parsers import StrOutputParser
@@ -15,6 +18,11 @@ from langchain_core.tools import tool
 from langchain_core.runnables import RunnablePassthrough
 from pinecone import Pinecone
 
+from services.pinecone.async_index import get_async_index
+from services.embedding_service import get_embedding_service
+from services.langchain.history_store import history_store
+from services.langchain.answer_cache import answer_cache, normalize_question
+
 # Import all prompts from centralized location
 from .prompts import (
     REPHRASE_SYSTEM_PROMPT,
@@ -28,33 +36,25 @@ from .prompts import (
     RAG_ERROR_MESSAGE
 )
 
-# Initialize OpenAI client for web search
+# Initialize OpenAI clients for web search (sync kept for the legacy tier helpers)
 openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+async_openai_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 # Setup
 load_dotenv()
 
-# --- 1. Global Memory (Replace with Redis/Database in production) ---
-CHAT_HISTORY_DB = {} 
-
-def get_session_history(session_id: str) -> List:
+# --- 1. Session Memory (Redis + bounded local cache, MongoDB conversations as fallback) ---
+async def get_session_history(session_id: str, org_id: str = None, current_query: str = None) -> List:
     """Retrieves chat history for a specific user session."""
-    return CHAT_HISTORY_DB.get(session_id, [])
+    return await history_store.get(session_id, org_id, current_query=current_query)
 
-def save_to_history(session_id: str, user_query: str, ai_response: str):
-    """Saves the latest turn to memory."""
-    if session_id not in CHAT_HISTORY_DB:
-        CHAT_HISTORY_DB[session_id] = []
-    
-    # Keep last 10 turns
-    history = CHAT_HISTORY_DB[session_id]
-    history.append(HumanMessage(content=user_query))
-    history.append(AIMessage(content=ai_response))
-    CHAT_HISTORY_DB[session_id] = history[-10:] 
+async def save_to_history(session_id: str, user_query: str, ai_response: str, org_id: str = None):
+    """Saves the latest turn to memory (last 10 messages are kept)."""
+    await history_store.append(session_id, user_query, ai_response, org_id)
 
 # Initialize Singletons
 try:
-    embeddings = OpenAIEmbeddings(model="text-embedding-3-small", dimensions=1024)
+    embeddings = get_embedding_service("text-embedding-3-small", 1024)
     pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
     index_name = os.getenv("PINECONE_INDEX", "bayai")
     
@@ -71,25 +71,113 @@ except Exception as e:
 # LANGCHAIN TOOLS FOR RAG AGENT
 # =============================================================================
 
-# Global variables for tools
-_current_namespace = "kb_default"
-_current_company_name = "this company"
-_current_chat_history = []
-
-def set_tool_context(namespace: str, company_name: str, chat_history: List = None):
-    """Set context for tools including full conversation history"""
-    global _current_namespace, _current_company_name, _current_chat_history
-    _current_namespace = namespace
-    _current_company_name = company_name
-    _current_chat_history = chat_history if chat_history else []
+@dataclass
+class ToolContext:
+    """Per-request state the tools read (tenant namespace, company, history)"""
+    namespace: str = "kb_default"
+    company_name: str = "this company"
+    chat_history: List = field(default_factory=list)
+    # query -> embedding computed this turn (shared by the answer cache and retrieval)
+    query_embeddings: Dict[str, List[float]] = field(default_factory=dict)
+    # query -> task resolving to the shared Pinecone matches for this turn
+    retrievals: Dict[str, "asyncio.Task"] = field(default_factory=dict)
+
+# Request-scoped tool context. Every asyncio task (and every thread started via
+# contextvars.copy_context / asyncio.to_thread) sees its own value, so concurrent
+# ask_bot calls never search each other's namespaces.
+_tool_context: ContextVar[Optional[ToolContext]] = ContextVar("tool_context", default=None)
+
+def get_tool_context() -> ToolContext:
+    """Return the tool context of the current request (defaults when unset)"""
+    context = _tool_context.get()
+    if context is None:
+        # Never share a mutable default across requests
+        context = ToolContext()
+        _tool_context.set(context)
+    return context
+
+def set_tool_context(namespace: str, company_name: str, chat_history: List = None) -> ToolContext:
+    """Set context for tools including full conversation history (scoped to the current request)"""
+    context = ToolContext(
+        namespace=namespace,
+        company_name=company_name,
+        chat_history=list(chat_history) if chat_history else []
+    )
+    _tool_context.set(context)
     
     print(f"[TOOL CONTEXT] Updated context:")
     print(f"[TOOL CONTEXT]   Namespace: {namespace}")
     print(f"[TOOL CONTEXT]   Company: {company_name}")
-    print(f"[TOOL CONTEXT]   Conversation history: {len(_current_chat_history)} messages")
+    print(f"[TOOL CONTEXT]   Conversation history: {len(context.chat_history)} messages")
+    return context
+
+# Retrieval is shared by the primary and detailed tiers: one embedding and one
+# Pinecone query at the widest top_k, with each tier sliced locally.
+RETRIEVAL_TOP_K = 10
+PRIMARY_TOP_K = 5
+PRIMARY_SCORE_THRESHOLD = 0.25
+DETAILED_SCORE_THRESHOLD = 0.2
+
+async def embed_query(query: str) -> List[float]:
+    """Embed a query at most once per request"""
+    context = get_tool_context()
+    vector = context.query_embeddings.get(query)
+    if vector is None:
+        vector = await embeddings.aembed_query(query)
+        context.query_embeddings[query] = vector
+    return vector
+
+async def _query_knowledge_base(query: str, namespace: str) -> List:
+    """Embed the query once and run a single Pinecone query at RETRIEVAL_TOP_K"""
+    query_embedding = await embed_query(query)
+    index = await get_async_index(index_name)
+    
+    search_results = await index.query(
+        vector=query_embedding,
+        top_k=RETRIEVAL_TOP_K,
+        namespace=namespace,
+        include_metadata=True
+    )
+    print(f"[RETRIEVAL] 1 embedding + 1 Pinecone query -> {len(search_results.matches)} matches (top_k={RETRIEVAL_TOP_K})")
+    return search_results.matches
+
+async def retrieve_matches(query: str) -> List:
+    """
+    Return the Pinecone matches for `query` in the current request's namespace.
+    The lookup is memoized on the ToolContext, so both KB tiers (even when they
+    run concurrently) share a single embedding and a single index query.
+    """
+    context = get_tool_context()
+    if query in context.retrievals:
+        print(f"[RETRIEVAL] ♻️ Reusing matches already fetched for this turn")
+    # shield: a cancelled tier must not cancel the lookup the other tier awaits
+    return await asyncio.shield(prefetch_matches(query))
+
+def prefetch_matches(query: str) -> "asyncio.Task":
+    """Start (or return the in-flight) retrieval for `query` without awaiting it"""
+    context = get_tool_context()
+    task = context.retrievals.get(query)
+    if task is None:
+        task = asyncio.ensure_future(_query_knowledge_base(query, context.namespace))
+        # Speculative lookups may finish unobserved; don't log "exception never retrieved"
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        context.retrievals[query] = task
+    return task
+
+# Speculative scheduling in ask_bot. Retrieval on the raw query is cheap (one
+# embedding + one index query) and on by default; speculative web search costs
+# an LLM call that is billed even when cancelled, so it is opt-in.
+SPECULATIVE_RETRIEVAL = os.getenv("CASCADE_SPECULATIVE_RETRIEVAL", "true").lower() == "true"
+SPECULATIVE_WEB_SEARCH = os.getenv("CASCADE_SPECULATIVE_WEB_SEARCH", "false").lower() == "true"
+
+def _cancel_pending(*tasks):
+    """Cancel speculative tasks that are no longer needed"""
+    for task in tasks:
+        if task is not None and not task.done():
+            task.cancel()
 
 @tool
-def search_knowledge_base_primary(query: str) -> str:
+async def search_knowledge_base_primary(query: str) -> str:
     """
     STEP 1: Primary search in the knowledge base with standard parameters.
     Use this tool FIRST to find information about services, products, team, hours, location, etc.
@@ -104,12 +192,13 @@ def search_knowledge_base_primary(query: str) -> str:
     try:
         print(f"\n[TOOL: PRIMARY KB SEARCH]")
         print(f"[PRIMARY KB] Query: {query}")
+        context = get_tool_context()
         
         # Search conversation history first
         conversation_context = []
-        if _current_chat_history:
-            print(f"[PRIMARY KB] Searching conversation history ({len(_current_chat_history)} messages)...")
-            for msg in _current_chat_history:
+        if context.chat_history:
+            print(f"[PRIMARY KB] Searching conversation history ({len(context.chat_history)} messages)...")
+            for msg in context.chat_history:
                 if isinstance(msg, HumanMessage):
                     # Check if query relates to previous user questions
                     if any(word.lower() in msg.content.lower() for word in query.lower().split()):
@@ -122,28 +211,20 @@ def search_knowledge_base_primary(query: str) -> str:
         if conversation_context:
             print(f"[PRIMARY KB] ✓ Found {len(conversation_context)} relevant messages in conversation history")
         
-        # Search knowledge base
-        query_embedding = embeddings.embed_query(query)
-        index = pc.Index(index_name)
-        
-        search_results = index.query(
-            vector=query_embedding,
-            top_k=5,
-            namespace=_current_namespace,
-            include_metadata=True
-        )
+        # Search knowledge base (matches are sorted by score; primary tier is the top slice)
+        matches = (await retrieve_matches(query))[:PRIMARY_TOP_K]
         
         # DEBUG: Log all results before filtering
-        print(f"[PRIMARY KB] Raw search results: {len(search_results.matches)} total matches")
-        for idx, match in enumerate(search_results.matches):
+        print(f"[PRIMARY KB] Raw search results: {len(matches)} total matches")
+        for idx, match in enumerate(matches):
             print(f"[PRIMARY KB]   Match {idx+1}: score={match.score:.4f}, title={match.metadata.get('title', 'N/A')[:50]}")
         
         context_parts = []
         relevant_count = 0
         
-        for match in search_results.matches:
-            if match.score < 0.25:  # Lowered threshold from 0.3 to 0.25 for better recall
-                print(f"[PRIMARY KB] ⏭️ Skipping match with score {match.score:.4f} (below threshold 0.25)")
+        for match in matches:
+            if match.score < PRIMARY_SCORE_THRESHOLD:  # Lowered threshold from 0.3 to 0.25 for better recall
+                print(f"[PRIMARY KB] ⏭️ Skipping match with score {match.score:.4f} (below threshold {PRIMARY_SCORE_THRESHOLD})")
                 continue
                 
             content = match.metadata.get("content", "").strip()
@@ -178,7 +259,7 @@ def search_knowledge_base_primary(query: str) -> str:
         return ""
 
 @tool
-def search_knowledge_base_detailed(query: str) -> str:
+async def search_knowledge_base_detailed(query: str) -> str:
     """
     STEP 2: Detailed search in knowledge base with lower threshold and more results.
     Use this tool if primary search didn't find enough information.
@@ -193,13 +274,14 @@ def search_knowledge_base_detailed(query: str) -> str:
     try:
         print(f"\n[TOOL: DETAILED KB SEARCH]")
         print(f"[DETAILED KB] Query: {query}")
+        context = get_tool_context()
         
         # Deep search in conversation history
         conversation_context = []
-        if _current_chat_history:
-            print(f"[DETAILED KB] Deep search in conversation history ({len(_current_chat_history)} messages)...")
+        if context.chat_history:
+            print(f"[DETAILED KB] Deep search in conversation history ({len(context.chat_history)} messages)...")
             # More lenient matching for detailed search
-            for msg in _current_chat_history:
+            for msg in context.chat_history:
                 content_lower = msg.content.lower()
                 # Include more messages with partial matches
                 if any(word.lower() in content_lower for word in query.lower().split() if len(word) > 3):
@@ -211,24 +293,15 @@ def search_knowledge_base_detailed(query: str) -> str:
         if conversation_context:
             print(f"[DETAILED KB] ✓ Found {len(conversation_context)} related messages in history")
         
-        # Detailed knowledge base search
-        query_embedding = embeddings.embed_query(query)
-        index = pc.Index(index_name)
-        
-        # More aggressive search with lower threshold and more results
-        search_results = index.query(
-            vector=query_embedding,
-            top_k=10,
-            namespace=_current_namespace,
-            include_metadata=True
-        )
+        # Detailed knowledge base search: the full result set with a lower threshold
+        matches = await retrieve_matches(query)
         
         context_parts = []
         relevant_count = 0
         
-        for match in search_results.matches:
+        for match in matches:
             # Lower threshold for detailed search
-            if match.score < 0.2:
+            if match.score < DETAILED_SCORE_THRESHOLD:
                 continue
                 
             content = match.metadata.get("content", "").strip()
@@ -263,7 +336,7 @@ def search_knowledge_base_detailed(query: str) -> str:
         return ""
 
 @tool
-def merge_and_synthesize_information(primary_info: str, detailed_info: str, user_question: str) -> str:
+async def merge_and_synthesize_information(primary_info: str, detailed_info: str, user_question: str) -> str:
     """
     STEP 3: Merge and synthesize information from multiple sources.
     Use this tool to combine information from primary and detailed searches.
@@ -311,7 +384,7 @@ Instructions:
 
 Synthesized Answer:"""
 
-        response = openai_client.chat.completions.create(
+        response = await async_openai_client.chat.completions.create(
             model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": "You are an expert at synthesizing information from multiple sources."},
@@ -330,7 +403,7 @@ Synthesized Answer:"""
         return primary_info or detailed_info or ""
 
 @tool
-def search_web_for_company_info(query: str) -> str:
+async def search_web_for_company_info(query: str) -> str:
     """
     STEP 2B: Search the web for public information about the company.
     Use this tool if knowledge base search didn't find information.
@@ -345,11 +418,12 @@ def search_web_for_company_info(query: str) -> str:
     try:
         print(f"\n[TOOL: WEB SEARCH]")
         print(f"[WEB SEARCH] Query: {query}")
-        print(f"[WEB SEARCH] Company: {_current_company_name}")
+        company_name = get_tool_context().company_name
+        print(f"[WEB SEARCH] Company: {company_name}")
         
-        prompt = get_web_search_prompt(query, _current_company_name)
+        prompt = get_web_search_prompt(query, company_name)
 
-        response = openai_client.chat.completions.create(
+        response = await async_openai_client.chat.completions.create(
             model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": WEB_SEARCH_SYSTEM_PROMPT},
@@ -374,7 +448,7 @@ def search_web_for_company_info(query: str) -> str:
         return ""
 
 @tool
-def generate_helpful_fallback_response(user_question: str) -> str:
+async def generate_helpful_fallback_response(user_question: str) -> str:
     """
     FINAL STEP: Generate a helpful response when no information is available.
     Use this tool as a last resort when knowledge base has no relevant information.
@@ -403,7 +477,7 @@ Generate a helpful, professional response that:
 
 Response:"""
 
-        response = openai_client.chat.completions.create(
+        response = await async_openai_client.chat.completions.create(
             model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": "You are a professional customer service representative."},
@@ -551,7 +625,11 @@ def smart_final_reply(query: str, company_name: str) -> str:
     
     return response
 
-def ask_bot(query: str, session_id: str, api_key: str, user_data: dict = None, **kwargs):
+async def _prepare_turn(query: str, session_id: str, user_data: dict = None, **kwargs) -> Dict[str, Any]:
+    """
+    Everything before the final generation: history, reformulation and the
+    cascading search. Returns the state the final MAIN_SYSTEM_PROMPT call needs.
+    """
     start_time = time.time()
     total_tokens = 0
     prompt_tokens = 0
@@ -565,7 +643,8 @@ def ask_bot(query: str, session_id: str, api_key: str, user_data: dict = None, *
     print(f"{'='*80}\n")
     
     # --- 1. Fetch History & Context ---
-    chat_history = get_session_history(session_id)
+    org_id = kwargs.get("org_id")
+    chat_history = await get_session_history(session_id, org_id, current_query=query)
     is_first_message = len(chat_history) == 0
     
     print(f"[HISTORY] Chat history length: {len(chat_history)} messages")
@@ -588,7 +667,47 @@ def ask_bot(query: str, session_id: str, api_key: str, user_data: dict = None, *
             user_context_str += f", Phone: {phone}"
         print(f"[CONTEXT] User data: {user_context_str}")
 
-    # --- 2. Smart Reformulation (Contextualization) ---
+    # --- 2. Set Context for Tools ---
+    # Bound before reformulation so speculative retrieval can start immediately
+    namespace = kwargs.get("vectorStoreId") or kwargs.get("namespace") or "kb_default"
+    company_name = kwargs.get("org_name") or kwargs.get("company_name") or "this company"
+    tool_context = set_tool_context(namespace, company_name, chat_history)  # Pass full conversation history to tools
+    
+    print(f"[CONTEXT] Namespace: {namespace}")
+    print(f"[CONTEXT] Company: {company_name}")
+    print(f"[CONTEXT] Full conversation history available to agent: {len(chat_history)} messages")
+    print(f"[CONTEXT] Tools can now search conversation history as knowledge base")
+
+    # --- Semantic answer cache (first-turn, anonymous questions only) ---
+    # Without history or user data the final answer depends only on the question,
+    # the namespace and the org (company name, web-search tier), so near-identical
+    # questions from the same org can share it.
+    cacheable = answer_cache.enabled and bool(org_id) and not chat_history and not user_data
+    query_embedding = None
+    if cacheable:
+        query_embedding = await embed_query(query)
+        cache_hit = await answer_cache.alookup(namespace, org_id, query, query_embedding)
+        if cache_hit:
+            print(f"[ANSWER CACHE] ✅ HIT (similarity {cache_hit['similarity']:.3f}) for: '{cache_hit['question']}'")
+            return {
+                "start_time": start_time,
+                "org_id": org_id,
+                "total_tokens": 0,
+                "agent_tokens": 0,
+                "chat_history": chat_history,
+                "is_first_message": is_first_message,
+                "user_context_str": user_context_str,
+                "namespace": namespace,
+                "company_name": company_name,
+                "context_text": "",
+                "search_tier": "SEMANTIC_CACHE",
+                "used_agent": False,
+                "cacheable": False,
+                "cached_answer": cache_hit["answer"],
+            }
+        print(f"[ANSWER CACHE] MISS")
+
+    # --- 3. Smart Reformulation (Contextualization) ---
     reformulated_query = query
     if chat_history:
         rephrase_prompt = ChatPromptTemplate.from_messages([
@@ -599,15 +718,36 @@ def ask_bot(query: str, session_id: str, api_key: str, user_data: dict = None, *
         
         rephrase_chain = rephrase_prompt | llm | StrOutputParser()
         
+        # Speculatively retrieve on the raw query while the rephrase is in flight.
+        # If the rephrase comes back unchanged (up to case, punctuation, quotes and
+        # whitespace) the KB tiers reuse these matches.
+        speculative_retrieval = None
+        if SPECULATIVE_RETRIEVAL:
+            speculative_retrieval = prefetch_matches(query)
+            print(f"[SCHEDULER] ⚡ Started speculative KB retrieval on the raw query")
+        
         # Track tokens for rephrase
         print(f"[REPHRASE] Reformulating query with conversation context...")
-        rephrase_response = rephrase_chain.invoke({
-            "chat_history": chat_history,
-            "question": query
-        })
+        try:
+            rephrase_response = await rephrase_chain.ainvoke({
+                "chat_history": chat_history,
+                "question": query
+            })
+        except BaseException:
+            _cancel_pending(speculative_retrieval)
+            raise
         
         reformulated_query = rephrase_response
         
+        if normalize_question(reformulated_query) == normalize_question(query):
+            # Cosmetic rewrite only: search with the raw query so the prefetch is reused
+            reformulated_query = query
+        elif speculative_retrieval:
+            # The raw-query matches can't be used for the reformulated query
+            tool_context.retrievals.pop(query, None)
+            _cancel_pending(speculative_retrieval)
+            print(f"[SCHEDULER] ✂️ Cancelled speculative retrieval (query was reformulated)")
+        
         # Estimate tokens (rough estimate: 1 token ≈ 4 characters)
         rephrase_tokens = len(str(chat_history) + query + reformulated_query) // 4
         total_tokens += rephrase_tokens
@@ -615,30 +755,30 @@ def ask_bot(query: str, session_id: str, api_key: str, user_data: dict = None, *
         print(f"[REPHRASE] Original: '{query}'")
         print(f"[REPHRASE] Reformulated: '{reformulated_query}'")
 
-    # --- 3. Set Context for Tools ---
-    namespace = kwargs.get("vectorStoreId") or kwargs.get("namespace") or "kb_default"
-    company_name = kwargs.get("org_name") or kwargs.get("company_name") or "this company"
-    set_tool_context(namespace, company_name, chat_history)  # Pass full conversation history to tools
-    
-    print(f"[CONTEXT] Namespace: {namespace}")
-    print(f"[CONTEXT] Company: {company_name}")
-    print(f"[CONTEXT] Full conversation history available to agent: {len(chat_history)} messages")
-    print(f"[CONTEXT] Tools can now search conversation history as knowledge base")
-
     # --- 4. MANDATORY CASCADING SEARCH (KB → Web → Fallback) ---
     agent_answer = ""
     used_agent = True
     agent_tokens = 0
     search_tier = "NONE"
     all_search_results = []
+    web_task = None
     
     try:
         print(f"\n[CASCADING SEARCH] Starting mandatory multi-tier search...")
-        print(f"[CASCADING SEARCH] Will try: KB Primary → KB Detailed → Web Search → Merge/Fallback")
-        
-        # TIER 1: PRIMARY KB SEARCH
-        print(f"\n[TIER 1] PRIMARY KB SEARCH")
-        primary_result = search_knowledge_base_primary.func(query=reformulated_query)
+        print(f"[CASCADING SEARCH] Will try: KB Primary + KB Detailed (parallel) → Web Search → Merge/Fallback")
+        
+        # Web search does not depend on the KB tiers, so it can run alongside them
+        # and be cancelled if the KB turns out to be sufficient.
+        if SPECULATIVE_WEB_SEARCH:
+            web_task = asyncio.create_task(search_web_for_company_info.coroutine(query=reformulated_query))
+            print(f"[SCHEDULER] ⚡ Started speculative web search")
+        
+        # TIER 1 + TIER 2: PRIMARY AND DETAILED KB SEARCH (share one retrieval)
+        print(f"\n[TIER 1+2] PRIMARY + DETAILED KB SEARCH")
+        primary_result, detailed_result = await asyncio.gather(
+            search_knowledge_base_primary.coroutine(query=reformulated_query),
+            search_knowledge_base_detailed.coroutine(query=reformulated_query)
+        )
         
         if primary_result and len(primary_result.strip()) > 50:
             all_search_results.append(("PRIMARY_KB", primary_result))
@@ -646,10 +786,6 @@ def ask_bot(query: str, session_id: str, api_key: str, user_data: dict = None, *
         else:
             print(f"[TIER 1] ⚠️ INSUFFICIENT - Primary search returned little/no data")
         
-        # TIER 2: DETAILED KB SEARCH (always try for better coverage)
-        print(f"\n[TIER 2] DETAILED KB SEARCH")
-        detailed_result = search_knowledge_base_detailed.func(query=reformulated_query)
-        
         if detailed_result and len(detailed_result.strip()) > 50:
             all_search_results.append(("DETAILED_KB", detailed_result))
             print(f"[TIER 2] ✅ Found data in detailed search ({len(detailed_result)} chars)")
@@ -659,7 +795,10 @@ def ask_bot(query: str, session_id: str, api_key: str, user_data: dict = None, *
         # TIER 3: WEB SEARCH (try if KB results are weak)
         if len(all_search_results) < 2:
             print(f"\n[TIER 3] WEB SEARCH (KB results insufficient)")
-            web_result = search_web_for_company_info.func(query=reformulated_query)
+            if web_task is not None:
+                web_result = await web_task
+            else:
+                web_result = await search_web_for_company_info.coroutine(query=reformulated_query)
             
             if web_result and len(web_result.strip()) > 50:
                 all_search_results.append(("WEB_SEARCH", web_result))
@@ -668,6 +807,9 @@ def ask_bot(query: str, session_id: str, api_key: str, user_data: dict = None, *
                 print(f"[TIER 3] ⚠️ INSUFFICIENT - Web search returned little/no data")
         else:
             print(f"\n[TIER 3] SKIPPING WEB SEARCH - KB results sufficient")
+            if web_task is not None and not web_task.done():
+                web_task.cancel()
+                print(f"[SCHEDULER] ✂️ Cancelled speculative web search")
         
         # DECISION: Merge or Fallback
         if all_search_results:
@@ -684,7 +826,7 @@ def ask_bot(query: str, session_id: str, api_key: str, user_data: dict = None, *
                     else:
                         detailed_info += f"\n\n[{src}]\n{content}"
                 
-                merge_result = merge_and_synthesize_information.func(
+                merge_result = await merge_and_synthesize_information.coroutine(
                     primary_info=primary_info or "No primary KB data",
                     detailed_info=detailed_info or "No additional data",
                     user_question=query
@@ -699,7 +841,7 @@ def ask_bot(query: str, session_id: str, api_key: str, user_data: dict = None, *
         else:
             # TIER 4B: FALLBACK RESPONSE
             print(f"\n[TIER 4B] GENERATING FALLBACK (no data found)")
-            fallback_result = generate_helpful_fallback_response.func(user_question=query)
+            fallback_result = await generate_helpful_fallback_response.coroutine(user_question=query)
             agent_answer = fallback_result
             search_tier = "FALLBACK"
             print(f"[TIER 4B] ✅ Generated helpful fallback response")
@@ -719,6 +861,8 @@ def ask_bot(query: str, session_id: str, api_key: str, user_data: dict = None, *
         traceback.print_exc()
         agent_answer = ""
         search_tier = "ERROR"
+    finally:
+        _cancel_pending(web_task)
 
     # --- 5. Format Response with Main System Prompt ---
     if agent_answer and agent_answer.strip():
@@ -738,33 +882,71 @@ def ask_bot(query: str, session_id: str, api_key: str, user_data: dict = None, *
     print(f"[GENERATION] First message: {is_first_message}")
     print(f"[GENERATION] Full conversation history in context: {len(chat_history)} messages")
     
-    # Create final response using main system prompt WITH FULL CONVERSATION HISTORY
+    return {
+        "start_time": start_time,
+        "org_id": org_id,
+        "total_tokens": total_tokens,
+        "agent_tokens": agent_tokens,
+        "chat_history": chat_history,
+        "is_first_message": is_first_message,
+        "user_context_str": user_context_str,
+        "namespace": namespace,
+        "company_name": company_name,
+        "context_text": context_text,
+        "search_tier": search_tier,
+        "used_agent": used_agent,
+        "cacheable": cacheable and search_tier not in ("NONE", "ERROR"),
+        "query_embedding": query_embedding,
+        "cached_answer": None,
+    }
+
+def _final_chain():
+    """Final response chain using main system prompt WITH FULL CONVERSATION HISTORY"""
     prompt = ChatPromptTemplate.from_messages([
         ("system", MAIN_SYSTEM_PROMPT),
         MessagesPlaceholder(variable_name="chat_history", optional=True),
         ("human", "{question}")
     ])
+    return prompt | llm | StrOutputParser()
 
-    chain = prompt | llm | StrOutputParser()
-    
-    final_answer = chain.invoke({
-        "company_name": company_name,
-        "context": context_text,
-        "chat_history": chat_history,  # Full conversation history passed to final generation
+def _final_inputs(turn: Dict[str, Any], query: str) -> Dict[str, Any]:
+    return {
+        "company_name": turn["company_name"],
+        "context": turn["context_text"],
+        "chat_history": turn["chat_history"],  # Full conversation history passed to final generation
         "question": query,
-        "user_context": user_context_str
-    })
+        "user_context": turn["user_context_str"]
+    }
+
+async def _finish_turn(turn: Dict[str, Any], query: str, session_id: str, final_answer: str, user_data: dict = None) -> Dict[str, Any]:
+    """Save memory and build the response metadata once the final answer is complete"""
+    chat_history = turn["chat_history"]
+    context_text = turn["context_text"]
+    is_first_message = turn["is_first_message"]
+    search_tier = turn["search_tier"]
+    agent_tokens = turn["agent_tokens"]
+    used_agent = turn["used_agent"]
+    namespace = turn["namespace"]
+    company_name = turn["company_name"]
+    total_tokens = turn["total_tokens"]
 
     # Track tokens for final generation
-    final_gen_tokens = len(context_text + str(chat_history) + query + final_answer) // 4
-    total_tokens += final_gen_tokens
-    print(f"[GENERATION] Tokens used (estimated): {final_gen_tokens}")
-    print(f"[GENERATION] ✓ Final response generated: {final_answer[:100]}...")
+    if turn["cached_answer"] is not None:
+        final_gen_tokens = 0
+        print(f"[GENERATION] ✓ Served from semantic answer cache: {final_answer[:100]}...")
+    else:
+        final_gen_tokens = len(context_text + str(chat_history) + query + final_answer) // 4
+        total_tokens += final_gen_tokens
+        print(f"[GENERATION] Tokens used (estimated): {final_gen_tokens}")
+        print(f"[GENERATION] ✓ Final response generated: {final_answer[:100]}...")
+    
+    if turn["cacheable"]:
+        answer_cache.store(namespace, turn["org_id"], query, turn["query_embedding"], final_answer, search_tier)
 
     # --- 6. Save Memory ---
-    save_to_history(session_id, query, final_answer)
+    await save_to_history(session_id, query, final_answer, turn["org_id"])
     
-    elapsed = time.time() - start_time
+    elapsed = time.time() - turn["start_time"]
     print(f"[COMPLETE] ✓ Total time: {elapsed:.2f}s")
     print(f"{'='*80}\n")
 
@@ -807,3 +989,45 @@ def ask_bot(query: str, session_id: str, api_key: str, user_data: dict = None, *
             "company": company_name
         }
     }
+
+async def ask_bot(query: str, session_id: str, api_key: str, user_data: dict = None, **kwargs):
+    """
+    Answer a chat turn with the cascading search pipeline.
+    Fully async: LLM, embedding and Pinecone calls never block the event loop.
+    """
+    turn = await _prepare_turn(query, session_id, user_data, **kwargs)
+    
+    if turn["cached_answer"] is not None:
+        final_answer = turn["cached_answer"]
+    else:
+        final_answer = await _final_chain().ainvoke(_final_inputs(turn, query))
+    
+    return await _finish_turn(turn, query, session_id, final_answer, user_data)
+
+async def ask_bot_stream(query: str, session_id: str, api_key: str, user_data: dict = None, **kwargs):
+    """
+    Streaming variant of ask_bot.
+    Yields {"type": "token", "content": ...} for each chunk of the final
+    generation, then a single {"type": "done", "result": ...} carrying the same
+    dict ask_bot returns.
+    """
+    turn = await _prepare_turn(query, session_id, user_data, **kwargs)
+    
+    if turn["cached_answer"] is not None:
+        yield {"type": "token", "content": turn["cached_answer"]}
+        yield {"type": "done", "result": await _finish_turn(turn, query, session_id, turn["cached_answer"], user_data)}
+        return
+    
+    chunks = []
+    first_token_at = None
+    async for chunk in _final_chain().astream(_final_inputs(turn, query)):
+        if not chunk:
+            continue
+        if first_token_at is None:
+            first_token_at = time.time()
+            print(f"[STREAM] ⚡ First token after {first_token_at - turn['start_time']:.2f}s")
+        chunks.append(chunk)
+        yield {"type": "token", "content": chunk}
+    
+    result = await _finish_turn(turn, query, session_id, "".join(chunks), user_data)
+    yield {"type": "done", "result": result}
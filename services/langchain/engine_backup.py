@@ -25,6 +25,7 @@ from services.language_detect import detect_language
 from services.notification import send_email_notification
 from services.database import get_organization_by_api_key
 from services.cache import cache, get_from_cache, set_cache, invalidate_chatbot_cache
+from services.org_resolver import chat_namespace, resolve_knowledge_base_sync
 
 # Import our modules
 from services.langchain.embeddings import initialize_embeddings
@@ -694,11 +695,11 @@ def improve_response_quality(response: str, user_info: dict, organization: dict
     return response
 
 # Utility functions
-def add_document(file_path=None, url=None, text=None, api_key=None):
-    """Add documents to the vector store with cache invalidation"""
+def add_document(file_path=None, url=None, text=None, api_key=None, loop=None, source=None):
+    """Add documents to the vector store with cache invalidation (call from a worker thread)"""
     result = add_document_to_vectorstore(
         get_org_vectorstore(api_key), pc, index_name, embeddings, 
-        api_key=api_key, file_path=file_path, url=url, text=text
+        api_key=api_key, file_path=file_path, url=url, text=text, loop=loop, source=source
     )
     
     # Invalidate related caches when new documents are added
@@ -706,7 +707,8 @@ def add_document(file_path=None, url=None, text=None, api_key=None):
         organization = get_organization_by_api_key(api_key)
         if organization:
             org_id = str(organization["_id"])
-            invalidate_chatbot_cache(org_id)
+            namespace = chat_namespace(resolve_knowledge_base_sync(organization.get("user_id")))
+            invalidate_chatbot_cache(org_id, namespace)
             print(f"🗑️ Invalidated cache for organization {org_id} after document upload")
     
     return result
@@ -720,7 +722,8 @@ def remove_document(filename=None, url=None, api_key=None):
         organization = get_organization_by_api_key(api_key)
         if organization:
             org_id = str(organization["_id"])
-            invalidate_chatbot_cache(org_id)
+            namespace = chat_namespace(resolve_knowledge_base_sync(organization.get("user_id")))
+            invalidate_chatbot_cache(org_id, namespace)
             print(f"🗑️ Invalidated cache for organization {org_id} after document removal")
     
     return {"status": "success", "message": "Document removal completed"}
@@ -0,0 +1,172 @@
+"""
+Session history store for the cascading engine.
+
+Conversation turns are already persisted to the `conversations` collection by
+ChatbotService; this store keeps the engine's short sliding window of
+(Human, AI) messages close at hand:
+
+- Redis list per (organization, session) when the shared cache tier is up.
+  Every worker reads and appends to the same list, so a follow-up landing on
+  another worker still sees the conversation.
+- A bounded local cache (write-through) that serves reads while Redis is
+  down.
+- MongoDB `conversations` as the source of truth on a miss (new worker,
+  restart, expired session). The result is written back to the faster tiers.
+
+The Redis client is synchronous, so every Redis call runs in a worker thread.
+"""
+
+import os
+import json
+import asyncio
+from typing import List, Optional
+
+from langchain_core.messages import HumanMessage, AIMessage, BaseMessage
+
+from services.cache import cache, register_cache
+from services.database import async_db
+
+HISTORY_MAX_MESSAGES = int(os.getenv("CHAT_HISTORY_MAX_MESSAGES", "10"))
+HISTORY_TTL_SECONDS = int(os.getenv("CHAT_HISTORY_TTL_SECONDS", "86400"))
+HISTORY_MAX_SESSIONS = int(os.getenv("CHAT_HISTORY_MAX_SESSIONS", "10000"))
+# Without Redis, other workers may append to a session, so local copies are re-read from MongoDB sooner
+HISTORY_LOCAL_TTL_SECONDS = int(os.getenv("CHAT_HISTORY_LOCAL_TTL_SECONDS", "300"))
+
+
+def _to_message(role: str, content: str) -> Optional[BaseMessage]:
+    if role == "user":
+        return HumanMessage(content=content)
+    if role == "assistant":
+        return AIMessage(content=content)
+    return None
+
+
+def _to_record(message: BaseMessage) -> str:
+    role = "user" if isinstance(message, HumanMessage) else "assistant"
+    return json.dumps({"role": role, "content": message.content})
+
+
+class SessionHistoryStore:
+    """Redis list + bounded local cache in front of the conversations collection"""
+
+    def __init__(self, max_messages: int = HISTORY_MAX_MESSAGES, ttl_seconds: int = HISTORY_TTL_SECONDS):
+        self.max_messages = max_messages
+        self.ttl_seconds = ttl_seconds
+        self.local = register_cache("engine_session_history", max_entries=HISTORY_MAX_SESSIONS, ttl_seconds=ttl_seconds)
+
+    @staticmethod
+    def _key(session_id: str, org_id: Optional[str]) -> str:
+        return f"{org_id or '-'}:{session_id}"
+
+    def _redis_key(self, key: str) -> str:
+        return f"{cache.prefix}history:{key}"
+
+    def _local_ttl(self) -> int:
+        return self.ttl_seconds if cache.redis_client is not None else min(self.ttl_seconds, HISTORY_LOCAL_TTL_SECONDS)
+
+    async def get(self, session_id: str, org_id: Optional[str] = None, current_query: Optional[str] = None) -> List[BaseMessage]:
+        """
+        Recent messages for a session, oldest first.
+
+        current_query: the question being answered right now. ChatbotService inserts it
+        while the engine runs, so a MongoDB reload usually ends with it (unless the insert
+        is still in flight); that trailing copy is dropped, and append() adds the question
+        with its answer after the turn.
+        """
+        key = self._key(session_id, org_id)
+
+        records = None if cache.shared_tier_idle() else await asyncio.to_thread(self._read_redis, key)
+        if records is None:
+            cached = self.local.get(key)
+            if cached is not None:
+                return list(cached)
+        elif records:
+            messages = [m for m in (_to_message(**json.loads(r)) for r in records) if m is not None]
+            self.local.set(key, messages, ttl=self._local_ttl())
+            return messages
+
+        messages = await self._load_from_db(session_id, org_id, current_query)
+        await self._write(key, messages, replace=True)
+        return messages
+
+    async def append(self, session_id: str, user_query: str, ai_response: str, org_id: Optional[str] = None):
+        """Add a completed turn, keeping only the last max_messages messages"""
+        key = self._key(session_id, org_id)
+        turn = [HumanMessage(content=user_query), AIMessage(content=ai_response)]
+        history = list(self.local.get(key) or []) + turn
+        self.local.set(key, history[-self.max_messages:], ttl=self._local_ttl())
+        await self._write(key, turn, replace=False)
+
+    def _read_redis(self, key: str) -> Optional[List[bytes]]:
+        """The session's Redis list, or None while Redis is unavailable"""
+        client = cache.get_client()
+        if client is None:
+            return None
+        try:
+            return client.lrange(self._redis_key(key), 0, -1)
+        except Exception as e:
+            cache.report_error(e)
+            return None
+
+    async def _write(self, key: str, messages: List[BaseMessage], replace: bool):
+        """Push messages to the Redis list (trimmed and TTL'd) and, on replace, the local cache"""
+        if replace:
+            self.local.set(key, messages[-self.max_messages:], ttl=self._local_ttl())
+        if messages and not cache.shared_tier_idle():
+            await asyncio.to_thread(self._write_redis, key, messages, replace)
+
+    def _write_redis(self, key: str, messages: List[BaseMessage], replace: bool):
+        client = cache.get_client()
+        if client is None:
+            return
+        redis_key = self._redis_key(key)
+        try:
+            pipe = client.pipeline()
+            if replace:
+                pipe.delete(redis_key)
+            pipe.rpush(redis_key, *[_to_record(m) for m in messages])
+            pipe.ltrim(redis_key, -self.max_messages, -1)
+            pipe.expire(redis_key, self.ttl_seconds)
+            pipe.execute()
+        except Exception as e:
+            cache.report_error(e)
+
+    async def _load_from_db(self, session_id: str, org_id: Optional[str], current_query: Optional[str]) -> List[BaseMessage]:
+        if async_db is None:
+            return []
+        query = {"session_id": session_id, "role": {"$in": ["user", "assistant"]}}
+        if org_id:
+            query["organization_id"] = org_id
+        try:
+            cursor = (
+                async_db.conversations.find(query, {"role": 1, "content": 1, "_id": 0})
+                .sort("created_at", -1)
+                .limit(self.max_messages + 1)
+            )
+            docs = await cursor.to_list(length=self.max_messages + 1)
+        except Exception as e:
+            print(f"[HISTORY] ⚠️ Failed to load history from MongoDB for session {session_id}: {e}")
+            return []
+
+        docs.reverse()  # newest-first query, oldest-first history
+        if docs and current_query is not None and docs[-1].get("role") == "user" and docs[-1].get("content") == current_query:
+            docs = docs[:-1]
+        messages = [m for m in (_to_message(d.get("role"), d.get("content", "")) for d in docs) if m is not None]
+        messages = messages[-self.max_messages:]
+        if messages:
+            print(f"[HISTORY] Reloaded {len(messages)} messages from MongoDB for session {session_id}")
+        return messages
+
+    def clear(self, session_id: str, org_id: Optional[str] = None):
+        key = self._key(session_id, org_id)
+        self.local.delete(key)
+        client = cache.get_client()
+        if client is not None:
+            try:
+                client.delete(self._redis_key(key))
+            except Exception as e:
+                cache.report_error(e)
+
+
+# Global session history store
+history_store = SessionHistoryStore()
@@ -0,0 +1,225 @@
+"""
+Batched embedding + bulk upsert pipeline for knowledge base ingestion.
+
+Chunks are grouped into embeddings requests by token budget (not one request
+per chunk), each batch's vectors are upserted to Pinecone as soon as they are
+ready, and both stages run with bounded concurrency:
+
+    records -> token_batches -> aembed_documents (N at a time)
+                                      -> upsert in INGEST_UPSERT_BATCH_SIZE slices (M at a time)
+
+Ingestion calls the underlying OpenAI client directly instead of the cached
+query embedding service, so a large upload does not evict hot query vectors.
+
+Vector IDs are content addressed (SHA-256 of the normalized chunk text and its
+source), so the same chunk gets the same ID on every worker and across
+restarts. sync_source() keeps a manifest of chunk IDs per (namespace, source)
+in the `vector_manifests` collection: re-ingesting a source embeds and upserts
+only the chunks that are new and deletes the ones that disappeared.
+"""
+
+import os
+import re
+import asyncio
+import hashlib
+import datetime
+from typing import Any, Dict, List, Optional
+
+from services.database import async_db
+from services.embedding_service import CachedEmbeddings, get_embedding_service
+from services.pinecone.async_index import get_async_index
+
+# OpenAI allows 300k tokens / 2048 inputs per embeddings request
+INGEST_EMBED_TOKEN_BUDGET = int(os.getenv("INGEST_EMBED_TOKEN_BUDGET", "100000"))
+INGEST_EMBED_MAX_BATCH = int(os.getenv("INGEST_EMBED_MAX_BATCH", "512"))
+INGEST_EMBED_CONCURRENCY = int(os.getenv("INGEST_EMBED_CONCURRENCY", "4"))
+# Pinecone recommends ~100 vectors (<2MB) per upsert request
+INGEST_UPSERT_BATCH_SIZE = int(os.getenv("INGEST_UPSERT_BATCH_SIZE", "100"))
+INGEST_UPSERT_CONCURRENCY = int(os.getenv("INGEST_UPSERT_CONCURRENCY", "8"))
+# Pinecone accepts up to 1000 IDs per delete request
+INGEST_DELETE_BATCH_SIZE = 1000
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _encoding = None
+
+
+def estimate_tokens(text: str) -> int:
+    """Token count for the embedding models (~4 chars/token if tiktoken is unavailable)"""
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def token_batches(
+    texts: List[str],
+    max_tokens: int = INGEST_EMBED_TOKEN_BUDGET,
+    max_items: int = INGEST_EMBED_MAX_BATCH
+) -> List[List[int]]:
+    """Split texts (by index, order kept) into batches under the token and size limits"""
+    batches: List[List[int]] = []
+    current: List[int] = []
+    current_tokens = 0
+    for i, text in enumerate(texts):
+        tokens = estimate_tokens(text)
+        if current and (current_tokens + tokens > max_tokens or len(current) >= max_items):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(i)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def normalize_chunk_text(text: str) -> str:
+    """Whitespace-insensitive form of a chunk, so reflowed text keeps its ID"""
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def chunk_id(prefix: str, source: str, text: str) -> str:
+    """Deterministic vector ID: prefix + SHA-256 of the source and normalized text"""
+    digest = hashlib.sha256(f"{source}\x00{normalize_chunk_text(text)}".encode("utf-8")).hexdigest()
+    return f"{prefix}_{digest[:32]}"
+
+
+def _ingestion_client(embeddings=None):
+    """The raw embeddings client behind the shared (query-cached) service"""
+    embeddings = embeddings or get_embedding_service("text-embedding-3-small", 1024)
+    return embeddings.client if isinstance(embeddings, CachedEmbeddings) else embeddings
+
+
+async def ingest_records(
+    records: List[Dict[str, Any]],
+    namespace: str,
+    embeddings=None,
+    index_name: Optional[str] = None
+) -> int:
+    """
+    Embed and upsert records of {"id", "text", "metadata"} into a namespace.
+    Returns the number of vectors upserted. Raises if any batch fails.
+    """
+    if not records:
+        return 0
+
+    client = _ingestion_client(embeddings)
+    index = await get_async_index(index_name)
+    texts = [r["text"] for r in records]
+    batches = token_batches(texts)
+    embed_slots = asyncio.Semaphore(INGEST_EMBED_CONCURRENCY)
+    upsert_slots = asyncio.Semaphore(INGEST_UPSERT_CONCURRENCY)
+
+    async def upsert(vectors):
+        async with upsert_slots:
+            await index.upsert(vectors=vectors, namespace=namespace)
+
+    async def run_batch(batch: List[int]) -> int:
+        async with embed_slots:
+            values = await client.aembed_documents([texts[i] for i in batch])
+        vectors = [
+            {"id": records[i]["id"], "values": v, "metadata": records[i].get("metadata", {})}
+            for i, v in zip(batch, values)
+        ]
+        await asyncio.gather(*(
+            upsert(vectors[j:j + INGEST_UPSERT_BATCH_SIZE])
+            for j in range(0, len(vectors), INGEST_UPSERT_BATCH_SIZE)
+        ))
+        return len(vectors)
+
+    counts = await asyncio.gather(*(run_batch(b) for b in batches))
+    total = sum(counts)
+    print(f"[INGESTION] Upserted {total} vectors to {namespace} ({len(batches)} embedding requests)")
+    return total
+
+
+async def delete_vectors(ids: List[str], namespace: str, index_name: Optional[str] = None) -> int:
+    """Delete vectors by ID in batches"""
+    if not ids:
+        return 0
+    index = await get_async_index(index_name)
+    await asyncio.gather(*(
+        index.delete(ids=ids[j:j + INGEST_DELETE_BATCH_SIZE], namespace=namespace)
+        for j in range(0, len(ids), INGEST_DELETE_BATCH_SIZE)
+    ))
+    return len(ids)
+
+
+async def _delete_by_prefix(prefix: str, namespace: str, index_name: Optional[str] = None) -> int:
+    """Delete vectors whose ID starts with prefix (serverless indexes only)"""
+    index = await get_async_index(index_name)
+    deleted = 0
+    token = None
+    while True:
+        page = await index.list_paginated(prefix=prefix, namespace=namespace, pagination_token=token)
+        ids = [v.id for v in (page.vectors or [])]
+        deleted += await delete_vectors(ids, namespace, index_name)
+        token = page.pagination.next if page.pagination else None
+        if not token:
+            return deleted
+
+
+async def sync_source(
+    records: List[Dict[str, Any]],
+    namespace: str,
+    source: str,
+    embeddings=None,
+    index_name: Optional[str] = None,
+    legacy_prefix: Optional[str] = None
+) -> Dict[str, int]:
+    """
+    Make the vectors of one source match `records` ({"id", "text", "metadata"}, IDs
+    from chunk_id), embedding only chunks not already recorded in its manifest and
+    deleting chunks that are gone.
+
+    legacy_prefix: on the first sync of a source (no manifest yet), vectors with this
+    ID prefix written before IDs were content addressed are deleted first.
+
+    Returns {"added", "unchanged", "deleted"}.
+    """
+    # Identical chunks within a source collapse into one vector
+    unique: Dict[str, Dict[str, Any]] = {}
+    for record in records:
+        unique.setdefault(record["id"], record)
+
+    manifests = async_db.vector_manifests
+    manifest = await manifests.find_one({"namespace": namespace, "source": source})
+    previous = set(manifest.get("chunk_ids", [])) if manifest else set()
+
+    if manifest is None and legacy_prefix:
+        try:
+            removed = await _delete_by_prefix(legacy_prefix, namespace, index_name)
+            if removed:
+                print(f"[INGESTION] Removed {removed} legacy vectors ({legacy_prefix}*) from {namespace}")
+        except Exception as e:
+            print(f"[INGESTION] ⚠️ Could not remove legacy vectors ({legacy_prefix}*) from {namespace}: {e}")
+
+    new_records = [r for chunk, r in unique.items() if chunk not in previous]
+    stale = [chunk for chunk in previous if chunk not in unique]
+
+    await ingest_records(new_records, namespace, embeddings, index_name)
+    await delete_vectors(stale, namespace, index_name)
+
+    # Only recorded once the vectors are in place, so a failed run is retried in full
+    await manifests.update_one(
+        {"namespace": namespace, "source": source},
+        {
+            "$set": {"chunk_ids": list(unique.keys()), "updated_at": datetime.datetime.utcnow()},
+            "$setOnInsert": {"created_at": datetime.datetime.utcnow()}
+        },
+        upsert=True
+    )
+
+    result = {"added": len(new_records), "unchanged": len(unique) - len(new_records), "deleted": len(stale)}
+    print(f"[INGESTION] {namespace} / {source}: {result['added']} added, "
+          f"{result['unchanged']} unchanged, {result['deleted']} deleted")
+    return result
+
+
+async def clear_manifests(namespace: str, source: Optional[str] = None):
+    """Forget recorded chunks after their vectors were deleted outside sync_source"""
+    query = {"namespace": namespace}
+    if source is not None:
+        query["source"] = source
+    await async_db.vector_manifests.delete_many(query)
@@ -9,19 +9,23 @@ import logging
 import json
 import re
 import xml.etree.ElementTree as ET
-from typing import Dict, Any, Optional, List, Union, Set, Tuple
+from typing import Dict, Any, Optional, List, Union, Set, Tuple, Callable, Awaitable
 from datetime import datetime
 from bson import ObjectId
 from openai import OpenAI
 import time
+import hashlib
 
 # LangChain Imports for Document Processing
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.document_loaders import PyPDFLoader, WebBaseLoader
 from langchain_core.documents import Document
-from langchain_openai import OpenAIEmbeddings
 
 from services.database import db
+from services.embedding_service import get_embedding_service
+from services.langchain.answer_cache import ainvalidate_answer_cache
+from services.langchain.ingestion import chunk_id, sync_source
+from services.org_resolver import invalidate_knowledge_base
 
 logger = logging.getLogger(__name__)
 
@@ -29,7 +33,7 @@ logger = logging.getLogger(__name__)
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 # Initialize embeddings (MUST match engine.py configuration exactly!)
-embeddings = OpenAIEmbeddings(model="text-embedding-3-small", dimensions=1024)
+embeddings = get_embedding_service("text-embedding-3-small", 1024)
 logger.info("✅ Embeddings initialized for knowledge base uploads (1024 dimensions)")
 
 # Initialize Pinecone
@@ -49,6 +53,17 @@ except Exception as e:
 # MongoDB collection
 knowledge_bases = db.knowledge_bases
 
+# vector_manifests source for the chunks generated by build_knowledge_base_auto
+AUTO_BUILD_SOURCE = "auto_build"
+
+# async callback(percent, message) for long-running builds (see services/jobs.py)
+ProgressCallback = Callable[[float, str], Awaitable[None]]
+
+
+async def _report(progress: Optional[ProgressCallback], percent: float, message: str):
+    if progress is not None:
+        await progress(percent, message)
+
 
 # ==========================================
 # TEXT SPLITTING & PROCESSING
@@ -65,10 +80,12 @@ def get_text_splitter():
 
 async def load_and_split_document(
     file_path: Optional[str] = None,
-    text: Optional[str] = None
+    text: Optional[str] = None,
+    url: Optional[str] = None,
+    max_pages: int = 1
 ) -> List[Document]:
     """
-    Load and split document from file or text (PDFs and manual text only)
+    Load and split document from file, text or a website (up to max_pages pages)
     """
     documents = []
     
@@ -86,6 +103,11 @@ async def load_and_split_document(
         elif text:
             documents = [Document(page_content=text, metadata={"source": "manual_input"})]
 
+        elif url:
+            from services.crawler import crawl_website
+            from services.langchain.vectorstore import pages_to_documents
+            documents = pages_to_documents(await crawl_website(url, max_pages))
+
         # Split documents
         text_splitter = get_text_splitter()
         split_docs = text_splitter.split_documents(documents) 
@@ -559,15 +581,11 @@ async def store_chunks_in_vector_db(
         namespace = f"kb_{organization_id}"
         logger.info(f"📤 Storing {len(chunks)} chunks in Pinecone (namespace: {namespace})...")
         
-        vectors = []
-        for i, chunk in enumerate(chunks):
-            # Generate embedding using LangChain (same as query)
-            emb = embeddings.embed_query(chunk["content"])
-            
-            # Upsert
-            vectors.append({
-                "id": f"kb_{organization_id}_{chunk['type']}_{i}",
-                "values": emb,
+        records = []
+        for chunk in chunks:
+            records.append({
+                "id": chunk_id(f"kb_{organization_id}", AUTO_BUILD_SOURCE, f"{chunk['type']}\n{chunk['content']}"),
+                "text": chunk["content"],
                 "metadata": {
                     "user_id": user_id,
                     "organization_id": organization_id,
@@ -579,12 +597,17 @@ async def store_chunks_in_vector_db(
                 }
             })
         
-        pinecone_index.upsert(vectors=vectors, namespace=namespace)
+        # Only new/changed chunks are embedded; chunks dropped since the last build are deleted.
+        # The first sync also removes the old position-based kb_{org}_{type}_{i} vectors.
+        result = await sync_source(records, namespace, AUTO_BUILD_SOURCE, embeddings,
+                                   legacy_prefix=f"kb_{organization_id}_")
+        if result["added"] or result["deleted"]:
+            await ainvalidate_answer_cache(namespace)
         return namespace
         
     except Exception as e:
         logger.error(f"❌ Error storing chunks: {e}")
-        return None
+        raise
 
 
 # ==========================================
@@ -596,68 +619,76 @@ async def add_document_to_knowledge_base(
     organization_id: str,
     company_name: str,
     file_path: Optional[str] = None,
-    text: Optional[str] = None
+    text: Optional[str] = None,
+    url: Optional[str] = None,
+    max_pages: int = 1,
+    progress: Optional[ProgressCallback] = None
 ) -> Dict[str, Any]:
     """
     Unified function to add any document type to the Knowledge Base.
-    Handles Text and PDFs only (no web scraping).
+    Handles Text, PDFs and website URLs (crawled up to max_pages pages).
+    progress: optional async callback(percent, message), e.g. a background job's.
     """
     try:
-        # 1. Load and Split
-        split_docs = await load_and_split_document(file_path, text)
-        if not split_docs:
-            raise Exception("No content extracted from source")
-
-        logger.info(f"📄 Processed {len(split_docs)} chunks from source")
-
-        # 2. Store in Pinecone
         if not pinecone_index:
             raise Exception("Pinecone not initialized")
 
-        namespace = f"kb_{organization_id}"
-        vectors = []
-        
-        for i, doc in enumerate(split_docs):
-            # Generate ID
-            doc_hash = str(hash(doc.page_content))
-            vector_id = f"doc_{organization_id}_{doc_hash}_{i}"
-            
-            # Embed using LangChain (same as query)
-            emb = embeddings.embed_query(doc.page_content)
+        if url and not file_path and not text:
+            # Websites are synced page by page: re-adding a site only embeds pages that changed
+            from services.langchain.website_sync import sync_website
+            sync_result = await sync_website(user_id, organization_id, company_name, url, max_pages, progress)
+            if not sync_result["pages"]:
+                raise Exception("No content extracted from source")
+            namespace = sync_result["namespace"]
+            chunk_count = sync_result["chunks"]
+        else:
+            # 1. Load and Split
+            await _report(progress, 10, "Loading document")
+            split_docs = await load_and_split_document(file_path, text, url, max_pages)
+            if not split_docs:
+                raise Exception("No content extracted from source")
+
+            logger.info(f"📄 Processed {len(split_docs)} chunks from source")
+            await _report(progress, 40, f"Embedding {len(split_docs)} chunks")
+
+            # 2. Store in Pinecone
+            namespace = f"kb_{organization_id}"
+            chunk_count = len(split_docs)
+            # Files are tracked by path (re-uploads replace changed chunks); pasted text by its content
+            source = file_path or f"text:{hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]}"
+            records = []
             
-            # Metadata
-            vectors.append({
-                "id": vector_id,
-                "values": emb,
-                "metadata": {
-                    "user_id": user_id,
-                    "organization_id": organization_id,
-                    "company_name": company_name,
-                    "chunk_type": "document",
-                    "title": doc.metadata.get("title", "Document Segment"),
-                    "source": doc.metadata.get("source", "unknown"),
-                    "content": doc.page_content[:2000],
-                    "use_for": "general_knowledge"
-                }
-            })
+            for doc in split_docs:
+                records.append({
+                    "id": chunk_id(f"doc_{organization_id}", source, doc.page_content),
+                    "text": doc.page_content,
+                    "metadata": {
+                        "user_id": user_id,
+                        "organization_id": organization_id,
+                        "company_name": company_name,
+                        "chunk_type": "document",
+                        "title": doc.metadata.get("title", "Document Segment"),
+                        "source": doc.metadata.get("source", "unknown"),
+                        "content": doc.page_content[:2000],
+                        "use_for": "general_knowledge"
+                    }
+                })
             
-            # Batch upsert if too large (Pinecone limit is usually 100-1000)
-            if len(vectors) >= 100:
-                pinecone_index.upsert(vectors=vectors, namespace=namespace)
-                vectors = []
-        
-        # Upsert remaining
-        if vectors:
-            pinecone_index.upsert(vectors=vectors, namespace=namespace)
+            # Token-budgeted embedding batches for the changed chunks only, upserted in parallel
+            sync_result = await sync_source(records, namespace, source, embeddings)
+            if sync_result["added"] or sync_result["deleted"]:
+                await ainvalidate_answer_cache(namespace)
 
         # 3. Update MongoDB Knowledge Base
+        await _report(progress, 90, "Updating knowledge base")
         kb = knowledge_bases.find_one({"userId": user_id, "organizationId": organization_id})
         
         source_entry = {
-            "type": "document" if file_path else "manual",
+            "type": "document" if file_path else "website" if url else "manual",
             "filePath": file_path,
+            "url": url,
             "processedAt": datetime.now(),
-            "chunkCount": len(split_docs)
+            "chunkCount": chunk_count
         }
         
         if kb:
@@ -680,8 +711,9 @@ async def add_document_to_knowledge_base(
                 "createdAt": datetime.now(),
                 "updatedAt": datetime.now()
             })
+        invalidate_knowledge_base(user_id)
             
-        return {"status": "success", "chunks": len(split_docs), "namespace": namespace}
+        return {"status": "success", "chunks": chunk_count, **sync_result, "namespace": namespace}
     
     except Exception as e:
         logger.error(f"❌ Error adding document to KB: {e}")
@@ -691,13 +723,15 @@ async def build_knowledge_base_auto(
     user_id: str,
     organization_id: str,
     company_name: str,
-    website: Optional[str] = None
+    website: Optional[str] = None,
+    progress: Optional[ProgressCallback] = None
 ) -> Dict[str, Any]:
     """Enhanced auto-build using OpenAI web search (no BeautifulSoup scraping)"""
     try:
         logger.info(f"🚀 Building knowledge base for {company_name} using OpenAI Web Search")
         
         # 1. USE OPENAI WEB SEARCH TO GATHER ALL COMPANY INFO
+        await _report(progress, 5, "Searching the web for company information")
         search_data = await search_company_with_openai(company_name, website)
         combined_content = search_data.get("combined_content", "")
         search_results = search_data.get("search_results", [])
@@ -721,6 +755,7 @@ async def build_knowledge_base_auto(
         logger.info(f"📊 Processing as: {business_type} in {industry} industry")
         
         # 2. Extract Structure with GPT-4o (business-aware)
+        await _report(progress, 50, "Extracting structured data")
         structured = await extract_structured_data(combined_content, company_name, website, business_type, industry)
         
         # 3. DETECT GAPS & COMPLETENESS SCORE
@@ -732,7 +767,10 @@ async def build_knowledge_base_auto(
         logger.info(f"📦 Created {len(chunks)} chatbot chunks")
         
         # 7. Store in Vector DB
+        await _report(progress, 80, f"Embedding {len(chunks)} chunks")
         namespace = await store_chunks_in_vector_db(chunks, user_id, organization_id, company_name)
+        if not namespace:
+            raise Exception("Pinecone not initialized")
         
         # 7. Save/Update MongoDB with enhanced metadata
         kb_data = {
@@ -769,6 +807,7 @@ async def build_knowledge_base_auto(
             {"$set": kb_data},
             upsert=True
         )
+        invalidate_knowledge_base(user_id)
         
         return knowledge_bases.find_one({"userId": user_id, "organizationId": organization_id})
 
@@ -798,8 +837,8 @@ async def query_vector_db(query: str, organization_id: str, top_k: int = 5) -> L
     if not pinecone_index: return []
     try:
         namespace = f"kb_{organization_id}"
-        # Use LangChain embeddings (same as query in engine.py)
-        emb = embeddings.embed_query(query)
+        # Same cached embedding service as the engine; doesn't block the event loop
+        emb = await embeddings.aembed_query(query)
         
         results = pinecone_index.query(
             vector=emb,
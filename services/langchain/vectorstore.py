@@ -6,11 +6,12 @@ from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 import openai
 from services.database import get_organization_by_api_key
+from services.langchain.ingestion import chunk_id, sync_source
+import asyncio
+import hashlib
 import datetime
-import uuid
 import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
+from services.crawler import crawl_website
 
 def initialize_vectorstore(embeddings, api_key=None):
     """Initialize the Pinecone vector store with optional organization namespace"""
@@ -62,12 +63,22 @@ def initialize_vectorstore(embeddings, api_key=None):
         # Fallback mechanism
         return pc, index_name, None, namespace
 
-def add_document_to_vectorstore(vectorstore, pc, index_name, embeddings, api_key=None, file_path=None, url=None, text=None):
-    """Add documents to the vectorstore from different sources with organization namespacing"""
+def add_document_to_vectorstore(vectorstore, pc, index_name, embeddings, api_key=None, file_path=None, url=None, text=None, loop=None, source=None):
+    """
+    Add documents to the vectorstore from different sources with organization namespacing
+    
+    Runs in a worker thread; `loop` is the app's event loop, which the embedding and
+    upsert coroutines are scheduled on.
+    
+    `source` is the stable key of the document (e.g. "file:<uploaded name>"). Uploading
+    the same source again only embeds its new chunks and deletes the ones that are gone.
+    Defaults to the file name, the URL, or the content hash of pasted text.
+    """
     documents = []
     
     # Get organization namespace if API key is provided
     namespace = None
+    organization = None
     organization_id = None
     
     if api_key:
@@ -77,6 +88,14 @@ def add_document_to_vectorstore(vectorstore, pc, index_name, embeddings, api_key
             organization_id = organization.get('id')
             print(f"Using organization namespace: {namespace}")
     
+    if source is None:
+        if file_path:
+            source = f"file:{os.path.basename(file_path)}"
+        elif url:
+            source = f"url:{url}"
+        else:
+            source = f"text:{hashlib.sha256((text or '').encode('utf-8')).hexdigest()[:16]}"
+    
     # Debug outputs - check that all required parameters are provided
     print(f"OpenAI API Key (truncated): {os.getenv('OPENAI_API_KEY')[:10]}...")
     print(f"Pinecone API Key (truncated): {os.getenv('PINECONE_API_KEY')[:10]}...")
@@ -260,59 +279,73 @@ def add_document_to_vectorstore(vectorstore, pc, index_name, embeddings, api_key
                         traceback.print_exc()
                         return {"status": "error", "message": error_msg}
                 
-                # Process each document manually
-                successful_uploads = 0
+                # Embed and upsert in token-budgeted batches: one embeddings call and
+                # parallel bulk upserts per batch instead of one round trip per chunk
                 document_details = []
+                source_type = "file" if file_path else "url" if url else "text"
+                source_path = file_path if file_path else url if url else None
                 
-                for i, doc in enumerate(splits):
-                    try:
-                        # Get the document text
-                        doc_text = doc.page_content
-                        
-                        # Create an ID for this document
-                        doc_id = f"doc_{i}_{abs(hash(doc_text)) % 10000}"
-                        
-                        # Add organization ID to metadata if available
-                        metadata = doc.metadata if hasattr(doc, 'metadata') else {}
-                        if api_key:
-                            organization = get_organization_by_api_key(api_key)
-                            if organization:
-                                metadata['organization_id'] = organization.get('id')
-                        
-                        # Store directly in Pinecone
-                        print(f"Adding document {i+1}/{len(splits)} to namespace: {namespace}")
-                        vectorstore.add_texts(
-                            texts=[doc_text],
-                            ids=[doc_id],
-                            metadatas=[metadata],
-                            namespace=namespace  # Explicitly set namespace here too
-                        )
-                        
-                        # Track successful uploads
-                        successful_uploads += 1
-                        
-                        # Save document details for database tracking
-                        document_details.append({
-                            "document_id": doc_id,
-                            "content_preview": doc_text[:200] + "..." if len(doc_text) > 200 else doc_text,
-                            "source_type": "file" if file_path else "url" if url else "text",
-                            "source_path": file_path if file_path else url if url else None,
-                            "vector_id": doc_id,
-                            "namespace": namespace,
-                            "metadata": metadata,
-                            "created_at": datetime.datetime.utcnow()
-                        })
-                        
-                    except Exception as e:
-                        print(f"Error uploading document {i}: {str(e)}")
+                texts = [doc.page_content for doc in splits]
+                # Content-addressed IDs; "upload_" keeps them apart from the legacy doc_* IDs
+                ids = [chunk_id("upload", source, doc_text) for doc_text in texts]
+                metadatas = []
+                for doc in splits:
+                    metadata = doc.metadata if hasattr(doc, 'metadata') else {}
+                    # Tenant metadata was resolved once above
+                    if organization_id:
+                        metadata['organization_id'] = organization_id
+                    metadatas.append(metadata)
+                
+                # PineconeVectorStore reads the chunk text back from the "text" metadata key
+                records = [
+                    {"id": ids[i], "text": texts[i], "metadata": {**metadatas[i], "text": texts[i]}}
+                    for i in range(len(texts))
+                ]
+                print(f"Syncing {len(records)} chunks of {source} to namespace: {namespace}")
+                # Embeds only chunks missing from the source's manifest and deletes removed
+                # ones. Raises if any batch fails. No legacy_prefix: the position-based
+                # doc_{i}_* IDs of the old upload path are shared by every document in the
+                # namespace, so they cannot be retired per source and are left in place.
+                sync_result = _run_ingestion(
+                    sync_source(records, namespace, source, embeddings, index_name), loop
+                )
+                successful_uploads = sync_result["added"] + sync_result["unchanged"]
+                
+                # Save document details for database tracking
+                seen_ids = set()
+                for i, doc_text in enumerate(texts):
+                    if ids[i] in seen_ids:
+                        continue
+                    seen_ids.add(ids[i])
+                    document_details.append({
+                        "document_id": ids[i],
+                        "content_preview": doc_text[:200] + "..." if len(doc_text) > 200 else doc_text,
+                        "source_type": source_type,
+                        "source_path": source_path,
+                        "vector_id": ids[i],
+                        "namespace": namespace,
+                        "metadata": metadatas[i],
+                        "created_at": datetime.datetime.utcnow()
+                    })
+                
+                # Cached answers may now be stale: they are keyed by the namespace the
+                # chat engine queries (the knowledge base's), not the upload namespace
+                if sync_result["added"] or sync_result["deleted"]:
+                    from services.langchain.answer_cache import invalidate_answer_cache
+                    from services.org_resolver import chat_namespace, resolve_knowledge_base_sync
+                    invalidate_answer_cache(namespace)
+                    if organization:
+                        engine_namespace = chat_namespace(resolve_knowledge_base_sync(organization.get("user_id")))
+                        if engine_namespace != namespace:
+                            invalidate_answer_cache(engine_namespace)
                 
                 # Track documents in the database if organization is available
                 if organization_id and successful_uploads > 0:
                     try:
                         from services.database import add_organization_document
                         
-                        # File-level document record
-                        main_doc_id = f"doc_main_{uuid.uuid4().hex[:8]}"
+                        # File-level document record, one per source (re-uploads update it)
+                        main_doc_id = f"doc_main_{hashlib.sha256(source.encode('utf-8')).hexdigest()[:16]}"
                         source_name = os.path.basename(file_path) if file_path else url if url else "Text input"
                         
                         # Add main document record
@@ -340,11 +373,14 @@ def add_document_to_vectorstore(vectorstore, pc, index_name, embeddings, api_key
                     except Exception as e:
                         print(f"Warning: Test query after document upload failed: {str(e)}")
                 
-                print(f"Successfully added {successful_uploads} documents to the vector store")
+                print(f"Successfully stored {successful_uploads} documents in the vector store")
                 return {
                     "status": "success", 
-                    "message": f"Added {successful_uploads} document chunks to knowledge base",
-                    "documents_added": successful_uploads
+                    "message": (f"Stored {successful_uploads} document chunks in knowledge base "
+                                f"({sync_result['added']} new, {sync_result['deleted']} removed)"),
+                    "documents_added": sync_result["added"],
+                    "documents_unchanged": sync_result["unchanged"],
+                    "documents_removed": sync_result["deleted"]
                 }
             except Exception as e:
                 print(f"Error adding documents to vector store: {str(e)}")
@@ -355,10 +391,43 @@ def add_document_to_vectorstore(vectorstore, pc, index_name, embeddings, api_key
         print(f"Error processing documents: {str(e)}")
         return {"status": "error", "message": str(e)}
 
+def _run_ingestion(coro, loop=None):
+    """
+    Run an ingestion coroutine from a worker thread and return its result.
+    
+    Motor and the asyncio Pinecone handles belong to the app's event loop, so the
+    coroutine is scheduled there when `loop` is given; standalone callers (scripts)
+    get a private loop.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    else:
+        coro.close()
+        # Waiting here would deadlock (or stall) the event loop
+        raise RuntimeError("add_document_to_vectorstore cannot run on the event loop; call it from a worker thread")
+    
+    if loop is not None:
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+    return asyncio.run(coro)
+
+def pages_to_documents(pages):
+    """Turn crawler pages into Documents (pages answered 304 carry no content)"""
+    return [
+        Document(page_content=page["text"], metadata={"source": page["url"], "title": page["title"]})
+        for page in pages
+        if not page.get("not_modified") and page.get("text")
+    ]
+
 def scrape_website_content(base_url, max_pages=10):
     """
     Scrape content from a website, following internal links up to max_pages
     
+    Sync wrapper around services.crawler.crawl_website (concurrent, honours
+    robots.txt and sitemaps) for code running in a worker thread; async callers
+    must await crawl_website directly.
+    
     Args:
         base_url: The starting URL to scrape
         max_pages: Maximum number of pages to scrape
@@ -368,86 +437,16 @@ def scrape_website_content(base_url, max_pages=10):
     """
     print(f"Starting comprehensive scraping of {base_url} (max {max_pages} pages)")
     
-    # Track visited URLs to avoid duplicates
-    visited_urls = set()
-    to_visit = [base_url]
-    documents = []
-    count = 0
-    
-    # Parse the base domain to stay within the same website
-    base_domain = urlparse(base_url).netloc
-    
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    }
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    else:
+        # Blocking here would stall the event loop for the whole crawl
+        raise RuntimeError("scrape_website_content cannot run on the event loop; await crawl_website instead")
     
-    while to_visit and count < max_pages:
-        # Get the next URL to visit
-        current_url = to_visit.pop(0)
-        
-        # Skip if already visited
-        if current_url in visited_urls:
-            continue
-            
-        print(f"Scraping page {count+1}/{max_pages}: {current_url}")
-        
-        try:
-            # Fetch the page
-            response = requests.get(current_url, headers=headers, timeout=10)
-            response.raise_for_status()
-            
-            # Mark as visited
-            visited_urls.add(current_url)
-            count += 1
-            
-            # Parse the page
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Extract text content
-            # Remove script and style elements
-            for script in soup(["script", "style", "nav", "footer", "header"]):
-                script.decompose()
-                
-            # Get the main content (prioritize main, article, or div with content)
-            main_content = soup.find("main") or soup.find("article") or soup.find("div", class_=lambda c: c and ("content" in c.lower() or "main" in c.lower()))
-            
-            if main_content:
-                text = main_content.get_text(separator="\n", strip=True)
-            else:
-                # Fallback to body if no main content identified
-                text = soup.get_text(separator="\n", strip=True)
-            
-            # Clean up text (remove excessive newlines)
-            text = "\n".join(line.strip() for line in text.split("\n") if line.strip())
-            
-            # Create metadata
-            metadata = {
-                "source": current_url,
-                "title": soup.title.string if soup.title else current_url,
-            }
-            
-            # Add to documents
-            documents.append(Document(page_content=text, metadata=metadata))
-            
-            # Find links to other pages on the same domain
-            if count < max_pages:
-                links = soup.find_all("a", href=True)
-                for link in links:
-                    href = link["href"]
-                    
-                    # Resolve relative URLs
-                    full_url = urljoin(current_url, href)
-                    
-                    # Check if the URL is on the same domain and not already visited
-                    parsed_url = urlparse(full_url)
-                    if (parsed_url.netloc == base_domain or not parsed_url.netloc) and \
-                       full_url not in visited_urls and \
-                       full_url not in to_visit and \
-                       not full_url.endswith(('.pdf', '.jpg', '.png', '.gif')):
-                        to_visit.append(full_url)
-        
-        except Exception as e:
-            print(f"Error scraping {current_url}: {str(e)}")
+    pages = asyncio.run(crawl_website(base_url, max_pages))
     
-    print(f"Completed scraping {count} pages, extracted {len(documents)} documents")
-    return documents 
\ No newline at end of file
+    documents = pages_to_documents(pages)
+    print(f"Completed scraping {len(pages)} pages, extracted {len(documents)} documents")
+    return documents
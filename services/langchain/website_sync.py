@@ -0,0 +1,249 @@
+"""
+Incremental website re-sync for knowledge bases.
+
+Every crawled page gets a fingerprint in the `website_pages` collection
+(ETag / Last-Modified, SHA-256 of its extracted text, its links, crawl times).
+A re-sync:
+
+- sends the stored validators, so unchanged pages usually answer 304 and are
+  neither downloaded nor parsed;
+- skips pages whose text hash did not change;
+- re-chunks changed/new pages and hands them to sync_source() with the page
+  URL as source, so only chunks that actually changed are embedded;
+- deletes the vectors of pages that are gone: 404/410, or no longer linked
+  once the crawl visited every page it could reach without a single failed
+  fetch. Pages that time out or return 5xx are kept as they are.
+
+Knowledge bases can opt into a recurring sync (knowledge_bases.websiteSync);
+run_website_sync_scheduler() queues a `kb_website_sync` job for each one
+that is due.
+"""
+
+import os
+import asyncio
+import hashlib
+import datetime
+from typing import Any, Dict, Optional
+
+from pymongo import ReturnDocument
+
+from services.crawler import WebsiteCrawler
+from services.database import async_db
+from services.jobs import job_queue
+from services.langchain.answer_cache import ainvalidate_answer_cache
+from services.langchain.ingestion import chunk_id, clear_manifests, normalize_chunk_text, sync_source
+from services.langchain.knowledge_base import ProgressCallback, embeddings, get_text_splitter
+
+WEBSITE_SYNC_MAX_PAGES = int(os.getenv("WEBSITE_SYNC_MAX_PAGES", "50"))
+WEBSITE_SYNC_INTERVAL_HOURS = float(os.getenv("WEBSITE_SYNC_INTERVAL_HOURS", "24"))
+# Changed pages whose chunks are diffed/embedded at the same time
+WEBSITE_SYNC_CONCURRENCY = int(os.getenv("WEBSITE_SYNC_CONCURRENCY", "4"))
+WEBSITE_SYNC_SCHEDULER_SECONDS = int(os.getenv("WEBSITE_SYNC_SCHEDULER_SECONDS", "300"))
+
+
+def page_fingerprint(text: str) -> str:
+    return hashlib.sha256(normalize_chunk_text(text).encode("utf-8")).hexdigest()
+
+
+async def sync_website(
+    user_id: str,
+    organization_id: str,
+    company_name: str,
+    website: str,
+    max_pages: int = WEBSITE_SYNC_MAX_PAGES,
+    progress: Optional[ProgressCallback] = None
+) -> Dict[str, Any]:
+    """
+    Bring the kb_{organization_id} namespace in line with the website,
+    embedding only new/changed chunks. Returns page and chunk counts.
+    """
+    namespace = f"kb_{organization_id}"
+    pages_collection = async_db.website_pages
+    crawler = WebsiteCrawler(website, max_pages)
+    site = crawler.base_url
+
+    stored = {
+        page["url"]: page
+        async for page in pages_collection.find({"namespace": namespace, "site": site})
+    }
+    if not stored:
+        # First incremental sync: retire vectors of an earlier whole-site upload of this URL
+        for legacy_source in {website, site}:
+            if await async_db.vector_manifests.find_one({"namespace": namespace, "source": legacy_source}):
+                await sync_source([], namespace, legacy_source)
+                await clear_manifests(namespace, legacy_source)
+
+    crawler.validators = {
+        url: {"etag": page.get("etag"), "last_modified": page.get("last_modified"), "links": page.get("links", [])}
+        for url, page in stored.items()
+    }
+    if progress:
+        await progress(10, f"Crawling {site}")
+    pages = await crawler.crawl()
+    if progress:
+        await progress(50, f"Checking {len(pages)} pages for changes")
+
+    now = datetime.datetime.utcnow()
+    splitter = get_text_splitter()
+    slots = asyncio.Semaphore(WEBSITE_SYNC_CONCURRENCY)
+    counts = {"new": 0, "changed": 0, "unchanged": 0, "removed": 0,
+              "chunks_added": 0, "chunks_unchanged": 0, "chunks_deleted": 0}
+    chunk_counts = {url: page.get("chunk_count", 0) for url, page in stored.items()}
+
+    async def save(url: str, fields: Dict[str, Any]):
+        await pages_collection.update_one(
+            {"namespace": namespace, "site": site, "url": url},
+            {"$set": {**fields, "last_crawled_at": now}, "$setOnInsert": {"created_at": now}},
+            upsert=True
+        )
+
+    async def sync_page(page: Dict[str, Any]):
+        url = page["url"]
+        previous = stored.get(url)
+        validators = {"etag": page.get("etag"), "last_modified": page.get("last_modified"), "links": page.get("links", [])}
+
+        if page.get("not_modified"):
+            counts["unchanged"] += 1
+            await save(url, validators)
+            return
+
+        content_hash = page_fingerprint(page["text"])
+        if previous and previous.get("content_hash") == content_hash:
+            counts["unchanged"] += 1
+            await save(url, validators)
+            return
+
+        records = [
+            {
+                "id": chunk_id(f"doc_{organization_id}", url, text),
+                "text": text,
+                "metadata": {
+                    "user_id": user_id,
+                    "organization_id": organization_id,
+                    "company_name": company_name,
+                    "chunk_type": "document",
+                    "title": page.get("title") or url,
+                    "source": url,
+                    "content": text[:2000],
+                    "use_for": "general_knowledge"
+                }
+            }
+            for text in splitter.split_text(page["text"])
+        ]
+        async with slots:
+            result = await sync_source(records, namespace, url, embeddings)
+        counts["changed" if previous else "new"] += 1
+        counts["chunks_added"] += result["added"]
+        counts["chunks_unchanged"] += result["unchanged"]
+        counts["chunks_deleted"] += result["deleted"]
+        chunk_counts[url] = len(records)
+        await save(url, {**validators, "title": page.get("title"), "content_hash": content_hash,
+                         "chunk_count": len(records), "last_changed_at": now})
+
+    await asyncio.gather(*(sync_page(page) for page in pages))
+
+    # Only trust "not seen" when the crawl reached everything without errors (a failed
+    # page hides whatever is only linked from it); an empty crawl means the site was down
+    crawled = {page["url"] for page in pages}
+    gone = [
+        url for url in stored
+        if url not in crawled and url not in crawler.failed
+        and (url in crawler.gone or (crawler.complete and pages))
+    ]
+    for url in gone:
+        result = await sync_source([], namespace, url)
+        await clear_manifests(namespace, url)
+        await pages_collection.delete_one({"namespace": namespace, "site": site, "url": url})
+        counts["removed"] += 1
+        chunk_counts.pop(url, None)
+        counts["chunks_deleted"] += result["deleted"]
+
+    if counts["chunks_added"] or counts["chunks_deleted"]:
+        await ainvalidate_answer_cache(namespace)
+
+    result = {"site": site, "namespace": namespace, "pages": len(pages),
+              "chunks": sum(chunk_counts.values()), **counts}
+    await async_db.knowledge_bases.update_one(
+        {"userId": user_id, "organizationId": organization_id},
+        {"$set": {"websiteSync.lastRun": {**result, "finishedAt": datetime.datetime.utcnow()},
+                  "vectorStoreId": namespace, "updatedAt": datetime.datetime.now()}}
+    )
+    print(f"[WEBSITE SYNC] {site} -> {namespace}: {counts['new']} new, {counts['changed']} changed, "
+          f"{counts['unchanged']} unchanged, {counts['removed']} removed pages; "
+          f"{counts['chunks_added']} chunks embedded, {counts['chunks_deleted']} deleted")
+    return result
+
+
+async def clear_website_pages(namespace: str):
+    """Forget page fingerprints after the namespace was emptied outside sync_website"""
+    await async_db.website_pages.delete_many({"namespace": namespace})
+
+
+# ==========================================
+# SCHEDULED SYNCS
+# ==========================================
+
+async def set_website_sync_schedule(
+    user_id: str,
+    organization_id: str,
+    enabled: bool,
+    url: Optional[str],
+    max_pages: int = WEBSITE_SYNC_MAX_PAGES,
+    interval_hours: float = WEBSITE_SYNC_INTERVAL_HOURS
+) -> Dict[str, Any]:
+    """Store a knowledge base's recurring sync; an enabled sync first runs on the next scheduler pass"""
+    schedule = {
+        "websiteSync.enabled": enabled,
+        "websiteSync.url": url,
+        "websiteSync.maxPages": max_pages,
+        "websiteSync.intervalHours": interval_hours,
+        "websiteSync.nextRunAt": datetime.datetime.utcnow()
+    }
+    await async_db.knowledge_bases.update_one(
+        {"userId": user_id, "organizationId": organization_id},
+        {"$set": schedule}
+    )
+    return {
+        key.split(".", 1)[1]: value.isoformat() if isinstance(value, datetime.datetime) else value
+        for key, value in schedule.items()
+    }
+
+
+async def queue_due_website_syncs() -> int:
+    """Queue a kb_website_sync job for every knowledge base whose sync is due"""
+    queued = 0
+    while True:
+        now = datetime.datetime.utcnow()
+        # Claim by pushing nextRunAt forward, so concurrent schedulers never queue the same sync twice
+        kb = await async_db.knowledge_bases.find_one_and_update(
+            {"websiteSync.enabled": True, "websiteSync.nextRunAt": {"$lte": now}, "status": {"$ne": "archived"}},
+            [{"$set": {"websiteSync.nextRunAt": {"$add": [
+                now, {"$multiply": [{"$ifNull": ["$websiteSync.intervalHours", WEBSITE_SYNC_INTERVAL_HOURS]}, 3600000]}
+            ]}}}],
+            return_document=ReturnDocument.AFTER
+        )
+        if kb is None:
+            return queued
+        schedule = kb["websiteSync"]
+        await job_queue.enqueue("kb_website_sync", kb["organizationId"], {
+            "user_id": kb["userId"],
+            "company_name": kb.get("companyName", "Unknown Company"),
+            "url": schedule["url"],
+            "max_pages": schedule.get("maxPages", WEBSITE_SYNC_MAX_PAGES),
+            "scheduled": True
+        }, max_attempts=1)
+        queued += 1
+
+
+async def run_website_sync_scheduler(interval_seconds: int = WEBSITE_SYNC_SCHEDULER_SECONDS):
+    """Periodically queue due website syncs"""
+    while True:
+        try:
+            queued = await queue_due_website_syncs()
+            if queued:
+                print(f"[WEBSITE SYNC] Queued {queued} scheduled website syncs")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[WEBSITE SYNC] ⚠️ Scheduler error: {e}")
+        await asyncio.sleep(interval_seconds)
@@ -5,13 +5,14 @@ Provides advanced conversation handling with knowledge base integration and web
 
 from .graph import app, create_graph
 from .memory import SessionMemory
-from .rag import search_kb, get_relevant_sources
+from .rag import retrieve, search_kb, get_relevant_sources
 from .web_search import search_web, get_web_sources
 
 __all__ = [
     'app',
     'create_graph',
     'SessionMemory',
+    'retrieve',
     'search_kb',
     'get_relevant_sources',
     'search_web',
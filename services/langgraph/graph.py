@@ -6,10 +6,17 @@ Improvements over V2:
 3. Better conversation context management
 4. MongoDB-backed memory with caching
 5. OFF-TOPIC DETECTION AND SMART REDIRECT ✅ NEW
+6. Async nodes with parallel fan-out: intent detection runs alongside the whole
+   retrieval step (query rewriting and a speculative KB retrieval on the original
+   question, concurrently, then the final retrieval)
+
+Nodes return partial state updates so parallel branches never overwrite each
+other. Run the graph with `await app.ainvoke(state)`.
 """
 
 from typing import TypedDict, List, Optional
 import os
+import asyncio
 
 # LangSmith Configuration - Monitoring and tracing enabled
 os.environ["LANGCHAIN_TRACING_V2"] = os.getenv("LANGCHAIN_TRACING_V2", "true")
@@ -23,20 +30,20 @@ from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 
 from .llm import llm
-from .rag import search_kb, get_relevant_sources
+from .rag import aretrieve
 from .web_search import search_web, get_web_sources
 from .quick_responses import get_quick_response, needs_quick_response
 from .prompts import MAIN_SYSTEM_PROMPT, FALLBACK_MESSAGE, CONVERSATION_AWARE_PROMPT
-from .query_rewriter import rewrite_query, should_rewrite_query
+from .query_rewriter import arewrite_query, should_rewrite_query
 from .summarizer import get_summarized_context, format_context_with_summary
 from .off_topic_handler import (
-    detect_off_topic,
+    adetect_off_topic,
     generate_redirect_response,
     should_check_off_topic,
     is_greeting
 )
 # 🆕 Import new modules for lead collection
-from .intent_detector import detect_intent, get_intent_specific_guidance, UserIntent
+from .intent_detector import adetect_intent, get_intent_specific_guidance, UserIntent
 from .conversation_state import analyze_conversation_state, ConversationStage
 from .entity_extractor import extract_contact_info, get_missing_contact_fields
 
@@ -96,55 +103,57 @@ class ChatState(TypedDict):
     collected_contact: dict  # Collected contact info: {name, phone, email}
     needs_callback: bool  # Whether user requested callback
     contact_confirmed: bool  # Whether contact info was confirmed
+    # Speculative retrieval on the original question (runs while the rewrite is pending)
+    prefetch_query: str
+    prefetch_context: str
+    prefetch_sources: List[dict]
 
 # ---------- Nodes ----------
 
 def classify_node(state: ChatState):
     """
-    Classify the question, detect intent, extract contact info, and handle quick responses.
+    Rule-based classification: conversation stage, contact extraction and quick responses.
+    LLM work (intent, rewrite) runs afterwards in parallel.
     🆕 Now includes lead collection capabilities!
     """
     print(f"\n[LANGGRAPH] === CLASSIFY NODE ===")
     print(f"[LANGGRAPH] Question: {state['question']}")
 
     # Store original question
-    state["original_question"] = state["question"]
-    state["is_off_topic"] = False
-    state["off_topic_redirect"] = False
-
-    # 🆕 Detect user intent
-    intent, confidence = detect_intent(state["question"], state.get("chat_history", []))
-    state["detected_intent"] = intent.value
-    print(f"[LANGGRAPH] 🎯 Detected intent: {intent.value} (confidence: {confidence:.2f})")
+    update = {
+        "original_question": state["question"],
+        "is_off_topic": False,
+        "off_topic_redirect": False,
+    }
 
     # 🆕 Analyze conversation state
     conv_state = analyze_conversation_state(state.get("chat_history", []), state["question"])
-    state["conversation_stage"] = conv_state.stage.value
-    state["needs_callback"] = conv_state.needs_callback
-    state["contact_confirmed"] = conv_state.callback_confirmed
+    update["conversation_stage"] = conv_state.stage.value
+    update["needs_callback"] = conv_state.needs_callback
+    update["contact_confirmed"] = conv_state.callback_confirmed
     print(f"[LANGGRAPH] 📊 Conversation stage: {conv_state.stage.value}")
 
     # 🆕 Extract contact information automatically
     extracted_info = extract_contact_info(state["question"], state.get("chat_history", []))
 
     # Initialize or update collected contact info
-    if "collected_contact" not in state or state["collected_contact"] is None:
-        state["collected_contact"] = {"name": None, "phone": None, "email": None}
+    collected_contact = dict(state.get("collected_contact") or {"name": None, "phone": None, "email": None})
 
     # Update with any newly extracted info
     if extracted_info["name"]:
-        state["collected_contact"]["name"] = extracted_info["name"]
+        collected_contact["name"] = extracted_info["name"]
         print(f"[LANGGRAPH] 👤 Extracted name: {extracted_info['name']}")
     if extracted_info["phone"]:
-        state["collected_contact"]["phone"] = extracted_info["phone"]
+        collected_contact["phone"] = extracted_info["phone"]
         print(f"[LANGGRAPH] 📞 Extracted phone: {extracted_info['phone']}")
     if extracted_info["email"]:
-        state["collected_contact"]["email"] = extracted_info["email"]
+        collected_contact["email"] = extracted_info["email"]
         print(f"[LANGGRAPH] 📧 Extracted email: {extracted_info['email']}")
+    update["collected_contact"] = collected_contact
 
     # Show what contact info we still need
-    if state["needs_callback"]:
-        missing_fields = get_missing_contact_fields(state["collected_contact"], required_fields=['name', 'phone'])
+    if update["needs_callback"]:
+        missing_fields = get_missing_contact_fields(collected_contact, required_fields=['name', 'phone'])
         if missing_fields:
             print(f"[LANGGRAPH] ⚠️ Missing contact info: {', '.join(missing_fields)}")
         else:
@@ -160,22 +169,28 @@ def classify_node(state: ChatState):
 
     if quick_answer:
         print(f"[LANGGRAPH] ✓ Quick response detected")
-        state["answer"] = clean_response_formatting(quick_answer)
-        state["context"] = "Quick response - no search needed"
-        state["sources"] = []
-        state["skip_search"] = True
-        state["use_web_search"] = False
-        state["rewritten_query"] = False
+        update["answer"] = clean_response_formatting(quick_answer)
+        update["context"] = "Quick response - no search needed"
+        update["sources"] = []
+        update["skip_search"] = True
+        update["use_web_search"] = False
+        update["rewritten_query"] = False
     else:
         print(f"[LANGGRAPH] → Needs full processing")
-        state["skip_search"] = False
-        state["rewritten_query"] = False
+        update["skip_search"] = False
+        update["rewritten_query"] = False
 
-    return state
+    return update
 
-def rewrite_node(state: ChatState):
+async def intent_node(state: ChatState):
+    """🆕 Detect user intent (parallel branch, runs alongside retrieve_node)"""
+    intent, confidence = await adetect_intent(state["question"], state.get("chat_history", []))
+    print(f"[LANGGRAPH] 🎯 Detected intent: {intent.value} (confidence: {confidence:.2f})")
+    return {"detected_intent": intent.value}
+
+async def rewrite_node(state: ChatState):
     """
-    Rewrite query to be standalone using conversation context.
+    Rewrite query to be standalone using conversation context (concurrent with prefetch).
     This ensures vector search works correctly with pronouns and context-dependent queries.
     """
     print(f"\n[LANGGRAPH] === REWRITE NODE ===")
@@ -186,24 +201,46 @@ def rewrite_node(state: ChatState):
     # Check if rewriting is needed
     if should_rewrite_query(question, chat_history):
         print(f"[LANGGRAPH] Query needs rewriting")
-        rewritten = rewrite_query(question, chat_history)
+        rewritten = await arewrite_query(question, chat_history)
 
         if rewritten != question:
             print(f"[LANGGRAPH] Original: {question}")
             print(f"[LANGGRAPH] Rewritten: {rewritten}")
-            state["question"] = rewritten
-            state["rewritten_query"] = True
-        else:
-            print(f"[LANGGRAPH] No rewriting performed")
-            state["rewritten_query"] = False
+            return {"question": rewritten, "rewritten_query": True}
+        print(f"[LANGGRAPH] No rewriting performed")
     else:
         print(f"[LANGGRAPH] No rewriting needed")
-        state["rewritten_query"] = False
 
-    return state
+    return {"rewritten_query": False}
+
+async def prefetch_node(state: ChatState):
+    """
+    Speculative KB retrieval on the original question (concurrent with the rewrite).
+    retrieve_node reuses it whenever the rewrite leaves the question unchanged.
+    """
+    question = state["question"]
+    context, sources = await aretrieve(question, state["namespace"])
+    return {
+        "prefetch_query": question,
+        "prefetch_context": context,
+        "prefetch_sources": sources
+    }
+
+async def retrieve_node(state: ChatState):
+    """
+    Retrieve relevant context from knowledge base (parallel branch).
+
+    Rewrite and the speculative retrieval run concurrently inside this node rather
+    than as graph nodes: LangGraph only starts a superstep once every node of the
+    previous one is done, so as sibling nodes of detect_intent they would hold
+    retrieval back until the intent LLM call returned.
+    """
+    rewrite_update, prefetch_update = await asyncio.gather(rewrite_node(state), prefetch_node(state))
+    state = {**state, **rewrite_update, **prefetch_update}
+    return {**rewrite_update, **prefetch_update, **await _retrieve(state)}
 
-def retrieve_node(state: ChatState):
-    """Retrieve relevant context from knowledge base"""
+async def _retrieve(state: ChatState):
+    """Final KB retrieval (reusing the prefetch when possible) and off-topic / web search checks"""
     print(f"\n[LANGGRAPH] === RETRIEVE NODE ===")
     print(f"[LANGGRAPH] Session: {state['session_id']}")
     print(f"[LANGGRAPH] Question: {state['question']}")
@@ -213,13 +250,21 @@ def retrieve_node(state: ChatState):
     search_query = state["question"]
     print(f"[LANGGRAPH] Search query: {search_query}")
 
-    # Search knowledge base for relevant context
-    context = search_kb(search_query, state["namespace"])
-    state["context"] = context
+    if state.get("prefetch_query") == search_query:
+        # The speculative retrieval already ran on exactly this query
+        print(f"[LANGGRAPH] ♻️ Using prefetched retrieval")
+        context = state.get("prefetch_context", "")
+        sources = state.get("prefetch_sources", [])
+    else:
+        # Search knowledge base for relevant context and citation sources (one embedding + one query)
+        context, sources = await aretrieve(search_query, state["namespace"])
 
-    # Get sources for citations
-    sources = get_relevant_sources(search_query, state["namespace"])
-    state["sources"] = sources
+    update = {
+        "context": context,
+        "sources": sources,
+        "is_off_topic": False,
+        "off_topic_redirect": False,
+    }
 
     print(f"[LANGGRAPH] Context found: {len(context)} characters")
     print(f"[LANGGRAPH] Sources found: {len(sources)} sources")
@@ -231,7 +276,7 @@ def retrieve_node(state: ChatState):
     if should_check_off_topic(original_question, context, sources):
         print(f"[LANGGRAPH] ⚠️ Possible off-topic question, checking...")
 
-        is_off_topic, confidence = detect_off_topic(
+        is_off_topic, confidence = await adetect_off_topic(
             question=original_question,
             context=context if context else "",  # Pass empty string if no context
             company_name=state.get("company_name", "our company"),
@@ -242,45 +287,44 @@ def retrieve_node(state: ChatState):
 
         if is_off_topic and confidence > 0.7:
             print(f"[LANGGRAPH] 🚫 Off-topic detected (confidence: {confidence})")
-            state["is_off_topic"] = True
-            state["off_topic_redirect"] = True
+            update["is_off_topic"] = True
+            update["off_topic_redirect"] = True
             # Skip web search for off-topic
-            state["use_web_search"] = False
-            return state
+            update["use_web_search"] = False
+            return update
 
     # Determine if we need web search (only if on-topic and KB insufficient)
     if not context or len(context.strip()) < 50:
         print(f"[LANGGRAPH] ⚠️ Insufficient KB data - will use web search")
-        state["use_web_search"] = True
+        update["use_web_search"] = True
     else:
-        state["use_web_search"] = False
+        update["use_web_search"] = False
 
-    return state
+    return update
 
-def web_search_node(state: ChatState):
+async def web_search_node(state: ChatState):
     """Search the web when KB has no relevant data"""
     print(f"\n[LANGGRAPH] === WEB SEARCH NODE ===")
 
     # Use original question for web search (not rewritten)
     search_question = state.get("original_question", state["question"])
 
-    # Perform web search
-    web_answer = search_web(
+    # Perform web search (sync OpenAI client - keep it off the event loop)
+    web_answer = await asyncio.to_thread(
+        search_web,
         search_question,
         state.get("company_name", "our company"),
         state.get("chat_history", [])
     )
-    state["context"] = web_answer
 
     # Get web sources
     web_sources = get_web_sources(search_question)
-    state["sources"] = web_sources
 
     print(f"[LANGGRAPH] Web search completed")
 
-    return state
+    return {"context": web_answer, "sources": web_sources}
 
-def off_topic_redirect_node(state: ChatState):
+async def off_topic_redirect_node(state: ChatState):
     """
     ✅ NEW NODE: Generate smart redirect for off-topic questions
     """
@@ -289,27 +333,32 @@ def off_topic_redirect_node(state: ChatState):
     original_question = state.get("original_question", state["question"])
 
     # Generate redirect response
-    redirect_response = generate_redirect_response(
+    redirect_response = await asyncio.to_thread(
+        generate_redirect_response,
         question=original_question,
         context=state.get("context", ""),
         company_name=state.get("company_name", "our company"),
         chat_history=state.get("chat_history", [])
     )
 
-    # Clean up formatting for better user experience
-    state["answer"] = clean_response_formatting(redirect_response)
-    state["sources"] = []  # No sources for redirect
-
     print(f"[LANGGRAPH] Redirect response generated")
 
-    return state
+    # Clean up formatting for better user experience
+    return {
+        "answer": clean_response_formatting(redirect_response),
+        "sources": []  # No sources for redirect
+    }
 
-def should_skip_search(state: ChatState) -> str:
-    """Routing function after classification"""
+def should_skip_search(state: ChatState) -> List[str]:
+    """
+    Routing function after classification (fan-out).
+    Quick responses only need the intent; everything else runs intent detection
+    and retrieval in parallel.
+    """
     if state.get("skip_search", False):
-        return "end"  # Skip directly to end for quick responses
+        return ["detect_intent"]  # Quick responses skip search entirely
     else:
-        return "rewrite"  # Go to rewrite node first
+        return ["detect_intent", "retrieve"]
 
 def should_redirect_off_topic(state: ChatState) -> str:
     """
@@ -362,7 +411,7 @@ def format_chat_history_with_summary(
 
     return "\n".join(parts) if parts else "No previous conversation"
 
-def answer_node(state: ChatState):
+async def answer_node(state: ChatState):
     """
     Generate answer using LLM with context (KB + web search if available).
     🆕 Now includes dynamic guidance based on intent and contact collection status!
@@ -372,8 +421,7 @@ def answer_node(state: ChatState):
     # If no context at all
     if not state["context"]:
         print(f"[LANGGRAPH] No context available - using fallback")
-        state["answer"] = FALLBACK_MESSAGE
-        return state
+        return {"answer": FALLBACK_MESSAGE}
 
     # Note: At this point, context is either from KB or web search
     # The LLM will use whatever context is available to create a natural response
@@ -479,7 +527,7 @@ def answer_node(state: ChatState):
 
             chain = prompt | llm | StrOutputParser()
 
-            answer = chain.invoke({
+            answer = await chain.ainvoke({
                 "company_name": company_name,
                 "chat_history": history_text,
                 "question": response_question,
@@ -497,15 +545,15 @@ def answer_node(state: ChatState):
 
             chain = prompt | llm | StrOutputParser()
 
-            answer = chain.invoke({
+            answer = await chain.ainvoke({
                 "company_name": company_name,
                 "context": state["context"],
                 "question": response_question
             })
 
         # Clean up formatting - keep it natural
-        state["answer"] = clean_response_formatting(answer)
-        print(f"[LANGGRAPH] ✅ Answer generated: {len(state['answer'])} characters")
+        answer = clean_response_formatting(answer)
+        print(f"[LANGGRAPH] ✅ Answer generated: {len(answer)} characters")
 
         # 🆕 Log collected contact info if available
         if state.get("collected_contact"):
@@ -514,9 +562,9 @@ def answer_node(state: ChatState):
                 print(f"[LANGGRAPH] 📋 Lead Info - Name: {collected.get('name', 'N/A')}, Phone: {collected.get('phone', 'N/A')}, Email: {collected.get('email', 'N/A')}")
     except Exception as e:
         print(f"[LANGGRAPH] ❌ Error generating answer: {e}")
-        state["answer"] = FALLBACK_MESSAGE
+        answer = FALLBACK_MESSAGE
 
-    return state
+    return {"answer": answer}
 
 # ---------- Graph Construction ----------
 
@@ -526,7 +574,7 @@ def create_graph():
 
     # Add nodes
     graph.add_node("classify", classify_node)
-    graph.add_node("rewrite", rewrite_node)
+    graph.add_node("detect_intent", intent_node)
     graph.add_node("retrieve", retrieve_node)
     graph.add_node("off_topic_redirect", off_topic_redirect_node)  # ✅ NEW
     graph.add_node("web_search", web_search_node)
@@ -535,19 +583,16 @@ def create_graph():
     # Define flow with conditional routing
     graph.set_entry_point("classify")
 
-    # After classify: quick response (skip) or rewrite query
+    # After classify: fan out to the parallel branches (quick responses only detect intent
+    # and finish there). Retrieval never waits for the intent; the intent is joined where
+    # it is used: answer (and web_search/off_topic_redirect) run in a later superstep than
+    # detect_intent, so detected_intent is always in the state they see.
     graph.add_conditional_edges(
         "classify",
         should_skip_search,
-        {
-            "end": END,  # Quick responses skip to end
-            "rewrite": "rewrite"  # Rewrite query before retrieval
-        }
+        ["detect_intent", "retrieve"]
     )
 
-    # After rewrite, go to retrieve
-    graph.add_edge("rewrite", "retrieve")
-
     # ✅ NEW: After retrieve, check for off-topic, web search, or answer
     graph.add_conditional_edges(
         "retrieve",
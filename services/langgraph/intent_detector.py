@@ -63,18 +63,8 @@ greeting, question, callback_request, providing_info, confirmation, complaint, f
 INTENT:"""
 
 
-def detect_intent(message: str, chat_history: List[BaseMessage] = None) -> Tuple[UserIntent, float]:
-    """
-    Detect user's intent using LLM classification.
-
-    Args:
-        message: User's message
-        chat_history: Previous conversation messages for context
-
-    Returns:
-        Tuple of (UserIntent, confidence_score)
-    """
-    # Quick rule-based checks for common patterns (faster)
+def _quick_intent(message: str) -> Optional[Tuple[UserIntent, float]]:
+    """Rule-based checks for common patterns (no LLM call)"""
     message_lower = message.lower().strip()
 
     # Very short greetings
@@ -94,56 +84,83 @@ def detect_intent(message: str, chat_history: List[BaseMessage] = None) -> Tuple
     if any(keyword in message_lower for keyword in callback_keywords):
         return UserIntent.CALLBACK_REQUEST, 0.85
 
+    return None
+
+
+def _intent_chain_inputs(message: str, chat_history: List[BaseMessage] = None):
+    """Build the intent classification chain and its inputs"""
+    # Format chat history
+    history_text = ""
+    if chat_history and len(chat_history) > 0:
+        recent = chat_history[-4:]  # Last 2 turns
+        history_parts = []
+        for msg in recent:
+            if isinstance(msg, HumanMessage):
+                history_parts.append(f"User: {msg.content}")
+            elif isinstance(msg, AIMessage):
+                history_parts.append(f"Assistant: {msg.content}")
+        history_text = "\n".join(history_parts)
+    else:
+        history_text = "No previous conversation"
+
+    # Create prompt
+    prompt = ChatPromptTemplate.from_messages([
+        ("human", INTENT_DETECTION_PROMPT)
+    ])
+
+    # Create chain
+    chain = prompt | llm | StrOutputParser()
+
+    return chain, {
+        "message": message,
+        "chat_history": history_text
+    }
+
+
+def _parse_intent(result: str, message: str) -> Tuple[UserIntent, float]:
+    """Map the LLM output to a UserIntent"""
+    result = result.strip().lower()
+
+    # Map result to UserIntent
+    intent_map = {
+        'greeting': UserIntent.GREETING,
+        'question': UserIntent.QUESTION,
+        'callback_request': UserIntent.CALLBACK_REQUEST,
+        'providing_info': UserIntent.PROVIDING_INFO,
+        'confirmation': UserIntent.CONFIRMATION,
+        'complaint': UserIntent.COMPLAINT,
+        'farewell': UserIntent.FAREWELL,
+        'other': UserIntent.OTHER
+    }
+
+    detected_intent = intent_map.get(result, UserIntent.OTHER)
+    confidence = 0.8  # LLM-based detection confidence
+
+    print(f"[INTENT DETECTOR] Message: '{message[:50]}...' -> Intent: {detected_intent} (confidence: {confidence})")
+
+    return detected_intent, confidence
+
+
+def detect_intent(message: str, chat_history: List[BaseMessage] = None) -> Tuple[UserIntent, float]:
+    """
+    Detect user's intent using LLM classification.
+
+    Args:
+        message: User's message
+        chat_history: Previous conversation messages for context
+
+    Returns:
+        Tuple of (UserIntent, confidence_score)
+    """
+    # Quick rule-based checks for common patterns (faster)
+    quick = _quick_intent(message)
+    if quick:
+        return quick
+
     # Use LLM for more complex cases
     try:
-        # Format chat history
-        history_text = ""
-        if chat_history and len(chat_history) > 0:
-            recent = chat_history[-4:]  # Last 2 turns
-            history_parts = []
-            for msg in recent:
-                if isinstance(msg, HumanMessage):
-                    history_parts.append(f"User: {msg.content}")
-                elif isinstance(msg, AIMessage):
-                    history_parts.append(f"Assistant: {msg.content}")
-            history_text = "\n".join(history_parts)
-        else:
-            history_text = "No previous conversation"
-
-        # Create prompt
-        prompt = ChatPromptTemplate.from_messages([
-            ("human", INTENT_DETECTION_PROMPT)
-        ])
-
-        # Create chain
-        chain = prompt | llm | StrOutputParser()
-
-        # Detect intent
-        result = chain.invoke({
-            "message": message,
-            "chat_history": history_text
-        })
-
-        result = result.strip().lower()
-
-        # Map result to UserIntent
-        intent_map = {
-            'greeting': UserIntent.GREETING,
-            'question': UserIntent.QUESTION,
-            'callback_request': UserIntent.CALLBACK_REQUEST,
-            'providing_info': UserIntent.PROVIDING_INFO,
-            'confirmation': UserIntent.CONFIRMATION,
-            'complaint': UserIntent.COMPLAINT,
-            'farewell': UserIntent.FAREWELL,
-            'other': UserIntent.OTHER
-        }
-
-        detected_intent = intent_map.get(result, UserIntent.OTHER)
-        confidence = 0.8  # LLM-based detection confidence
-
-        print(f"[INTENT DETECTOR] Message: '{message[:50]}...' -> Intent: {detected_intent} (confidence: {confidence})")
-
-        return detected_intent, confidence
+        chain, inputs = _intent_chain_inputs(message, chat_history)
+        return _parse_intent(chain.invoke(inputs), message)
 
     except Exception as e:
         print(f"[INTENT DETECTOR] Error detecting intent: {str(e)}")
@@ -151,6 +168,21 @@ def detect_intent(message: str, chat_history: List[BaseMessage] = None) -> Tuple
         return UserIntent.OTHER, 0.5
 
 
+async def adetect_intent(message: str, chat_history: List[BaseMessage] = None) -> Tuple[UserIntent, float]:
+    """Async variant of detect_intent (does not block the event loop)"""
+    quick = _quick_intent(message)
+    if quick:
+        return quick
+
+    try:
+        chain, inputs = _intent_chain_inputs(message, chat_history)
+        return _parse_intent(await chain.ainvoke(inputs), message)
+
+    except Exception as e:
+        print(f"[INTENT DETECTOR] Error detecting intent: {str(e)}")
+        return UserIntent.OTHER, 0.5
+
+
 def get_intent_specific_guidance(intent: UserIntent) -> str:
     """
     Get specific guidance for the LLM based on detected intent.
@@ -1,4 +1,5 @@
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from langchain_openai import ChatOpenAI
+from services.embedding_service import get_embedding_service
 from .config import OPENAI_API_KEY, EMBEDDING_MODEL, LLM_MODEL, LLM_TEMPERATURE, LLM_MAX_TOKENS
 
 # Initialize LLM for chat generation
@@ -9,9 +10,5 @@ llm = ChatOpenAI(
     api_key=OPENAI_API_KEY
 )
 
-# Initialize embeddings for vector search
-embeddings = OpenAIEmbeddings(
-    model=EMBEDDING_MODEL,
-    dimensions=1024,
-    api_key=OPENAI_API_KEY
-)
+# Initialize embeddings for vector search (shared cached service)
+embeddings = get_embedding_service(EMBEDDING_MODEL, 1024)
@@ -4,14 +4,35 @@ Uses MongoDB as primary storage with in-memory caching for performance.
 """
 
 from langchain_core.messages import HumanMessage, AIMessage, BaseMessage
-from typing import List, Optional
+from typing import Deque, List, Optional
+from collections import deque
 from datetime import datetime, timedelta
 from .config import RAG_MAX_HISTORY_TURNS
-import time
+from services.cache import register_cache
+from services.database import WRITE_CONCERNS, COLLECTION_WRITE_TIERS
 
-# In-memory cache for active sessions (TTL-based)
-MEMORY_CACHE = {}
 CACHE_TTL = 3600  # 1 hour cache TTL
+CACHE_MAX_SESSIONS = 5000
+MAX_HISTORY_MESSAGES = RAG_MAX_HISTORY_TURNS * 2
+
+# In-memory cache for active sessions (TTL + LRU bounded, swept in the background)
+MEMORY_CACHE = register_cache("langgraph_history", max_entries=CACHE_MAX_SESSIONS, ttl_seconds=CACHE_TTL)
+
+# In-memory cache of rolling conversation summaries (same bounds)
+SUMMARY_CACHE = register_cache("langgraph_summaries", max_entries=CACHE_MAX_SESSIONS, ttl_seconds=CACHE_TTL)
+
+def _message(role: str, content: str, seq: int) -> BaseMessage:
+    """A history message tagged with its absolute position in the session"""
+    cls = HumanMessage if role == "user" else AIMessage
+    return cls(content=content, additional_kwargs={"seq": seq})
+
+
+def _next_seq(history: Deque[BaseMessage]) -> int:
+    """Position of the next message appended to a session's buffer"""
+    if not history:
+        return 0
+    return history[-1].additional_kwargs.get("seq", len(history) - 1) + 1
+
 
 class SessionMemory:
     """Session memory with MongoDB persistence and in-memory caching"""
@@ -25,26 +46,59 @@ class SessionMemory:
         """
         self.db = db
         self.conversations_collection = db.conversations
+        # Summaries are rewritten every few turns; primary ack is enough
+        self.summaries_collection = db.get_collection(
+            "conversation_summaries", write_concern=WRITE_CONCERNS[COLLECTION_WRITE_TIERS["conversation_summaries"]]
+        )
+
+    def _get_from_cache(self, session_id: str) -> Optional[Deque[BaseMessage]]:
+        """Get the session's message buffer from cache if not expired"""
+        return MEMORY_CACHE.get(session_id)
 
-    def _get_from_cache(self, session_id: str) -> Optional[dict]:
-        """Get session from cache if not expired"""
-        if session_id in MEMORY_CACHE:
-            cache_entry = MEMORY_CACHE[session_id]
-            if time.time() - cache_entry['timestamp'] < CACHE_TTL:
-                return cache_entry['messages']
-            else:
-                # Cache expired
-                del MEMORY_CACHE[session_id]
-        return None
-
-    def _set_cache(self, session_id: str, messages: List[BaseMessage]):
-        """Store messages in cache"""
-        MEMORY_CACHE[session_id] = {
-            'messages': messages,
-            'timestamp': time.time()
-        }
-
-    def get_history(self, session_id: str, organization_id: Optional[str] = None) -> List[BaseMessage]:
+    def _set_cache(self, session_id: str, messages: Deque[BaseMessage]):
+        """Store (or refresh the TTL of) the session's message buffer"""
+        MEMORY_CACHE[session_id] = messages
+
+    def _load_from_db(self, session_id: str, organization_id: Optional[str] = None,
+                      current_query: Optional[str] = None) -> Deque[BaseMessage]:
+        """
+        Load the newest RAG_MAX_HISTORY_TURNS turns from MongoDB into a ring buffer.
+        Each message carries its absolute position in the session (see _message).
+
+        current_query: the question being answered right now. The route layer persists
+        it before the graph runs, so the trailing copy is dropped; save_history appends
+        it with its answer once the turn is done.
+        """
+        query = {"session_id": session_id, "role": {"$in": ["user", "assistant"]}}
+        if organization_id:
+            query["organization_id"] = organization_id
+
+        # Newest first so the limit keeps the latest messages; reversed into chronological order
+        conversations = list(
+            self.conversations_collection.find(query, {"role": 1, "content": 1, "_id": 0})
+            .sort("created_at", -1)
+            .limit(MAX_HISTORY_MESSAGES)
+        )
+        conversations.reverse()
+
+        # Only count when the window is full; otherwise it starts at the first message
+        first_seq = 0
+        if len(conversations) == MAX_HISTORY_MESSAGES:
+            first_seq = self.conversations_collection.count_documents(query) - len(conversations)
+
+        last = conversations[-1] if conversations else None
+        if last and current_query is not None and last.get("role") == "user" and last.get("content") == current_query:
+            conversations.pop()
+
+        # Convert to LangChain messages
+        messages = deque(maxlen=MAX_HISTORY_MESSAGES)
+        for seq, conv in enumerate(conversations, start=first_seq):
+            messages.append(_message(conv.get("role"), conv.get("content", ""), seq))
+
+        return messages
+
+    def get_history(self, session_id: str, organization_id: Optional[str] = None,
+                    current_query: Optional[str] = None) -> List[BaseMessage]:
         """
         Retrieve conversation history for a session from MongoDB.
         Uses in-memory cache for performance.
@@ -52,6 +106,7 @@ class SessionMemory:
         Args:
             session_id: Unique session identifier
             organization_id: Organization ID for filtering (optional)
+            current_query: Question of the turn in progress; left out of a MongoDB reload
 
         Returns:
             List of conversation messages (limited by RAG_MAX_HISTORY_TURNS)
@@ -60,43 +115,17 @@ class SessionMemory:
         cached_messages = self._get_from_cache(session_id)
         if cached_messages is not None:
             print(f"[MEMORY V2] 🚀 Cache hit for session {session_id}: {len(cached_messages)} messages")
-            return cached_messages
+            return list(cached_messages)
 
         # Cache miss - fetch from MongoDB
         print(f"[MEMORY V2] 💾 Loading from MongoDB for session {session_id}")
-
-        query = {"session_id": session_id}
-        if organization_id:
-            query["organization_id"] = organization_id
-
-        # Fetch conversations sorted by creation time
-        conversations = list(
-            self.conversations_collection.find(query)
-            .sort("created_at", 1)  # Oldest first
-            .limit(RAG_MAX_HISTORY_TURNS * 2)  # Limit to max turns * 2 messages
-        )
-
-        # Convert to LangChain messages
-        messages = []
-        for conv in conversations:
-            role = conv.get("role")
-            content = conv.get("content", "")
-
-            if role == "user":
-                messages.append(HumanMessage(content=content))
-            elif role == "assistant":
-                messages.append(AIMessage(content=content))
-
-        # Keep only recent turns (sliding window)
-        max_messages = RAG_MAX_HISTORY_TURNS * 2
-        if len(messages) > max_messages:
-            messages = messages[-max_messages:]
+        messages = self._load_from_db(session_id, organization_id, current_query)
 
         # Update cache
         self._set_cache(session_id, messages)
 
         print(f"[MEMORY V2] Retrieved {len(messages)} messages for session {session_id}")
-        return messages
+        return list(messages)
 
     def save_history(self, session_id: str, user_message: str, ai_message: str,
                      organization_id: Optional[str] = None, visitor_id: Optional[str] = None):
@@ -112,44 +141,88 @@ class SessionMemory:
             visitor_id: Visitor ID (for MongoDB storage)
         """
         # Note: MongoDB persistence happens in the route layer (chatbot.py)
-        # This method updates the cache
-
-        # Get current history
-        history = self.get_history(session_id, organization_id)
+        # This method appends the turn to the cached ring buffer
 
-        # Add new messages
-        history.append(HumanMessage(content=user_message))
-        history.append(AIMessage(content=ai_message))
+        history = self._get_from_cache(session_id)
+        if history is None:
+            # Expired since the turn started: reload. The route layer has already
+            # persisted the question, so don't append it twice.
+            history = self._load_from_db(session_id, organization_id, current_query=user_message)
 
-        # Keep only recent turns
-        max_messages = RAG_MAX_HISTORY_TURNS * 2
-        if len(history) > max_messages:
-            history = history[-max_messages:]
+        # Oldest messages fall off the ring buffer automatically
+        next_seq = _next_seq(history)
+        history.append(_message("user", user_message, next_seq))
+        history.append(_message("assistant", ai_message, next_seq + 1))
 
-        # Update cache
+        # Refresh TTL / LRU position
         self._set_cache(session_id, history)
 
         print(f"[MEMORY V2] Saved turn for session {session_id}. Total messages: {len(history)}")
 
+    def get_summary(self, session_id: str, organization_id: Optional[str] = None) -> Optional[dict]:
+        """
+        Get the rolling conversation summary for a session.
+        Uses the in-memory cache, falling back to MongoDB.
+
+        Returns:
+            {'summary': str, 'summarized_through': int} or None if the session has no summary yet
+        """
+        cache_entry = SUMMARY_CACHE.get(session_id)
+        if cache_entry is not None:
+            return cache_entry['summary']
+
+        query = {"session_id": session_id}
+        if organization_id:
+            query["organization_id"] = organization_id
+
+        doc = self.summaries_collection.find_one(query, {"summary": 1, "summarized_through": 1})
+        # Summaries stored before positions were tracked have no boundary and are rebuilt
+        state = {"summary": doc["summary"], "summarized_through": doc.get("summarized_through")} if doc else None
+        SUMMARY_CACHE[session_id] = {'summary': state}
+        return state
+
+    def save_summary(self, session_id: str, summary_state: dict, organization_id: Optional[str] = None):
+        """
+        Persist the rolling conversation summary for a session (MongoDB + cache).
+
+        Args:
+            session_id: Unique session identifier
+            summary_state: {'summary': str, 'summarized_through': int} from the summarizer
+            organization_id: Organization ID (for MongoDB storage)
+        """
+        SUMMARY_CACHE[session_id] = {'summary': summary_state}
+
+        query = {"session_id": session_id}
+        if organization_id:
+            query["organization_id"] = organization_id
+
+        self.summaries_collection.update_one(
+            query,
+            {
+                "$set": {
+                    "summary": summary_state["summary"],
+                    "summarized_through": summary_state["summarized_through"],
+                    "updated_at": datetime.utcnow()
+                },
+                "$setOnInsert": {"created_at": datetime.utcnow()}
+            },
+            upsert=True
+        )
+        print(f"[MEMORY V2] Saved rolling summary for session {session_id} ({len(summary_state['summary'])} chars)")
+
     def clear_history(self, session_id: str):
         """Clear conversation history for a session from cache"""
-        if session_id in MEMORY_CACHE:
-            del MEMORY_CACHE[session_id]
+        if MEMORY_CACHE.delete(session_id):
             print(f"[MEMORY V2] Cleared cache for session {session_id}")
+        SUMMARY_CACHE.pop(session_id, None)
 
     def clear_expired_cache(self):
         """Remove expired entries from cache"""
-        current_time = time.time()
-        expired_sessions = [
-            sid for sid, data in MEMORY_CACHE.items()
-            if current_time - data['timestamp'] > CACHE_TTL
-        ]
-
-        for sid in expired_sessions:
-            del MEMORY_CACHE[sid]
+        expired_sessions = MEMORY_CACHE.expire()
+        SUMMARY_CACHE.expire()
 
         if expired_sessions:
-            print(f"[MEMORY V2] Cleared {len(expired_sessions)} expired cache entries")
+            print(f"[MEMORY V2] Cleared {expired_sessions} expired cache entries")
 
     def get_session_count(self) -> int:
         """Get number of active cached sessions"""
@@ -56,6 +56,61 @@ def is_likely_off_topic(question: str, context: str) -> bool:
     return False
 
 
+def _off_topic_chain_inputs(
+    question: str,
+    context: str,
+    company_name: str,
+    chat_history: List[BaseMessage]
+):
+    """Build the off-topic detection chain and its inputs"""
+    # Format chat history
+    history_text = ""
+    if chat_history:
+        recent = chat_history[-4:]  # Last 2 turns
+        history_parts = []
+        for msg in recent:
+            if isinstance(msg, HumanMessage):
+                history_parts.append(f"User: {msg.content}")
+            elif isinstance(msg, AIMessage):
+                history_parts.append(f"Assistant: {msg.content}")
+        history_text = "\n".join(history_parts)
+    else:
+        history_text = "No previous conversation"
+
+    # Create prompt
+    prompt = ChatPromptTemplate.from_messages([
+        ("human", OFF_TOPIC_DETECTION_PROMPT)
+    ])
+
+    # Create chain
+    chain = prompt | llm | StrOutputParser()
+
+    return chain, {
+        "question": question,
+        "context": context[:1000],  # Limit context length
+        "company_name": company_name,
+        "chat_history": history_text
+    }
+
+
+def _parse_off_topic(result: str) -> Tuple[bool, float]:
+    """Map the LLM output to (is_off_topic, confidence)"""
+    result = result.strip().upper()
+
+    is_off_topic = "OFF_TOPIC" in result or "OFF-TOPIC" in result
+    confidence = 0.9 if is_off_topic else 0.1
+
+    print(f"[OFF-TOPIC] Detection result: {result} (off_topic={is_off_topic})")
+
+    return is_off_topic, confidence
+
+
+def _skip_off_topic_check(question: str, context: str) -> bool:
+    """Quick pre-filter (but if context is empty, always check with LLM)"""
+    # We have good context, use pre-filter
+    return bool(context and len(context.strip()) > 50 and not is_likely_off_topic(question, context))
+
+
 def detect_off_topic(
     question: str,
     context: str,
@@ -74,58 +129,40 @@ def detect_off_topic(
     Returns:
         Tuple of (is_off_topic: bool, confidence: float)
     """
-    # Quick pre-filter (but if context is empty, always check with LLM)
-    if context and len(context.strip()) > 50:
-        # We have good context, use pre-filter
-        if not is_likely_off_topic(question, context):
-            return False, 0.0
     # If no context or poor context, always run LLM check
+    if _skip_off_topic_check(question, context):
+        return False, 0.0
 
     print(f"[OFF-TOPIC] Checking if off-topic: {question}")
 
     try:
-        # Format chat history
-        history_text = ""
-        if chat_history:
-            recent = chat_history[-4:]  # Last 2 turns
-            history_parts = []
-            for msg in recent:
-                if isinstance(msg, HumanMessage):
-                    history_parts.append(f"User: {msg.content}")
-                elif isinstance(msg, AIMessage):
-                    history_parts.append(f"Assistant: {msg.content}")
-            history_text = "\n".join(history_parts)
-        else:
-            history_text = "No previous conversation"
-
-        # Create prompt
-        prompt = ChatPromptTemplate.from_messages([
-            ("human", OFF_TOPIC_DETECTION_PROMPT)
-        ])
+        chain, inputs = _off_topic_chain_inputs(question, context, company_name, chat_history)
+        return _parse_off_topic(chain.invoke(inputs))
 
-        # Create chain
-        chain = prompt | llm | StrOutputParser()
-
-        # Detect
-        result = chain.invoke({
-            "question": question,
-            "context": context[:1000],  # Limit context length
-            "company_name": company_name,
-            "chat_history": history_text
-        })
+    except Exception as e:
+        print(f"[OFF-TOPIC] Error in detection: {str(e)}")
+        # Fallback to rule-based
+        return is_likely_off_topic(question, context), 0.5
 
-        result = result.strip().upper()
 
-        is_off_topic = "OFF_TOPIC" in result or "OFF-TOPIC" in result
-        confidence = 0.9 if is_off_topic else 0.1
+async def adetect_off_topic(
+    question: str,
+    context: str,
+    company_name: str,
+    chat_history: List[BaseMessage]
+) -> Tuple[bool, float]:
+    """Async variant of detect_off_topic (does not block the event loop)"""
+    if _skip_off_topic_check(question, context):
+        return False, 0.0
 
-        print(f"[OFF-TOPIC] Detection result: {result} (off_topic={is_off_topic})")
+    print(f"[OFF-TOPIC] Checking if off-topic: {question}")
 
-        return is_off_topic, confidence
+    try:
+        chain, inputs = _off_topic_chain_inputs(question, context, company_name, chat_history)
+        return _parse_off_topic(await chain.ainvoke(inputs))
 
     except Exception as e:
         print(f"[OFF-TOPIC] Error in detection: {str(e)}")
-        # Fallback to rule-based
         return is_likely_off_topic(question, context), 0.5
 
 
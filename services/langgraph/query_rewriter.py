@@ -89,6 +89,35 @@ def format_chat_history_for_rewrite(chat_history: List[BaseMessage], max_turns:
     return "\n".join(formatted)
 
 
+def _rewrite_chain_inputs(question: str, chat_history: List[BaseMessage]):
+    """Build the query rewriting chain and its inputs"""
+    # Format chat history
+    history_text = format_chat_history_for_rewrite(chat_history, max_turns=3)
+
+    # Create prompt
+    prompt = ChatPromptTemplate.from_messages([
+        ("human", QUERY_REWRITE_PROMPT)
+    ])
+
+    # Create chain
+    chain = prompt | llm | StrOutputParser()
+
+    return chain, {
+        "chat_history": history_text,
+        "question": question
+    }
+
+
+def _parse_rewrite(rewritten: str, question: str) -> str:
+    """Clean up the LLM output"""
+    rewritten = rewritten.strip()
+
+    print(f"[QUERY REWRITER] Original: {question}")
+    print(f"[QUERY REWRITER] Rewritten: {rewritten}")
+
+    return rewritten
+
+
 def rewrite_query(question: str, chat_history: List[BaseMessage]) -> str:
     """
     Rewrite user query to be standalone using conversation context.
@@ -108,33 +137,27 @@ def rewrite_query(question: str, chat_history: List[BaseMessage]) -> str:
     print(f"[QUERY REWRITER] Rewriting query: {question}")
 
     try:
-        # Format chat history
-        history_text = format_chat_history_for_rewrite(chat_history, max_turns=3)
+        chain, inputs = _rewrite_chain_inputs(question, chat_history)
+        return _parse_rewrite(chain.invoke(inputs), question)
 
-        # Create prompt
-        prompt = ChatPromptTemplate.from_messages([
-            ("human", QUERY_REWRITE_PROMPT)
-        ])
-
-        # Create chain
-        chain = prompt | llm | StrOutputParser()
+    except Exception as e:
+        print(f"[QUERY REWRITER] Error rewriting query: {str(e)}")
+        # Fallback to original question
+        return question
 
-        # Invoke rewriting
-        rewritten = chain.invoke({
-            "chat_history": history_text,
-            "question": question
-        })
 
-        rewritten = rewritten.strip()
+async def arewrite_query(question: str, chat_history: List[BaseMessage]) -> str:
+    """Async variant of rewrite_query (does not block the event loop)"""
+    if not should_rewrite_query(question, chat_history):
+        print(f"[QUERY REWRITER] No rewriting needed for: {question}")
+        return question
 
-        print(f"[QUERY REWRITER] Original: {question}")
-        print(f"[QUERY REWRITER] Rewritten: {rewritten}")
+    print(f"[QUERY REWRITER] Rewriting query: {question}")
 
-        return rewritten
+    try:
+        chain, inputs = _rewrite_chain_inputs(question, chat_history)
+        return _parse_rewrite(await chain.ainvoke(inputs), question)
 
     except Exception as e:
         print(f"[QUERY REWRITER] Error rewriting query: {str(e)}")
-        # Fallback to original question
         return question
-
-
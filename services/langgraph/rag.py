@@ -1,14 +1,16 @@
 from pinecone import Pinecone
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
+from services.pinecone.async_index import get_async_index
 from .llm import embeddings
 from .config import PINECONE_API_KEY, PINECONE_INDEX, RAG_TOP_K, RAG_SIMILARITY_THRESHOLD
 
 pc = Pinecone(api_key=PINECONE_API_KEY)
 index = pc.Index(PINECONE_INDEX)
 
-def search_kb(query: str, namespace: str, top_k: int = RAG_TOP_K, threshold: float = RAG_SIMILARITY_THRESHOLD) -> str:
+def retrieve(query: str, namespace: str, top_k: int = RAG_TOP_K, threshold: float = RAG_SIMILARITY_THRESHOLD) -> Tuple[str, List[Dict[str, Any]]]:
     """
-    Search knowledge base using semantic search.
+    Search the knowledge base once and return both the formatted context and
+    the citation sources, from a single embedding and a single Pinecone query.
     
     Args:
         query: User question to search for
@@ -17,7 +19,7 @@ def search_kb(query: str, namespace: str, top_k: int = RAG_TOP_K, threshold: flo
         threshold: Minimum similarity score threshold
         
     Returns:
-        Formatted string of relevant context from knowledge base
+        (context, sources) - formatted context string and list of source dicts
     """
     try:
         print(f"\n[RAG SEARCH] Query: {query}")
@@ -35,67 +37,96 @@ def search_kb(query: str, namespace: str, top_k: int = RAG_TOP_K, threshold: flo
         )
         
         print(f"[RAG SEARCH] Found {len(results.matches)} total matches")
-
-        # Filter and format results
-        docs = []
-        for idx, match in enumerate(results.matches):
-            score = match.score
-            print(f"[RAG SEARCH]   Match {idx+1}: score={score:.4f}, title={match.metadata.get('title', 'N/A')[:50]}")
+        return _format_context(results.matches, threshold), _format_sources(results.matches, threshold)
             
-            if score >= threshold:
-                content = match.metadata.get("content", "").strip()
-                source = match.metadata.get("title", "Knowledge Base")
-                
-                if content and len(content) > 10:
-                    formatted_doc = f"Source: {source}\n{content}"
-                    docs.append(formatted_doc)
-                    print(f"[RAG SEARCH] ✓ Added document from {source}")
-            else:
-                print(f"[RAG SEARCH] ⏭️ Skipping (score {score:.4f} < threshold {threshold})")
+    except Exception as e:
+        print(f"[RAG SEARCH] ❌ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        return "", []
+
+async def aretrieve(query: str, namespace: str, top_k: int = RAG_TOP_K, threshold: float = RAG_SIMILARITY_THRESHOLD) -> Tuple[str, List[Dict[str, Any]]]:
+    """Async variant of retrieve() using the asyncio Pinecone client"""
+    try:
+        print(f"\n[RAG SEARCH] Query: {query}")
+        print(f"[RAG SEARCH] Namespace: {namespace}")
+
+        vector = await embeddings.aembed_query(query)
+        async_index = await get_async_index(PINECONE_INDEX)
+
+        results = await async_index.query(
+            vector=vector,
+            top_k=top_k,
+            namespace=namespace,
+            include_metadata=True
+        )
+
+        print(f"[RAG SEARCH] Found {len(results.matches)} total matches")
+        return _format_context(results.matches, threshold), _format_sources(results.matches, threshold)
 
-        if docs:
-            result = "\n\n---\n\n".join(docs)
-            print(f"[RAG SEARCH] ✅ Returning {len(docs)} relevant documents")
-            return result
-        else:
-            print(f"[RAG SEARCH] ❌ No relevant documents found")
-            return ""
-            
     except Exception as e:
         print(f"[RAG SEARCH] ❌ ERROR: {e}")
         import traceback
         traceback.print_exc()
+        return "", []
+
+def _format_context(matches, threshold: float) -> str:
+    """Filter and format matches into the context string passed to the LLM"""
+    docs = []
+    for idx, match in enumerate(matches):
+        score = match.score
+        print(f"[RAG SEARCH]   Match {idx+1}: score={score:.4f}, title={match.metadata.get('title', 'N/A')[:50]}")
+        
+        if score >= threshold:
+            content = match.metadata.get("content", "").strip()
+            source = match.metadata.get("title", "Knowledge Base")
+            
+            if content and len(content) > 10:
+                formatted_doc = f"Source: {source}\n{content}"
+                docs.append(formatted_doc)
+                print(f"[RAG SEARCH] ✓ Added document from {source}")
+        else:
+            print(f"[RAG SEARCH] ⏭️ Skipping (score {score:.4f} < threshold {threshold})")
+
+    if docs:
+        result = "\n\n---\n\n".join(docs)
+        print(f"[RAG SEARCH] ✅ Returning {len(docs)} relevant documents")
+        return result
+    else:
+        print(f"[RAG SEARCH] ❌ No relevant documents found")
         return ""
 
+def _format_sources(matches, threshold: float) -> List[Dict[str, Any]]:
+    """Source information with metadata for citation purposes"""
+    sources = []
+    for match in matches:
+        if match.score >= threshold:
+            sources.append({
+                "title": match.metadata.get("title", "Unknown Source"),
+                "score": float(match.score),
+                "url": match.metadata.get("url", ""),
+                "content_preview": match.metadata.get("content", "")[:200]
+            })
+    return sources
+
+def search_kb(query: str, namespace: str, top_k: int = RAG_TOP_K, threshold: float = RAG_SIMILARITY_THRESHOLD) -> str:
+    """
+    Search knowledge base using semantic search.
+    Prefer retrieve() when the sources are needed too.
+        
+    Returns:
+        Formatted string of relevant context from knowledge base
+    """
+    context, _ = retrieve(query, namespace, top_k, threshold)
+    return context
+
 def get_relevant_sources(query: str, namespace: str, top_k: int = RAG_TOP_K, threshold: float = RAG_SIMILARITY_THRESHOLD) -> List[Dict[str, Any]]:
     """
     Get relevant sources with metadata for citation purposes.
+    Prefer retrieve() when the context is needed too.
     
     Returns:
         List of dictionaries containing source information
     """
-    try:
-        vector = embeddings.embed_query(query)
-        
-        results = index.query(
-            vector=vector,
-            top_k=top_k,
-            namespace=namespace,
-            include_metadata=True
-        )
-        
-        sources = []
-        for match in results.matches:
-            if match.score >= threshold:
-                sources.append({
-                    "title": match.metadata.get("title", "Unknown Source"),
-                    "score": float(match.score),
-                    "url": match.metadata.get("url", ""),
-                    "content_preview": match.metadata.get("content", "")[:200]
-                })
-        
-        return sources
-        
-    except Exception as e:
-        print(f"[RAG] Error getting sources: {e}")
-        return []
+    _, sources = retrieve(query, namespace, top_k, threshold)
+    return sources
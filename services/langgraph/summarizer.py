@@ -9,7 +9,7 @@ All prompts are now in prompts.py for centralized management.
 from langchain_core.messages import HumanMessage, AIMessage, BaseMessage, SystemMessage
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from typing import List, Dict
+from typing import List, Dict, Optional
 from .llm import llm
 from .prompts import SUMMARIZATION_PROMPT, PROGRESSIVE_SUMMARIZATION_PROMPT
 
@@ -137,23 +137,59 @@ def progressive_summarize(existing_summary: str, new_messages: List[BaseMessage]
         return f"{existing_summary}\n\nRecent updates:\n{format_messages_for_summary(new_messages[-4:])}"
 
 
-def get_summarized_context(messages: List[BaseMessage], max_recent_turns: int = 3) -> Dict[str, any]:
+def message_seq(message: BaseMessage) -> Optional[int]:
+    """
+    Absolute position of a message in its session (0 = first message ever), set by
+    SessionMemory. Lets a rolling summary find its boundary inside a sliding window.
+    """
+    return message.additional_kwargs.get("seq")
+
+
+def _find_new_messages(old_messages: List[BaseMessage], summarized_through: Optional[int]) -> Optional[List[BaseMessage]]:
+    """
+    Return the messages of old_messages that come after the last summarized one
+    (position `summarized_through`), or None if the boundary is no longer inside the window.
+    """
+    if summarized_through is None or not old_messages:
+        return None
+    positions = [message_seq(m) for m in old_messages]
+    if any(p is None for p in positions):
+        return None
+    # Messages between the summary and the window's first message have been lost
+    if positions[0] > summarized_through + 1:
+        return None
+    return [m for m, p in zip(old_messages, positions) if p > summarized_through]
+
+
+def get_summarized_context(
+    messages: List[BaseMessage],
+    max_recent_turns: int = 3,
+    previous_summary: Optional[Dict[str, any]] = None
+) -> Dict[str, any]:
     """
     Get conversation context with automatic summarization for long conversations.
     Returns both summary of old messages and recent messages in full.
 
+    When `previous_summary` (the persisted rolling summary: {'summary', 'summarized_through'})
+    is given, only messages that aged out since it was written are folded in with
+    progressive_summarize; the LLM is not called at all if nothing new aged out.
+
     Args:
         messages: Full conversation history
         max_recent_turns: Number of recent turns to keep in full (default: 3 = 6 messages)
+        previous_summary: Persisted rolling summary for this session, if any
 
     Returns:
-        Dict with 'summary' (str), 'recent_messages' (List[BaseMessage]), and 'has_summary' (bool)
+        Dict with 'summary' (str), 'recent_messages' (List[BaseMessage]), 'has_summary' (bool),
+        'summary_state' (dict to persist) and 'summary_updated' (bool)
     """
     if not messages:
         return {
             "summary": "",
             "recent_messages": [],
-            "has_summary": False
+            "has_summary": False,
+            "summary_state": previous_summary,
+            "summary_updated": False
         }
 
     max_recent_messages = max_recent_turns * 2
@@ -163,22 +199,43 @@ def get_summarized_context(messages: List[BaseMessage], max_recent_turns: int =
         return {
             "summary": "",
             "recent_messages": messages,
-            "has_summary": False
+            "has_summary": False,
+            "summary_state": previous_summary,
+            "summary_updated": False
         }
 
     # Split into old (to summarize) and recent (keep in full)
     old_messages = messages[:-max_recent_messages]
     recent_messages = messages[-max_recent_messages:]
 
-    # Summarize old messages
-    summary = summarize_conversation(old_messages)
+    new_messages = None
+    if previous_summary and previous_summary.get("summary"):
+        new_messages = _find_new_messages(old_messages, previous_summary.get("summarized_through"))
+
+    if new_messages is None:
+        # No usable rolling summary - summarize everything that aged out
+        summary = summarize_conversation(old_messages)
+        updated = True
+    elif new_messages:
+        # Fold only the newly aged-out messages into the rolling summary
+        summary = progressive_summarize(previous_summary["summary"], new_messages)
+        updated = True
+    else:
+        print(f"[SUMMARIZER] ♻️ Reusing stored summary (no new aged-out messages)")
+        summary = previous_summary["summary"]
+        updated = False
 
     print(f"[SUMMARIZER] Context: {len(old_messages)} messages summarized, {len(recent_messages)} kept in full")
 
     return {
         "summary": summary,
         "recent_messages": recent_messages,
-        "has_summary": True
+        "has_summary": True,
+        "summary_state": {
+            "summary": summary,
+            "summarized_through": message_seq(old_messages[-1])
+        },
+        "summary_updated": updated
     }
 
 
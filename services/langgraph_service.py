@@ -8,6 +8,7 @@ Features:
 5. Off-topic detection and smart redirect
 """
 
+import asyncio
 from typing import Dict, Any, Optional, List
 from .langgraph.graph import app
 from .langgraph.memory import SessionMemory
@@ -25,7 +26,7 @@ class LangGraphService:
         """
         self.memory = SessionMemory(db)
 
-    def process_query(
+    async def process_query(
         self,
         question: str,
         session_id: str,
@@ -36,6 +37,7 @@ class LangGraphService:
     ) -> Dict[str, Any]:
         """
         Process a user query using enhanced LangGraph RAG pipeline with off-topic detection.
+        The graph runs its independent LLM/retrieval branches concurrently (await app.ainvoke).
 
         Args:
             question: User's question
@@ -56,13 +58,10 @@ class LangGraphService:
         print(f"[LANGGRAPH SERVICE] Question: {question}")
 
         try:
-            # Get conversation history from MongoDB (with caching)
-            chat_history = self.memory.get_history(session_id, organization_id)
-
-            print(f"[LANGGRAPH SERVICE] Loaded {len(chat_history)} messages from history")
-
-            # Get summarized context for long conversations
-            context_data = get_summarized_context(chat_history, max_recent_turns=3)
+            # History and summaries use sync pymongo + LLM calls; keep them off the event loop
+            chat_history, context_data = await asyncio.to_thread(
+                self._load_context, session_id, organization_id, question
+            )
 
             conversation_summary = context_data.get("summary", "")
             recent_messages = context_data.get("recent_messages", chat_history)
@@ -95,12 +94,15 @@ class LangGraphService:
                 "conversation_stage": "greeting",
                 "collected_contact": {"name": None, "phone": None, "email": None},
                 "needs_callback": False,
-                "contact_confirmed": False
+                "contact_confirmed": False,
+                "prefetch_query": "",
+                "prefetch_context": "",
+                "prefetch_sources": []
             }
 
             # Run the enhanced LangGraph workflow
             print(f"[LANGGRAPH SERVICE] Invoking LangGraph app...")
-            result = app.invoke(initial_state)
+            result = await app.ainvoke(initial_state)
 
             # Extract results
             answer = result.get("answer", "I apologize, but I'm unable to process your request right now.")
@@ -132,7 +134,8 @@ class LangGraphService:
                     print(f"[LANGGRAPH SERVICE] 👤 Lead collected - Name: {collected_contact.get('name')}, Phone: {collected_contact.get('phone')}, Email: {collected_contact.get('email')}")
 
             # Save to conversation history (cache + will be persisted to MongoDB in route layer)
-            self.memory.save_history(
+            await asyncio.to_thread(
+                self.memory.save_history,
                 session_id=session_id,
                 user_message=question,
                 ai_message=answer,
@@ -175,6 +178,26 @@ class LangGraphService:
                 "off_topic_redirect": False
             }
 
+    def _load_context(self, session_id: str, organization_id: Optional[str] = None, question: Optional[str] = None):
+        """Load history (without the question being answered) and the incrementally updated summary"""
+        # Get conversation history from MongoDB (with caching)
+        chat_history = self.memory.get_history(session_id, organization_id, current_query=question)
+
+        print(f"[LANGGRAPH SERVICE] Loaded {len(chat_history)} messages from history")
+
+        # Get summarized context for long conversations, updating the stored
+        # rolling summary only with messages that aged out since last turn
+        previous_summary = self.memory.get_summary(session_id, organization_id)
+        context_data = get_summarized_context(
+            chat_history,
+            max_recent_turns=3,
+            previous_summary=previous_summary
+        )
+        if context_data.get("summary_updated"):
+            self.memory.save_summary(session_id, context_data["summary_state"], organization_id)
+
+        return chat_history, context_data
+
     def clear_session(self, session_id: str):
         """Clear conversation history for a session"""
         self.memory.clear_history(session_id)
@@ -1,16 +1,13 @@
 from openai import OpenAI
 import os
+from services.embedding_service import get_embedding_service
 
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 def get_embeddings(text: str) -> list:
-    """Get embeddings for a text using OpenAI's API"""
+    """Get embeddings for a text using OpenAI's API (cached via the shared embedding service)"""
     try:
-        response = client.embeddings.create(
-            model="text-embedding-ada-002",
-            input=text
-        )
-        return response.data[0].embedding
+        return get_embedding_service("text-embedding-ada-002", None).embed_query(text)
     except Exception as e:
         print(f"Error getting embeddings: {str(e)}")
         return [] 
\ No newline at end of file
@@ -0,0 +1,165 @@
+"""
+Shared API key -> organization resolution.
+
+Every widget/dashboard request authenticates with X-API-Key. Resolving the key
+is an organizations.find_one per request, so results are kept in a short-TTL
+in-process cache (including negative results for unknown keys, with a shorter
+TTL). Writes to an organization document must call invalidate_organization so
+the next request sees the change; other workers pick it up within the TTL.
+
+The tenant's knowledge base namespace (vectorStoreId / kb_id), needed before
+every chat turn, is cached the same way per user_id and invalidated by the
+knowledge base create/update/delete/rebuild paths.
+"""
+
+import os
+import copy
+import threading
+from typing import Any, Dict, Optional
+
+from fastapi import Header, HTTPException
+
+from services.cache import register_cache
+from services.database import get_organization_by_api_key, get_organization_by_api_key_async, async_db, db
+
+ORG_CACHE_TTL_SECONDS = int(os.getenv("ORG_CACHE_TTL_SECONDS", "60"))
+ORG_NEGATIVE_CACHE_TTL_SECONDS = int(os.getenv("ORG_NEGATIVE_CACHE_TTL_SECONDS", "10"))
+ORG_CACHE_MAX_ENTRIES = int(os.getenv("ORG_CACHE_MAX_ENTRIES", "5000"))
+
+_NOT_FOUND = {}  # negative-cache marker (compared by identity)
+
+# Namespace the chat engine falls back to when an organization has no knowledge base
+DEFAULT_CHAT_NAMESPACE = "kb_default"
+
+# api_key -> organization document (or _NOT_FOUND)
+_organizations = register_cache("organizations_by_api_key", max_entries=ORG_CACHE_MAX_ENTRIES, ttl_seconds=ORG_CACHE_TTL_SECONDS)
+
+# user_id -> {"vectorStoreId", "kb_id"} (or _NOT_FOUND)
+_knowledge_bases = register_cache("knowledge_base_by_user", max_entries=ORG_CACHE_MAX_ENTRIES, ttl_seconds=ORG_CACHE_TTL_SECONDS)
+
+# organization id / _id -> api_key, so writes keyed by id can invalidate
+_api_keys_by_org: Dict[str, str] = {}
+_index_lock = threading.Lock()
+
+
+def _remember(api_key: str, organization: Optional[Dict[str, Any]]):
+    if organization is None:
+        _organizations.set(api_key, _NOT_FOUND, ttl=ORG_NEGATIVE_CACHE_TTL_SECONDS)
+        return
+    _organizations.set(api_key, organization)
+    with _index_lock:
+        for org_id in (organization.get("_id"), organization.get("id")):
+            if org_id is not None:
+                _api_keys_by_org[str(org_id)] = api_key
+
+
+def _cached(api_key: str):
+    """(hit, organization copy) - callers may mutate what they get back"""
+    organization = _organizations.get(api_key)
+    if organization is None:
+        return False, None
+    if organization is _NOT_FOUND:
+        return True, None
+    return True, copy.deepcopy(organization)
+
+
+async def resolve_organization(api_key: str) -> Optional[Dict[str, Any]]:
+    """Organization for an API key (cached), or None if the key is unknown"""
+    if not api_key:
+        return None
+    hit, organization = _cached(api_key)
+    if hit:
+        return organization
+
+    organization = await get_organization_by_api_key_async(api_key)
+    _remember(api_key, organization)
+    return copy.deepcopy(organization)
+
+
+def resolve_organization_sync(api_key: str) -> Optional[Dict[str, Any]]:
+    """Blocking variant of resolve_organization for sync helpers"""
+    if not api_key:
+        return None
+    hit, organization = _cached(api_key)
+    if hit:
+        return organization
+
+    organization = get_organization_by_api_key(api_key)
+    _remember(api_key, organization)
+    return copy.deepcopy(organization)
+
+
+async def get_organization_from_api_key(api_key: Optional[str] = Header(None, alias="X-API-Key")):
+    """Dependency to get organization from API key"""
+    if not api_key:
+        raise HTTPException(status_code=401, detail="API key is required")
+
+    organization = await resolve_organization(api_key)
+    if not organization:
+        raise HTTPException(status_code=401, detail="Invalid API key")
+
+    return organization
+
+
+def invalidate_organization(org_id: Any = None, api_key: Optional[str] = None):
+    """Drop a cached organization by its id/_id and/or API key after it changes"""
+    try:
+        if org_id is not None:
+            with _index_lock:
+                mapped = _api_keys_by_org.pop(str(org_id), None)
+            if mapped:
+                _organizations.delete(mapped)
+        if api_key:
+            _organizations.delete(api_key)
+    except Exception as e:
+        print(f"[ERROR] Organization cache invalidation failed: {str(e)}")
+
+
+async def resolve_knowledge_base(user_id: Optional[str]) -> Optional[Dict[str, Any]]:
+    """The knowledge base (vectorStoreId / kb_id) owned by a user (cached), or None"""
+    cached = _knowledge_bases.get(user_id)
+    if cached is not None:
+        return None if cached is _NOT_FOUND else dict(cached)
+
+    knowledge_base = await async_db.knowledge_bases.find_one(
+        {"userId": user_id},
+        {"vectorStoreId": 1, "kb_id": {"$toString": "$_id"}}
+    )
+    if knowledge_base is None:
+        _knowledge_bases.set(user_id, _NOT_FOUND, ttl=ORG_NEGATIVE_CACHE_TTL_SECONDS)
+        return None
+    _knowledge_bases.set(user_id, knowledge_base)
+    return dict(knowledge_base)
+
+
+def resolve_knowledge_base_sync(user_id: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Blocking variant of resolve_knowledge_base for sync helpers"""
+    cached = _knowledge_bases.get(user_id)
+    if cached is not None:
+        return None if cached is _NOT_FOUND else dict(cached)
+
+    knowledge_base = db.knowledge_bases.find_one(
+        {"userId": user_id},
+        {"vectorStoreId": 1, "kb_id": {"$toString": "$_id"}}
+    )
+    if knowledge_base is None:
+        _knowledge_bases.set(user_id, _NOT_FOUND, ttl=ORG_NEGATIVE_CACHE_TTL_SECONDS)
+        return None
+    _knowledge_bases.set(user_id, knowledge_base)
+    return dict(knowledge_base)
+
+
+def chat_namespace(knowledge_base: Optional[Dict[str, Any]]) -> str:
+    """The Pinecone namespace the chat engine queries (and keys its answer cache by)"""
+    return (knowledge_base or {}).get("vectorStoreId") or DEFAULT_CHAT_NAMESPACE
+
+
+def invalidate_knowledge_base(user_id: Optional[str] = None):
+    """Drop the cached knowledge base info for a user (or everyone) after it changes"""
+    try:
+        if user_id is None:
+            _knowledge_bases.clear()
+        else:
+            _knowledge_bases.delete(user_id)
+    except Exception as e:
+        print(f"[ERROR] Knowledge base cache invalidation failed: {str(e)}")
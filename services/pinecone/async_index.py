@@ -0,0 +1,55 @@
+"""
+Shared asyncio Pinecone index handles.
+
+The asyncio client owns an aiohttp session, so one handle is created per
+(index, event loop) and reused by every request served on that loop.
+"""
+
+import os
+import asyncio
+from typing import Dict, Tuple, Optional
+from pinecone import Pinecone
+
+pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
+
+# index name -> data plane host (resolved once per process)
+_index_hosts: Dict[str, str] = {}
+
+# (index name, loop id) -> asyncio index handle
+_async_indexes: Dict[Tuple[str, int], object] = {}
+
+
+async def get_async_index(index_name: Optional[str] = None):
+    """Return the asyncio index handle for the running event loop"""
+    index_name = index_name or os.getenv("PINECONE_INDEX", "bayai")
+    key = (index_name, id(asyncio.get_running_loop()))
+
+    index = _async_indexes.get(key)
+    if index is not None:
+        return index
+
+    host = _index_hosts.get(index_name)
+    if host is None:
+        # describe_index is a control-plane call; keep it off the event loop
+        description = await asyncio.to_thread(pc.describe_index, index_name)
+        host = description.host
+        _index_hosts[index_name] = host
+
+    # Another task may have created the handle while we were resolving the host
+    index = _async_indexes.get(key)
+    if index is None:
+        index = pc.IndexAsyncio(host=host)
+        _async_indexes[key] = index
+        print(f"[PINECONE ASYNC] Opened asyncio index handle for {index_name}")
+    return index
+
+
+async def close_async_indexes():
+    """Close every asyncio index handle opened on the running event loop"""
+    loop_id = id(asyncio.get_running_loop())
+    for key in [k for k in _async_indexes if k[1] == loop_id]:
+        index = _async_indexes.pop(key)
+        try:
+            await index.close()
+        except Exception as e:
+            print(f"[PINECONE ASYNC] Error closing index handle {key[0]}: {e}")
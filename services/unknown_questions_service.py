@@ -410,41 +410,3 @@ class UnknownQuestionsService:
         except Exception as e:
             print(f"Error deleting unknown question: {str(e)}")
             return False
-
-# Create indexes for better performance
-def create_indexes():
-    """Create database indexes for unknown questions"""
-    try:
-        # Compound index for organization and status queries
-        unknown_questions_collection.create_index([
-            ("organization_id", 1),
-            ("status", 1),
-            ("created_at", -1)
-        ])
-        
-        # Index for question normalization and similarity matching
-        unknown_questions_collection.create_index([
-            ("organization_id", 1),
-            ("question_normalized", 1)
-        ])
-        
-        # Index for category and quality filtering
-        unknown_questions_collection.create_index([
-            ("organization_id", 1),
-            ("question_category", 1),
-            ("response_quality", 1)
-        ])
-        
-        # Text index for search
-        unknown_questions_collection.create_index([
-            ("question", "text"),
-            ("ai_response", "text")
-        ])
-        
-        print("✅ Created indexes for unknown_questions collection")
-        
-    except Exception as e:
-        print(f"Error creating indexes: {str(e)}")
-
-# Create indexes when module is imported
-create_indexes()
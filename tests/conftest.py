@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Service modules build their clients at import time; let them come up without real credentials
+os.environ.setdefault("PINECONE_API_KEY", "test")
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("DB_AUTO_INDEX", "false")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
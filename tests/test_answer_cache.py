@@ -0,0 +1,43 @@
+from services.langchain.answer_cache import SemanticAnswerCache
+
+
+def test_orgs_sharing_a_namespace_do_not_share_answers():
+    answers = SemanticAnswerCache(enabled=True)
+    embedding = [0.1, 0.2, 0.3]
+
+    answers.store("kb_default", "org_a", "What are your hours?", embedding, "Acme is open 9-5.", "kb")
+
+    assert answers.lookup("kb_default", "org_b", "What are your hours?", embedding) is None
+    assert answers.lookup("kb_default", "org_b", "what are your hours", [0.1, 0.2, 0.31]) is None
+    hit = answers.lookup("kb_default", "org_a", "What are your hours?", embedding)
+    assert hit["answer"] == "Acme is open 9-5."
+
+
+def test_similar_question_hits_within_the_same_org():
+    answers = SemanticAnswerCache(enabled=True, similarity_threshold=0.95)
+
+    answers.store("kb_org", "org_a", "What are your hours?", [1.0, 0.0], "9-5", "kb")
+
+    assert answers.lookup("kb_org", "org_a", "When are you open?", [0.99, 0.05])["answer"] == "9-5"
+    assert answers.lookup("kb_org", "org_a", "Where are you?", [0.0, 1.0]) is None
+
+
+def test_invalidating_a_namespace_drops_every_org():
+    answers = SemanticAnswerCache(enabled=True)
+    answers.store("kb_default", "org_a", "hi", [1.0], "A", "kb")
+    answers.store("kb_default", "org_b", "hi", [1.0], "B", "kb")
+
+    assert answers.invalidate("kb_default") == 2
+    assert answers.lookup("kb_default", "org_a", "hi", [1.0]) is None
+
+
+def test_answer_cache_is_swept_and_reported_with_registered_caches():
+    from services.cache import cache_stats, sweep_caches
+    from services.langchain.answer_cache import answer_cache
+
+    answer_cache.store("kb_sweep", "org_a", "hi", [1.0], "A", "kb")
+    answer_cache._namespaces["kb_sweep"][("org_a", "hi")]["expires_at"] = 0
+
+    assert sweep_caches() >= 1
+    assert "kb_sweep" not in answer_cache._namespaces
+    assert "semantic_answers" in [c["name"] for c in cache_stats()["caches"]]
@@ -0,0 +1,138 @@
+import asyncio
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from services.crawler import WebsiteCrawler
+
+
+def html(title, *links):
+    anchors = "".join(f'<a href="{link}">{link}</a>' for link in links)
+    return web.Response(text=f"<html><head><title>{title}</title></head><body><main>{title} {anchors}</main></body></html>",
+                        content_type="text/html")
+
+
+async def crawl_site(routes, max_pages=20, validators=None):
+    """Crawl an in-process site made of {path: handler}; returns (crawler, pages by path)"""
+    app = web.Application()
+    for path, handler in routes.items():
+        app.router.add_get(path, handler)
+    server = TestServer(app)
+    await server.start_server()
+    try:
+        base = str(server.make_url("/"))
+        crawler = WebsiteCrawler(base, max_pages, validators=validators)
+        pages = await crawler.crawl()
+    finally:
+        await server.close()
+    root = base.rstrip("/")
+    path = lambda url: url[len(root):] or "/"
+    crawler.gone = {path(url) for url in crawler.gone}
+    crawler.failed = {path(url) for url in crawler.failed}
+    return crawler, {path(page["url"]): page for page in pages}
+
+
+def handler(response):
+    async def handle(request):
+        return response()
+    return handle
+
+
+def test_clean_crawl_is_complete():
+    crawler, pages = asyncio.run(crawl_site({
+        "/": handler(lambda: html("Home", "/a", "/b")),
+        "/a": handler(lambda: html("A", "/")),
+        "/b": handler(lambda: html("B")),
+    }))
+
+    assert set(pages) == {"/", "/a", "/b"}
+    assert crawler.complete
+    assert crawler.failed == set()
+
+
+def test_failed_fetch_makes_crawl_incomplete():
+    crawler, pages = asyncio.run(crawl_site({
+        "/": handler(lambda: html("Home", "/a", "/b")),
+        "/a": handler(lambda: html("A")),
+        "/b": handler(lambda: web.Response(status=503)),
+    }))
+
+    assert set(pages) == {"/", "/a"}
+    assert crawler.failed == {"/b"}
+    assert crawler.gone == set()
+    assert not crawler.complete
+
+
+def test_missing_pages_are_gone_not_failed():
+    crawler, pages = asyncio.run(crawl_site({
+        "/": handler(lambda: html("Home", "/a", "/removed")),
+        "/a": handler(lambda: html("A")),
+    }))
+
+    assert set(pages) == {"/", "/a"}
+    assert crawler.gone == {"/removed"}
+    assert crawler.failed == set()
+    assert crawler.complete
+
+
+def test_page_budget_leaves_crawl_incomplete():
+    crawler, pages = asyncio.run(crawl_site({
+        "/": handler(lambda: html("Home", "/a", "/b", "/c")),
+        "/a": handler(lambda: html("A")),
+        "/b": handler(lambda: html("B")),
+        "/c": handler(lambda: html("C")),
+    }, max_pages=2))
+
+    assert len(pages) == 2
+    assert not crawler.complete
+
+
+def test_not_modified_page_reuses_stored_links():
+    async def home(request):
+        if request.headers.get("If-None-Match") == '"v1"':
+            return web.Response(status=304)
+        return html("Home")
+
+    async def run():
+        app = web.Application()
+        app.router.add_get("/", home)
+        app.router.add_get("/a", handler(lambda: html("A")))
+        server = TestServer(app)
+        await server.start_server()
+        try:
+            base = str(server.make_url("/"))
+            crawler = WebsiteCrawler(base, 10, validators={base: {"etag": '"v1"', "links": [base + "a"]}})
+            return crawler, await crawler.crawl()
+        finally:
+            await server.close()
+
+    crawler, pages = asyncio.run(run())
+
+    assert [page["not_modified"] for page in pages] == [True, False]
+    assert crawler.stats["not_modified"] == 1
+    assert crawler.complete
+
+
+def test_cancelled_crawl_leaves_no_pending_fetches():
+    async def slow(request):
+        await asyncio.sleep(5)
+        return html("Slow")
+
+    async def run():
+        app = web.Application()
+        app.router.add_get("/", handler(lambda: html("Home", "/a", "/b")))
+        app.router.add_get("/a", slow)
+        app.router.add_get("/b", slow)
+        server = TestServer(app)
+        await server.start_server()
+        try:
+            crawl = asyncio.create_task(WebsiteCrawler(str(server.make_url("/")), 10).crawl())
+            await asyncio.sleep(0.5)
+            crawl.cancel()
+            await asyncio.gather(crawl, return_exceptions=True)
+            # Server-side handlers may still be sleeping; only the crawler's fetches matter
+            return [t for t in asyncio.all_tasks() if t.get_coro().__qualname__ == "WebsiteCrawler._fetch"]
+        finally:
+            await server.close()
+
+    assert asyncio.run(run()) == []
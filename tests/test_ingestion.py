@@ -0,0 +1,168 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from services.langchain import ingestion
+from services.langchain.ingestion import chunk_id, estimate_tokens, sync_source, token_batches
+
+
+class FakeManifests:
+    """The slice of the vector_manifests collection sync_source uses"""
+
+    def __init__(self):
+        self.docs = {}
+
+    async def find_one(self, query):
+        return self.docs.get((query["namespace"], query["source"]))
+
+    async def update_one(self, query, update, upsert=False):
+        key = (query["namespace"], query["source"])
+        self.docs[key] = {**self.docs.get(key, {}), **query, **update["$set"]}
+
+
+class FakeIndex:
+    def __init__(self, ids=()):
+        self.ids = set(ids)
+        self.upserted = []
+        self.deleted = []
+
+    async def upsert(self, vectors, namespace):
+        self.upserted.extend(v["id"] for v in vectors)
+        self.ids.update(v["id"] for v in vectors)
+
+    async def delete(self, ids, namespace):
+        self.deleted.extend(ids)
+        self.ids.difference_update(ids)
+
+    async def list_paginated(self, prefix, namespace, pagination_token=None):
+        vectors = [SimpleNamespace(id=i) for i in sorted(self.ids) if i.startswith(prefix)]
+        return SimpleNamespace(vectors=vectors, pagination=None)
+
+
+class FakeEmbeddings:
+    def __init__(self):
+        self.embedded = []
+
+    async def aembed_documents(self, texts):
+        self.embedded.extend(texts)
+        return [[0.0] for _ in texts]
+
+
+@pytest.fixture
+def store(monkeypatch):
+    manifests = FakeManifests()
+    index = FakeIndex()
+
+    async def get_async_index(index_name=None):
+        return index
+
+    monkeypatch.setattr(ingestion, "async_db", SimpleNamespace(vector_manifests=manifests))
+    monkeypatch.setattr(ingestion, "get_async_index", get_async_index)
+    return SimpleNamespace(manifests=manifests, index=index)
+
+
+def records(source, texts):
+    return [{"id": chunk_id("doc_org", source, t), "text": t, "metadata": {"source": source}} for t in texts]
+
+
+def test_token_batches_respects_token_budget():
+    texts = ["word " * 50, "word " * 50, "word " * 50]
+    budget = estimate_tokens(texts[0]) * 2
+
+    batches = token_batches(texts, max_tokens=budget, max_items=10)
+
+    assert batches == [[0, 1], [2]]
+
+
+def test_token_batches_respects_item_limit():
+    assert token_batches(["a"] * 5, max_tokens=10_000, max_items=2) == [[0, 1], [2, 3], [4]]
+
+
+def test_token_batches_keeps_oversized_text_in_its_own_batch():
+    texts = ["short", "word " * 500, "short"]
+
+    batches = token_batches(texts, max_tokens=estimate_tokens(texts[0]) + 1, max_items=10)
+
+    assert batches == [[0], [1], [2]]
+
+
+def test_chunk_id_ignores_whitespace_but_not_source():
+    assert chunk_id("doc", "a.pdf", "hello  world\n") == chunk_id("doc", "a.pdf", "hello world")
+    assert chunk_id("doc", "a.pdf", "hello world") != chunk_id("doc", "b.pdf", "hello world")
+
+
+def test_sync_source_embeds_only_changes(store):
+    embeddings = FakeEmbeddings()
+    first = records("a.pdf", ["one", "two", "three"])
+
+    result = asyncio.run(sync_source(first, "kb_org", "a.pdf", embeddings))
+
+    assert result == {"added": 3, "unchanged": 0, "deleted": 0}
+    assert store.index.ids == {r["id"] for r in first}
+
+    embeddings.embedded.clear()
+    second = records("a.pdf", ["one", "two", "four"])
+
+    result = asyncio.run(sync_source(second, "kb_org", "a.pdf", embeddings))
+
+    assert result == {"added": 1, "unchanged": 2, "deleted": 1}
+    assert embeddings.embedded == ["four"]
+    assert store.index.deleted == [first[2]["id"]]
+    assert store.index.ids == {r["id"] for r in second}
+    assert set(store.manifests.docs[("kb_org", "a.pdf")]["chunk_ids"]) == store.index.ids
+
+
+def test_sync_source_collapses_duplicate_chunks(store):
+    result = asyncio.run(sync_source(records("a.pdf", ["same", "same "]), "kb_org", "a.pdf", FakeEmbeddings()))
+
+    assert result == {"added": 1, "unchanged": 0, "deleted": 0}
+
+
+def test_sync_source_with_no_records_deletes_source(store):
+    first = records("a.pdf", ["one", "two"])
+    asyncio.run(sync_source(first, "kb_org", "a.pdf", FakeEmbeddings()))
+
+    result = asyncio.run(sync_source([], "kb_org", "a.pdf"))
+
+    assert result == {"added": 0, "unchanged": 0, "deleted": 2}
+    assert store.index.ids == set()
+
+
+def test_sync_source_removes_legacy_vectors_on_first_sync_only(store):
+    store.index.ids.update({"doc_org_a.pdf_0", "doc_org_a.pdf_1", "doc_org_b.pdf_0"})
+    first = records("a.pdf", ["one"])
+
+    asyncio.run(sync_source(first, "kb_org", "a.pdf", FakeEmbeddings(), legacy_prefix="doc_org_a.pdf_"))
+
+    assert store.index.ids == {"doc_org_b.pdf_0", first[0]["id"]}
+
+    # With a manifest in place the prefix is not listed again
+    store.index.ids.add("doc_org_a.pdf_9")
+    asyncio.run(sync_source(first, "kb_org", "a.pdf", FakeEmbeddings(), legacy_prefix="doc_org_a.pdf_"))
+
+    assert "doc_org_a.pdf_9" in store.index.ids
+
+
+def test_sync_source_does_not_record_manifest_when_embedding_fails(store):
+    class FailingEmbeddings:
+        async def aembed_documents(self, texts):
+            raise RuntimeError("rate limited")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(sync_source(records("a.pdf", ["one"]), "kb_org", "a.pdf", FailingEmbeddings()))
+
+    assert store.manifests.docs == {}
+
+
+def test_uploading_a_new_source_keeps_other_uploads_legacy_vectors(store):
+    # Position-based IDs written by the old upload path for an earlier document
+    legacy = {"doc_0_1234", "doc_1_5678"}
+    store.index.ids.update(legacy)
+    upload = [{"id": chunk_id("upload", "file:b.pdf", t), "text": t, "metadata": {"text": t}} for t in ["one"]]
+
+    # The call add_document_to_vectorstore makes for a document with no manifest yet
+    asyncio.run(sync_source(upload, "org_ns", "file:b.pdf", FakeEmbeddings()))
+
+    assert legacy <= store.index.ids
+    assert store.index.deleted == []
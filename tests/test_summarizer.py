@@ -0,0 +1,50 @@
+from langchain_core.messages import AIMessage, HumanMessage
+
+from services.langgraph import summarizer
+from services.langgraph.summarizer import get_summarized_context
+
+
+def window(first_seq, count):
+    """A sliding history window of repeated short exchanges starting at first_seq"""
+    messages = []
+    for seq in range(first_seq, first_seq + count):
+        cls, content = (HumanMessage, "ok") if seq % 2 == 0 else (AIMessage, "Thanks!")
+        messages.append(cls(content=content, additional_kwargs={"seq": seq}))
+    return messages
+
+
+def test_repeated_messages_are_folded_in_exactly_once(monkeypatch):
+    folded = []
+    monkeypatch.setattr(summarizer, "summarize_conversation", lambda messages: "initial")
+    monkeypatch.setattr(summarizer, "progressive_summarize",
+                        lambda summary, messages: folded.append([m.additional_kwargs["seq"] for m in messages]) or summary)
+
+    first = get_summarized_context(window(0, 10), max_recent_turns=3)
+    assert first["summary_state"]["summarized_through"] == 3
+
+    # Two more messages aged out and the window slid by two
+    second = get_summarized_context(window(2, 10), max_recent_turns=3, previous_summary=first["summary_state"])
+
+    assert folded == [[4, 5]]
+    assert second["summary_state"]["summarized_through"] == 5
+
+
+def test_nothing_new_reuses_stored_summary(monkeypatch):
+    monkeypatch.setattr(summarizer, "summarize_conversation", lambda messages: "initial")
+    first = get_summarized_context(window(0, 10), max_recent_turns=3)
+
+    again = get_summarized_context(window(0, 10), max_recent_turns=3, previous_summary=first["summary_state"])
+
+    assert again["summary_updated"] is False
+    assert again["summary"] == "initial"
+
+
+def test_boundary_outside_window_resummarizes(monkeypatch):
+    calls = []
+    monkeypatch.setattr(summarizer, "summarize_conversation", lambda messages: calls.append(len(messages)) or "fresh")
+
+    result = get_summarized_context(window(20, 10), max_recent_turns=3,
+                                    previous_summary={"summary": "old", "summarized_through": 5})
+
+    assert calls == [4]
+    assert result["summary"] == "fresh"